@@ -23,8 +23,10 @@ to a sandboxed environment.
 
 from launch_ros_sandbox import actions
 from launch_ros_sandbox import descriptions
+from launch_ros_sandbox import events
 
 __all__ = [
     'actions',
-    'descriptions'
+    'descriptions',
+    'events'
 ]
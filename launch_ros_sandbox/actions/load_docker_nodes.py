@@ -22,29 +22,394 @@ as a Docker container. This Action is not exported and should only be used inter
 
 import asyncio
 from concurrent.futures import ThreadPoolExecutor
+import functools
+import io
+import logging
+import os
 import shlex
+import socket
+import ssl
+import sys
+import tarfile
 from threading import Lock
-from types import GeneratorType
-from typing import List, Optional
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 
-import docker
+from docker.errors import APIError
 from docker.errors import ImageNotFound
+from docker.models.containers import Container
+from docker.utils import parse_repository_tag
+from docker.utils.socket import frames_iter
+from docker.utils.socket import STDERR
+from docker.utils.socket import STDOUT
 
 import launch
 from launch import Action, LaunchContext
 from launch.event import Event
 from launch.event_handlers import OnShutdown
+from launch.events.process import ProcessExited
+from launch.events.process import ProcessStarted
 from launch.some_actions_type import SomeActionsType
 from launch.utilities import create_future, perform_substitutions
 
 from launch_ros_sandbox.descriptions.docker_policy import DockerPolicy
+from launch_ros_sandbox.descriptions.file_log_sink import FileLogSink
 from launch_ros_sandbox.descriptions.sandboxed_node import SandboxedNode
+from launch_ros_sandbox.events.container import ContainerDied
+from launch_ros_sandbox.events.container import ContainerKilled
+from launch_ros_sandbox.events.container import ContainerOutOfMemory
+from launch_ros_sandbox.utilities import node_supervisor
+from launch_ros_sandbox.utilities.container_broker import BrokerClient
+from launch_ros_sandbox.utilities.content_hash import cache_directory
+from launch_ros_sandbox.utilities.content_hash import FileHashCache
+from launch_ros_sandbox.utilities.content_hash import load_json_cache
+from launch_ros_sandbox.utilities.content_hash import save_json_cache
+from launch_ros_sandbox.utilities.derived_image import create_build_context
+from launch_ros_sandbox.utilities.derived_image import derived_dockerfile
+from launch_ros_sandbox.utilities.derived_image import derived_image_name
+from launch_ros_sandbox.utilities.derived_image import OVERLAY_CONTAINER_PATH
+from launch_ros_sandbox.utilities.docker_client import connections_in_use
+from launch_ros_sandbox.utilities.docker_client import lease_docker_client
+from launch_ros_sandbox.utilities.docker_events import lease_docker_events
+from launch_ros_sandbox.utilities.image_lock import ImageLock
+from launch_ros_sandbox.utilities.labels import FINGERPRINT_LABEL
+from launch_ros_sandbox.utilities.labels import launch_fingerprint
+from launch_ros_sandbox.utilities.labels import launch_id
+from launch_ros_sandbox.utilities.labels import LAUNCH_ID_LABEL
+from launch_ros_sandbox.utilities.labels import lock_container
+from launch_ros_sandbox.utilities.labels import owner_is_alive
+from launch_ros_sandbox.utilities.labels import owner_labels
+from launch_ros_sandbox.utilities.labels import policy_hash
+from launch_ros_sandbox.utilities.labels import POLICY_HASH_LABEL
+from launch_ros_sandbox.utilities.labels import REATTACH_LABEL
+from launch_ros_sandbox.utilities.log_collector import LogCollector
+from launch_ros_sandbox.utilities.log_tail import LogFileFollower
+from launch_ros_sandbox.utilities.log_writer import FileSinkHandler
+from launch_ros_sandbox.utilities.log_writer import get_log_writer
+from launch_ros_sandbox.utilities.node_output import emit_lines
+from launch_ros_sandbox.utilities.node_output import LineDecoder
+from launch_ros_sandbox.utilities.node_output import LogPump
+from launch_ros_sandbox.utilities.node_output import LogQueue
+from launch_ros_sandbox.utilities.node_output import PID_HEADER_FORMAT
+from launch_ros_sandbox.utilities.node_output import PidHeader
+from launch_ros_sandbox.utilities.node_output import StreamDemultiplexer
+from launch_ros_sandbox.utilities.node_output import suppressed_message
+from launch_ros_sandbox.utilities.node_output import TokenBucket
+from launch_ros_sandbox.utilities.orchestrator import get_orchestrator
+from launch_ros_sandbox.utilities.output_history import DUMP_LINE_COUNT
+from launch_ros_sandbox.utilities.output_history import OutputHistory
+from launch_ros_sandbox.utilities.passthrough import forward_output
+from launch_ros_sandbox.utilities.respawn_backoff import RespawnBackoff
+from launch_ros_sandbox.utilities.workspace_sync import affected_packages
+from launch_ros_sandbox.utilities.workspace_sync import WorkspaceSync
 
 
-def _containerized_cmd(entrypoint: str, package: str, executable: str) -> List[str]:
-    """Prepare the command for executing within the Docker container."""
+def _containerized_cmd(
+    entrypoint: str,
+    package: str,
+    executable: str,
+    overlay: Optional[str] = None
+) -> List[str]:
+    """
+    Prepare the command for executing within the Docker container.
+
+    If 'overlay' is set, the workspace installed there is sourced before the node is run.
+    """
     # Use ros2 CLI command to find the executable
-    return shlex.split(entrypoint) + ['ros2', 'run', package, executable]
+    cmd = ['ros2', 'run', package, executable]
+    if overlay is not None:
+        cmd = [
+            '/bin/bash', '-c', 'source {}/local_setup.bash && exec "$@"'.format(overlay), 'bash'
+        ] + cmd
+    return shlex.split(entrypoint) + cmd
+
+
+# Minimum number of seconds between two progress reports of an image pull.
+_PULL_PROGRESS_INTERVAL = 2.0
+
+# Name of the cache mapping the content hash of image archives to the images they contain.
+_IMAGE_IMPORTS_CACHE = 'image_imports.json'
+
+# Directory inside the container where launch_ros_sandbox keeps the state of the nodes.
+_CONTAINER_STATE_DIRECTORY = '/tmp/launch_ros_sandbox'
+
+# Directory inside the container where the 'files' log mode mounts the host log directory.
+_CONTAINER_LOG_DIRECTORY = '/var/log/launch_ros_sandbox'
+
+# Number of seconds the output of a killed node is still read for before its container is stopped.
+_NODE_KILL_TIMEOUT = 1.0
+
+# Maximum number of bytes read from the output of a node at once.
+_READ_SIZE = 65536
+
+# Number of seconds between two checks whether the processes of a stopped node are gone.
+_GROUP_POLL_PERIOD = 0.05
+
+# Command running a node, given the path of its PID file and its command, as the leader of a new
+# session and process group, whose PID it records. 'ros2 run' does not pass signals on to the node
+# it starts, so the node is only reached by signalling the whole group. setsid forks if it is
+# already a group leader, and then waits for the node and exits with its status.
+_SESSION_LEADER_CMD = 'setsid -w /bin/sh -c \'echo $$ > "$0" && exec "$@"\''
+
+# Like _SESSION_LEADER_CMD, but also writes the PID as a header line to the output first, so the
+# launch process learns it from the output stream without asking the container.
+_REPORTING_SESSION_LEADER_CMD = (
+    'setsid -w /bin/sh -c \'echo $$ > "$0" && printf "' + PID_HEADER_FORMAT + '" $$ && '
+    'exec "$@"\'')
+
+# Like _SESSION_LEADER_CMD, given the path of a second PID file after the first, which is moved
+# into place so that it never appears without its content.
+_FILE_REPORTING_SESSION_LEADER_CMD = (
+    'setsid -w /bin/sh -c \'echo $$ > "$0" && echo $$ > "$1.tmp" && mv "$1.tmp" "$1" && '
+    'shift && exec "$@"\'')
+
+# Number of seconds the sandbox waits on shutdown for the output of its nodes to be logged.
+_LOG_PUMP_TIMEOUT = 5.0
+
+# Number of seconds the sandbox waits on shutdown for the output of its nodes to reach their files.
+_LOG_WRITER_TIMEOUT = 5.0
+
+# Number of seconds between two reads of the lines sampled by the log collector.
+_SAMPLE_PERIOD = 0.1
+
+# Severity of the lines a node without a TTY writes to stderr.
+_STDERR_LEVEL = logging.WARNING
+
+# Path of the node supervisor inside the container, if the policy uses it.
+_SUPERVISOR_PATH = '{}/node_supervisor.py'.format(_CONTAINER_STATE_DIRECTORY)
+
+
+def _optional_int(value: Any) -> Optional[int]:
+    """Return 'value' as an integer, or None if it is not one."""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _with_volume(
+    volumes: Any,
+    host_path: str,
+    container_path: str
+) -> Any:
+    """Return the 'volumes' run argument, a dict or a list, with a read-write bind mount added."""
+    if isinstance(volumes, list):
+        return volumes + ['{}:{}:rw'.format(host_path, container_path)]
+    volumes = dict(volumes or {})
+    volumes[host_path] = {'bind': container_path, 'mode': 'rw'}
+    return volumes
+
+
+class _DockerNode:
+    """
+    Runtime state of a SandboxedNode running inside the Docker container.
+
+    Each node runs in a session of its own and records the PID of the session leader, which is
+    also the ID of its process group, in a file inside the container. This allows signalling every
+    process of a single node, including the node 'ros2 run' started, without touching the other
+    nodes in the container.
+    """
+
+    def __init__(
+        self,
+        *,
+        index: int,
+        package: str,
+        executable: str,
+        cmd: List[str],
+        logger: Any = None,
+        log_sink: Optional[FileLogSink] = None
+    ) -> None:
+        """
+        Construct the node state from the resolved package, executable and command.
+
+        The node's output is logged to 'logger', which defaults to the logger of this module, and
+        written to 'log_sink', if any.
+        """
+        self.index = index
+        self.package = package
+        self.executable = executable
+        self.cmd = cmd
+        self.logger = logger or launch.logging.get_logger(__name__)
+        self.log_sink = log_sink
+        # Handler writing the node's output to its file sink from this process, if it does.
+        self.log_handler = None  # type: Optional[FileSinkHandler]
+        # ID of the exec running the node; None for a node started by an earlier launch.
+        self.exec_id = None  # type: Optional[str]
+        # PID of the node inside the container, as reported by the node supervisor or written by
+        # the node's wrapper. Docker only knows the PID of an exec on the host, if at all.
+        self.pid = None  # type: Optional[int]
+        # Splits the header with the node's PID off its output, while it is expected.
+        self.pid_header = None  # type: Optional[PidHeader]
+        # Whether the start and the exit of the node's current run were reported.
+        self.started = False
+        self.exited = False
+        # Completes when the node's output stream ends, which is when the node exits.
+        self.log_future = None  # type: Optional[asyncio.Future]
+        # Exit status a node wrote to the log directory, until the rest of its log file is read.
+        self.exit_status = None  # type: Optional[bytes]
+        # Splits the node's output into lines across the chunks it is read in.
+        self.output = LineDecoder()
+        # Without a TTY, splits the node's output into stdout and stderr, which has its own lines.
+        self.streams = StreamDemultiplexer()
+        self.error_output = LineDecoder()
+        # Rate limit of the node's output, if the policy limits it.
+        self.rate_limit = None  # type: Optional[TokenBucket]
+        # Lines suppressed by the rate limits since the last suppression was reported, and overall.
+        self.suppressed = 0
+        self.suppressed_total = 0
+        # Most recent output of the node, if it is kept in this process.
+        self.history = None  # type: Optional[OutputHistory]
+        # Whether the node is being stopped on purpose, so its exit is not reported as a failure.
+        self.stopping = False
+        # Restarts of the node once it exited, if it respawns, and the task waiting to restart it.
+        self.backoff = None  # type: Optional[RespawnBackoff]
+        self.respawn_task = None  # type: Optional[asyncio.Task]
+
+    @property
+    def pidfile(self) -> str:
+        """Return the path of the file holding the node's PID inside the container."""
+        return '{}/{}.pid'.format(_CONTAINER_STATE_DIRECTORY, self.index)
+
+    @property
+    def exec_cmd(self) -> List[str]:
+        """
+        Return the command starting the node in a new session, recording the leader's PID.
+
+        The PID is also written as a header line before the node's output.
+        """
+        return [
+            '/bin/sh', '-c',
+            'mkdir -p "${0%/*}" && exec ' + _REPORTING_SESSION_LEADER_CMD + ' "$0" "$@"',
+            self.pidfile
+        ] + self.cmd
+
+    @property
+    def detached_exec_cmd(self) -> List[str]:
+        """
+        Return the command running the node detached from the launch process.
+
+        The node's output is appended to a log file next to its PID file so that it can be
+        followed again after the launch process restarted.
+        """
+        return [
+            '/bin/sh', '-c',
+            'mkdir -p "${0%/*}" && exec ' + _SESSION_LEADER_CMD +
+            ' "$0" "$@" >> "${0%.pid}.log" 2>&1',
+            self.pidfile
+        ] + self.cmd
+
+    def log_file_exec_cmd(
+        self,
+        log_file: str,
+        pid_file: str,
+        exit_file: str
+    ) -> List[str]:
+        """
+        Return the command running the node with its output appended to 'log_file'.
+
+        Once the node started, its PID is written to 'pid_file', and once it exited, its exit
+        status is written to 'exit_file'. Both are moved into place so that they never appear
+        without their content.
+        """
+        return [
+            '/bin/sh', '-c',
+            'pidfile="$0"; log="$1"; pid="$2"; status="$3"; shift 3; mkdir -p "${pidfile%/*}"; '
+            + _FILE_REPORTING_SESSION_LEADER_CMD + ' "$pidfile" "$pid" "$@" >> "$log" 2>&1; '
+            'echo $? > "$status.tmp" && mv "$status.tmp" "$status"',
+            self.pidfile, log_file, pid_file, exit_file
+        ] + self.cmd
+
+    def follow_output_cmd(self, from_start: bool) -> List[str]:
+        """
+        Return the command following the output of a detached node until the node exits.
+
+        If 'from_start' is False, only output written from now on is followed. The PID of the node
+        is written as a header line before its output.
+        """
+        return [
+            '/bin/sh', '-c',
+            'while [ ! -s "$0" ]; do sleep 0.01; done; pid="$(cat "$0")"; '
+            'printf "' + PID_HEADER_FORMAT + '" "$pid"; '
+            'exec tail -s 0.5 -n "$1" --pid="$pid" -F "${0%.pid}.log"',
+            self.pidfile, '+1' if from_start else '0'
+        ]
+
+    def group_wait_cmd(self, timeout: Optional[float]) -> List[str]:
+        """
+        Return the command waiting until every process of the node exited.
+
+        The command fails if processes of the node are still running after 'timeout' seconds, or
+        never if 'timeout' is None.
+        """
+        polls = -1 if timeout is None else int(timeout / _GROUP_POLL_PERIOD)
+        return [
+            '/bin/sh', '-c',
+            'pid="$(cat "$0" 2>/dev/null)" || exit 0; i=0; '
+            'while kill -s 0 -- -"$pid" 2>/dev/null; do '
+            '[ "$1" -ge 0 ] && [ "$i" -ge "$1" ] && exit 1; i=$((i + 1)); sleep "$2"; done',
+            self.pidfile, str(polls), str(_GROUP_POLL_PERIOD)
+        ]
+
+    def signal_cmd(self, signal_name: str) -> List[str]:
+        """Return the command sending the signal 'signal_name' to every process of the node."""
+        return ['/bin/sh', '-c', 'kill -s "$1" -- -"$(cat "$0")"', self.pidfile, signal_name]
+
+
+class _PullProgress:
+    """
+    Aggregate the progress of a streamed image pull and report it at a bounded rate.
+
+    Docker reports the pull progress per layer and many times per second. The layers are summed up
+    here and only reported to the logger once every `interval` seconds.
+    """
+
+    def __init__(
+        self,
+        image_name: str,
+        logger: Any,
+        *,
+        interval: float = _PULL_PROGRESS_INTERVAL,
+        clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        """Construct the progress tracker for the pull of `image_name`."""
+        self._image_name = image_name
+        self._logger = logger
+        self._interval = interval
+        self._clock = clock
+        self._last_report = clock()
+        # Maps each layer ID to its downloaded and total size in bytes.
+        self._layers = {}  # type: Dict[str, List[int]]
+        self._completed = set()  # type: set
+
+    def update(self, status: Dict[str, Any]) -> None:
+        """Record a single status message of the pull stream and report it if it is time to."""
+        layer = status.get('id')
+        state = status.get('status', '')
+        if layer is not None:
+            detail = status.get('progressDetail') or {}
+            if state == 'Downloading' and detail.get('total'):
+                self._layers[layer] = [detail.get('current', 0), detail['total']]
+            elif state in ('Download complete', 'Pull complete', 'Already exists'):
+                self._completed.add(layer)
+                sizes = self._layers.setdefault(layer, [0, 0])
+                sizes[0] = sizes[1]
+
+        now = self._clock()
+        if now - self._last_report >= self._interval:
+            self._last_report = now
+            self._logger.info(self.summary())
+
+    def summary(self) -> str:
+        """Return a one line summary of the pull progress."""
+        current = sum(c for c, _ in self._layers.values())
+        total = sum(t for _, t in self._layers.values())
+        return 'Pulling image {}: {}/{} layers complete, {:.1f}/{:.1f} MB downloaded'.format(
+            self._image_name,
+            len(self._completed),
+            len(self._layers.keys() | self._completed),
+            current / 1e6,
+            total / 1e6)
 
 
 class LoadDockerNodes(Action):
@@ -71,60 +436,426 @@ class LoadDockerNodes(Action):
         self._node_descriptions = node_descriptions
         self._completed_future = None  # type: Optional[asyncio.Future]
         self._started_task = None  # type: Optional[asyncio.Task]
-        self._container = None  # type: Optional[docker.models.containers.Container]
+        # Task stopping the sandbox once the launch shuts down.
+        self._stop_task = None  # type: Optional[asyncio.Task]
+        self._context = None  # type: Optional[LaunchContext]
+        # Action the events of the sandbox are emitted for.
+        self._event_action = self  # type: Action
+        self._container = None  # type: Optional[Container]
+        # The image to run; the policy's image unless the lockfile pins it to a digest.
+        self._image_name = policy.image_name
+        # ID of the image to run, once it is resolved to find a container to reattach to.
+        self._image_id = None  # type: Optional[str]
+        # Lock of the container taken over from an earlier launch, held while it is used.
+        self._container_lock = None  # type: Any
         self._shutdown_lock = Lock()
-        self._docker_client = docker.from_env()
+        self._docker_lease = lease_docker_client()
+        self._docker_client = self._docker_lease.client
         self.__logger = launch.logging.get_logger(__name__)
-        self._executor = ThreadPoolExecutor(max_workers=len(node_descriptions))
+        # Only created for output that cannot be read on the event loop.
+        self._executor = None  # type: Optional[ThreadPoolExecutor]
+        self._nodes = []  # type: List[_DockerNode]
+        self._workspace_sync = None  # type: Optional[WorkspaceSync]
+        self._sync_task = None  # type: Optional[asyncio.Task]
+        self._claimed_from_broker = False
+        # Lease of the DockerEventWatcher shared by all sandboxes, and what its events said about
+        # the container.
+        self._event_lease = None  # type: Any
+        self._container_oom = False
+        self._container_signal = None  # type: Optional[int]
+        # Socket of the node supervisor exec, if the policy uses the supervisor.
+        self._supervisor_socket = None  # type: Any
+        self._supervisor_lock = Lock()
+        # Rate limit shared by all nodes, and the queue of the output passing the rate limits, if
+        # the policy limits the log output.
+        self._sandbox_rate_limit = None  # type: Optional[TokenBucket]
+        self._log_queue = None  # type: Optional[LogQueue]
+        self._log_pump = None  # type: Optional[LogPump]
+        # Helper process reading the node output, if the policy uses the 'pump' log mode.
+        self._log_collector = None  # type: Optional[LogCollector]
+        self._collector_tasks = []  # type: List[asyncio.Task]
+        # Follower of the node log files, if the policy uses the 'files' log mode.
+        self._log_follower = None  # type: Optional[LogFileFollower]
 
-    def _pull_docker_image(self) -> None:
+    def _pull_docker_image(
+        self,
+        image_name: str
+    ) -> None:
         """
         Pull the docker image.
 
         This will download the Docker image if it is not currently cached and will update it if its
-        out of date.
+        out of date. 'image_name' is either 'repository:tag' or 'repository@digest'. The pull is
+        streamed so its progress can be reported while it is running. This method blocks until the
+        pull is complete and must not be called on the event loop.
 
         :raises ImageNotFound if Docker cannot find the remote repo for the image to pull
+        :raises APIError if the registry reports an error during the pull
         """
-        self.__logger.info('Pulling image {}'.format(self._policy.image_name))
+        self.__logger.info('Pulling image {}'.format(image_name))
+        progress = _PullProgress(image_name, self.__logger)
+        repository, tag = parse_repository_tag(image_name)
 
         # This method may throw an ImageNotFound exception. Let the exception propogate upwards
-        self._docker_client.images.pull(
-            self._policy.repository,
-            tag=self._policy.tag
+        for status in self._docker_client.api.pull(
+            repository,
+            tag=tag,
+            stream=True,
+            decode=True
+        ):
+            if 'error' in status:
+                raise APIError(status['error'])
+            progress.update(status)
+
+        self.__logger.debug(progress.summary())
+
+    def _image_exists_locally(
+        self,
+        image_name: str
+    ) -> bool:
+        """Return True if the Docker image is already present in the local image store."""
+        try:
+            self._docker_client.images.get(image_name)
+        except ImageNotFound:
+            return False
+        return True
+
+    def _load_image_archive(
+        self,
+        archive_path: str
+    ) -> List[str]:
+        """
+        Stream an image archive into the local image store.
+
+        :returns the IDs of the images contained in the archive
+        :raises APIError if Docker fails to load the archive
+        """
+        image_ids = set()
+        with open(archive_path, 'rb') as archive:
+            for status in self._docker_client.api.load_image(archive):
+                if 'error' in status:
+                    raise APIError(status['error'])
+
+                message = status.get('stream', '').strip()
+                if message.startswith('Loaded image ID:'):
+                    image_ids.add(message.split(':', 1)[1].strip())
+                elif message.startswith('Loaded image:'):
+                    loaded_image_name = message.split(':', 1)[1].strip()
+                    image_ids.add(self._docker_client.images.get(loaded_image_name).id)
+        return sorted(image_ids)
+
+    def _import_image_archive(
+        self,
+        archive_path: str
+    ) -> None:
+        """
+        Load an image archive unless its content has already been loaded.
+
+        The archive is identified by its content hash, and the hash of an unchanged archive is
+        cached, so a warm start neither reads nor loads the archive.
+        """
+        hash_cache = FileHashCache()
+        try:
+            archive_hash = hash_cache.hash_file(archive_path)
+        except OSError as ex:
+            self.__logger.error('Unable to read image archive "{}": {}'.format(archive_path, ex))
+            return
+        # The archive is loaded all the same if its hash cannot be kept for the next launch.
+        try:
+            hash_cache.save()
+        except OSError as ex:
+            self.__logger.warning('Unable to update the file hash cache: {}'.format(ex))
+
+        imports_path = os.path.join(cache_directory(), _IMAGE_IMPORTS_CACHE)
+        image_ids = load_json_cache(imports_path).get(archive_hash)
+        if image_ids and all(self._image_exists_locally(image_id) for image_id in image_ids):
+            self.__logger.debug('Image archive "{}" already loaded; skipping load.'
+                                .format(archive_path))
+            return
+
+        self.__logger.info('Loading image archive "{}"'.format(archive_path))
+        try:
+            image_ids = self._load_image_archive(archive_path)
+        except (APIError, OSError) as ex:
+            self.__logger.error('Unable to load image archive "{}": {}'.format(archive_path, ex))
+            return
+
+        # Re-read the cache right before updating it to keep entries written by other launches.
+        imports = load_json_cache(imports_path)
+        imports[archive_hash] = image_ids
+        try:
+            save_json_cache(imports_path, imports)
+        except OSError as ex:
+            self.__logger.warn('Unable to update the image archive cache: {}'.format(ex))
+
+    def _pinned_image_name(self) -> Optional[str]:
+        """Return the image reference pinned by the policy's lockfile, if there is one."""
+        lockfile = self._policy.lockfile
+        if lockfile is None:
+            return None
+
+        try:
+            lock = ImageLock.load(lockfile)
+        except FileNotFoundError:
+            self.__logger.warn('Image lockfile "{}" not found; resolving "{}" by its tag.'
+                               .format(lockfile, self._policy.image_name))
+            return None
+        except (OSError, ValueError) as ex:
+            self.__logger.error('Unable to read image lockfile "{}": {}'.format(lockfile, ex))
+            return None
+
+        pinned_image_name = lock.pinned_reference(self._policy.image_name)
+        if pinned_image_name is None:
+            self.__logger.warn('Image "{}" is not pinned in lockfile "{}"; resolving it by tag.'
+                               .format(self._policy.image_name, lockfile))
+        return pinned_image_name
+
+    def _build_derived_image(
+        self,
+        base_image_name: str
+    ) -> str:
+        """
+        Build the image baking the policy's setup commands and overlay into the base image.
+
+        The derived image is tagged with a hash of its inputs and is only built if no image with
+        that tag exists yet.
+
+        :returns the name of the derived image
+        :raises ImageNotFound if the base image is not in the local image store
+        :raises APIError if the build fails
+        :raises OSError if the overlay cannot be read
+        """
+        setup_commands = self._policy.setup_commands or []
+        overlay = self._policy.overlay
+        if overlay is not None and not os.path.isdir(overlay):
+            raise NotADirectoryError('Overlay "{}" is not a directory'.format(overlay))
+
+        base_image_id = self._docker_client.images.get(base_image_name).id
+        overlay_hash = None
+        if overlay is not None:
+            hash_cache = FileHashCache()
+            overlay_hash = hash_cache.hash_tree(overlay)
+            try:
+                hash_cache.save()
+            except OSError as ex:
+                self.__logger.debug(ex)
+
+        image_name = derived_image_name(base_image_id, setup_commands, overlay_hash)
+        if self._image_exists_locally(image_name):
+            self.__logger.debug('Derived image "{}" is up to date.'.format(image_name))
+            return image_name
+
+        self.__logger.info('Building derived image "{}" from "{}"'
+                           .format(image_name, base_image_name))
+        dockerfile = derived_dockerfile(base_image_id, setup_commands, overlay is not None)
+        with create_build_context(dockerfile, overlay) as build_context:
+            for status in self._docker_client.api.build(
+                fileobj=build_context,
+                custom_context=True,
+                tag=image_name,
+                rm=True,
+                decode=True
+            ):
+                if 'error' in status:
+                    raise APIError(status['error'])
+                if status.get('stream', '').strip():
+                    self.__logger.debug(status['stream'].strip())
+        return image_name
+
+    def _prepare_docker_image(self) -> str:
+        """
+        Make the Docker image available according to the policy.
+
+        The image archive, if any, is loaded first. An image pinned by the lockfile is run from the
+        local image store without contacting the registry. Otherwise the pull policy decides
+        whether the tag is pulled first. Finally, the setup commands and overlay are baked into a
+        derived image if the policy declares any.
+
+        Blocking; this is run in an executor so the event loop keeps running during the pull.
+        Pull failures are not fatal since the image might still be found locally.
+
+        :returns the name of the image to run
+        """
+        if self._policy.image_archive is not None:
+            self._import_image_archive(self._policy.image_archive)
+
+        image_name = self._resolve_base_image()
+
+        if self._policy.setup_commands or self._policy.overlay is not None:
+            try:
+                image_name = self._build_derived_image(image_name)
+            except (APIError, OSError) as ex:
+                # ImageNotFound for the base image is reported when the container fails to start.
+                if not isinstance(ex, ImageNotFound):
+                    self.__logger.error('Unable to build the derived image of "{}": {}'
+                                        .format(image_name, ex))
+        return image_name
+
+    def _image_preparation_key(self) -> tuple:
+        """
+        Return the key identifying the image preparation of this policy.
+
+        Sandboxes whose policies agree on every input of the preparation share a single run of it.
+        """
+        def absolute(path: Optional[str]) -> Optional[str]:
+            return None if path is None else os.path.abspath(path)
+
+        return (
+            self._policy.image_name,
+            self._policy.pull_policy,
+            absolute(self._policy.lockfile),
+            absolute(self._policy.image_archive),
+            tuple(self._policy.setup_commands or ()),
+            absolute(self._policy.overlay),
         )
 
+    def _snapshot_workspace(self) -> None:
+        """Record the overlay content the container starts with, if it is synchronized."""
+        if self._policy.sync_overlay and self._policy.overlay is not None:
+            self._workspace_sync = WorkspaceSync(self._policy.overlay)
+            self._workspace_sync.snapshot()
+            try:
+                self._workspace_sync.hash_cache.save()
+            except OSError as ex:
+                self.__logger.debug(ex)
+
+    def _resolve_base_image(self) -> str:
+        """
+        Resolve the image to run from the lockfile, and pull it according to the pull policy.
+
+        :returns the name of the resolved image
+        """
+        pull_policy = self._policy.pull_policy
+        image_name = self._policy.image_name
+
+        pinned_image_name = self._pinned_image_name()
+        if pinned_image_name is not None:
+            # A digest always refers to the same content, so it never needs to be refreshed.
+            if pull_policy != 'never' and not self._image_exists_locally(pinned_image_name):
+                self._try_pull_docker_image(pinned_image_name)
+            return pinned_image_name
+
+        if pull_policy == 'never':
+            return image_name
+        if pull_policy == 'if-not-present' and self._image_exists_locally(image_name):
+            self.__logger.debug('Image "{}" found locally; skipping pull.'.format(image_name))
+            return image_name
+
+        self._try_pull_docker_image(image_name)
+        return image_name
+
+    def _try_pull_docker_image(
+        self,
+        image_name: str
+    ) -> None:
+        """Try to pull the image and warn if it cannot be found."""
+        try:
+            self._pull_docker_image(image_name)
+        except APIError as ex:
+            self.__logger.warn('Image "{}" could not be pulled but may be found locally.'
+                               .format(image_name))
+            self.__logger.debug(ex)
+
+    def _claim_broker_container(self) -> bool:
+        """
+        Claim an already started container from the container broker.
+
+        :returns True if a container was claimed, False if one has to be created
+        """
+        try:
+            container_id = BrokerClient().claim(
+                self._image_name, self._policy.run_args, policy_hash=self._policy_hash(),
+                owner_pid=os.getpid(), launch_id=launch_id())
+        except (OSError, ValueError, TypeError) as ex:
+            self.__logger.debug('Container broker unavailable: {}'.format(ex))
+            return False
+
+        if container_id is None:
+            self.__logger.debug('Container broker has no warm container for "{}" yet.'
+                                .format(self._image_name))
+            return False
+
+        self._container = self._docker_client.containers.get(container_id)
+        self._claimed_from_broker = True
+        try:
+            self._container.rename(self._policy.container_name)
+        except APIError as ex:
+            self.__logger.warn('Unable to rename warm container "{}" to "{}": {}'
+                               .format(self._container.name, self._policy.container_name, ex))
+
+        self.__logger.info('Running warm Docker container: \"{}\"'
+                           .format(self._policy.container_name))
+        return True
+
     def _start_docker_container(self) -> None:
         """
         Start Docker container.
 
-        Run arguments will be forwarded to the containers run command if they exist.
+        Run arguments will be forwarded to the containers run command if they exist. If the policy
+        uses the container broker, a warm container is claimed from it instead when available.
         """
-        tmp_run_args = self._policy.run_args or {}
+        # Warm containers cannot be labelled for a later launch to find them, nor can they mount
+        # the log directory.
+        if not (self._policy.use_broker and not self._policy.reattach and
+                self._policy.log_directory is None and self._claim_broker_container()):
+            tmp_run_args = dict(self._policy.run_args or {})
+            tmp_run_args['labels'] = self._container_labels()
+            if self._policy.log_directory is not None:
+                tmp_run_args['volumes'] = _with_volume(
+                    tmp_run_args.get('volumes'),
+                    os.path.abspath(self._policy.log_directory),
+                    _CONTAINER_LOG_DIRECTORY)
 
-        # This method may throw an ImageNotFound exception. Let the exception propogate upwards
-        self._container = self._docker_client.containers.run(
-            self._policy.image_name,
-            detach=True,
-            auto_remove=True,
-            tty=True,
-            name=self._policy.container_name,
-            **tmp_run_args
-        )
+            # This method may throw an ImageNotFound exception. Let the exception propogate upwards
+            self._container = self._docker_client.containers.run(
+                self._image_name,
+                detach=True,
+                auto_remove=True,
+                tty=True,
+                name=self._policy.container_name,
+                **tmp_run_args
+            )
+            self.__logger.info('Running Docker container: \"{}\"'
+                               .format(self._policy.container_name))
 
-        self.__logger.info('Running Docker container: \"{}\"'.format(self._policy.container_name))
+        # The container is started in an executor, so the launch may have shut down meanwhile.
+        with self._shutdown_lock:
+            if self._completed_future is not None:
+                return
+            container = self._container
+            self._container = None
+        if container is not None:
+            self._stop_docker_container(container)
+
+    def _stop_docker_container(self, container: Any) -> None:
+        """
+        Stop the Docker container, or hand it back to the broker it was claimed from. Blocking.
+
+        The nodes were given their time to exit already, so the container is killed right away.
+        Docker removes it once it stopped.
+        """
+        if self._claimed_from_broker:
+            try:
+                BrokerClient().release(container.id)
+                return
+            except (OSError, ValueError) as ex:
+                self.__logger.warn('Unable to hand container "{}" back to the broker: {}'
+                                   .format(self._policy.container_name, ex))
+
+        try:
+            container.stop(timeout=0)
+        except APIError as ex:
+            # The container may already be gone.
+            self.__logger.debug('Unable to stop container "{}": {}'
+                                .format(self._policy.container_name, ex))
 
-    def _load_nodes_in_docker(
+    def _resolve_nodes(
         self,
         context: LaunchContext
     ) -> None:
-        """Load all nodes into Docker container."""
-        if self._container is None:
-            self.__logger.error('Unable to load nodes into Docker container: '
-                                'no active Docker container!')
-            return
-
-        for description in self._node_descriptions:
+        """Resolve the command and the logger of every node to run in the Docker container."""
+        logger_names = set()  # type: set
+        for index, description in enumerate(self._node_descriptions):
             package_name = perform_substitutions(
                 context=context,
                 subs=description.package
@@ -138,42 +869,1161 @@ class LoadDockerNodes(Action):
             cmd = _containerized_cmd(
                 entrypoint=self._policy.entrypoint,
                 package=package_name,
-                executable=executable_name
+                executable=executable_name,
+                overlay=OVERLAY_CONTAINER_PATH if self._policy.overlay is not None else None
             )
 
-            log_generator = self._container.exec_run(
+            # Each node logs to its own logger, named after the container and the node.
+            node_name = executable_name
+            if description.node_name is not None:
+                node_name = perform_substitutions(context=context, subs=description.node_name)
+            logger_name = '{}.{}'.format(self._policy.container_name, node_name)
+            if logger_name in logger_names:
+                logger_name = '{}-{}'.format(logger_name, index)
+            logger_names.add(logger_name)
+
+            node = _DockerNode(
+                index=index,
+                package=package_name,
+                executable=executable_name,
                 cmd=cmd,
-                tty=True,
-                stream=True,
+                logger=launch.logging.get_logger(logger_name),
+                log_sink=description.log_sink
             )
+            # In the 'pump' log mode, the log collector writes to the sinks instead.
+            if description.log_sink is not None and \
+                    self._policy.log_mode in ('stream', 'files'):
+                node.log_handler = FileSinkHandler(logger_name, description.log_sink)
+                node.logger.addHandler(node.log_handler)
+            # The output only passes through this process in the 'stream' and 'files' log modes.
+            if description.output_history_size and \
+                    self._policy.log_mode in ('stream', 'files'):
+                node.history = OutputHistory(description.output_history_size)
+            if description.respawn is not None:
+                node.backoff = RespawnBackoff(description.respawn)
+            self._nodes.append(node)
+
+    def _start_log_limits(self) -> None:
+        """Create the rate limits and start the thread logging the node output, if limited."""
+        limits = self._policy.log_limits
+        if limits is None:
+            return
+
+        # The bursts default to one second worth of lines, so they are only None without a rate.
+        if limits.node_rate is not None and limits.node_burst is not None:
+            for node in self._nodes:
+                node.rate_limit = TokenBucket(limits.node_rate, limits.node_burst)
+        if limits.sandbox_rate is not None and limits.sandbox_burst is not None:
+            self._sandbox_rate_limit = TokenBucket(limits.sandbox_rate, limits.sandbox_burst)
+        self._log_queue = LogQueue(limits.queue_size, limits.drop_policy)
+        self._log_pump = LogPump(
+            self._log_queue, 'log pump of {}'.format(self._policy.container_name))
+
+    async def _stop_log_limits(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Stop the thread logging the node output, reporting the lines it did not log."""
+        if self._log_queue is None:
+            return
+
+        # The lines already queued, which are the last output of the nodes, are logged before the
+        # node loggers lose their file sinks.
+        self._log_queue.close()
+        if self._log_pump is not None:
+            await loop.run_in_executor(None, self._log_pump.join, _LOG_PUMP_TIMEOUT)
+            if self._log_pump.is_alive():
+                self.__logger.warning('The output of container "{}" was not logged within {} '
+                                      'seconds'.format(self._policy.container_name,
+                                                       _LOG_PUMP_TIMEOUT))
+        suppressed = sum(node.suppressed_total for node in self._nodes)
+        if suppressed or self._log_queue.dropped:
+            self.__logger.warning(
+                'Output of container "{}": {} lines suppressed by the rate limits, {} lines '
+                'dropped from the full log queue'.format(
+                    self._policy.container_name, suppressed, self._log_queue.dropped))
+
+    async def _start_log_collector(
+        self,
+        context: LaunchContext
+    ) -> None:
+        """Start the helper process reading the node output, if the policy uses it."""
+        if self._policy.log_mode != 'pump':
+            return
+
+        sample_rate = None
+        if self._policy.log_limits is not None:
+            sample_rate = self._policy.log_limits.node_rate
+        if sample_rate is None:
+            self._log_collector = LogCollector(len(self._nodes))
+        else:
+            self._log_collector = LogCollector(len(self._nodes), sample_rate=sample_rate)
+        await self._log_collector.start()
+
+        loop = context.asyncio_loop
+        self._collector_tasks = [
+            loop.create_task(self._forward_log_samples()),
+            loop.create_task(self._read_log_collector(loop)),
+        ]
+
+    async def _forward_log_samples(self) -> None:
+        """Log the lines sampled by the log collector until the launch shuts down."""
+        while True:
+            await asyncio.sleep(_SAMPLE_PERIOD)
+            self._log_samples()
+
+    def _log_samples(self) -> None:
+        """Log the lines sampled by the log collector since they were last logged."""
+        assert self._log_collector is not None
+
+        lines = {}  # type: dict
+        for index, line in self._log_collector.ring.take():
+            lines.setdefault(index, []).append(line)
+        for index, node_lines in lines.items():
+            # Samples are not worth waiting for, so they are dropped while the log queue is full.
+            self._emit_lines(self._nodes[index], node_lines, block=False, drop=True)
+
+    async def _read_log_collector(
+        self,
+        loop: asyncio.AbstractEventLoop
+    ) -> None:
+        """Record the nodes the log collector reports as started, and as ended."""
+        assert self._log_collector is not None
+
+        while True:
+            report = await self._log_collector.report()
+            if report is None:
+                break
+            node = self._nodes[report['index']]
+            if 'pid' in report:
+                node.pid = report['pid']
+                self._node_started(node)
+                continue
+            self._log_samples()
+            self._node_exited(node, await self._inspect_node_exit(loop, node))
+
+    def _stop_log_collector(self) -> None:
+        """Stop the log collector, reporting how much output it wrote."""
+        if self._log_collector is None:
+            return
+
+        for task in self._collector_tasks:
+            task.cancel()
+        self._collector_tasks = []
+
+        ring = self._log_collector.ring
+        lines = sum(ring.output(node.index)[0] for node in self._nodes)
+        size = sum(ring.output(node.index)[1] for node in self._nodes)
+        self.__logger.debug('Log collector of container "{}" wrote {} lines ({} bytes); {} '
+                            'samples dropped'.format(
+                                self._policy.container_name, lines, size, ring.dropped))
+        self._log_collector.close()
+        self._log_collector = None
+
+    def _start_log_follower(
+        self,
+        context: LaunchContext
+    ) -> None:
+        """Start following the node log files in the log directory, if the policy uses them."""
+        if self._policy.log_directory is None:
+            return
+
+        os.makedirs(self._policy.log_directory, exist_ok=True)
+        self._log_follower = LogFileFollower(context.asyncio_loop, self._policy.log_directory)
+        if not self._log_follower.uses_inotify:
+            self.__logger.debug('inotify is unavailable; polling the node log files')
+
+    def _follow_node_log_file(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        node: _DockerNode
+    ) -> None:
+        """Forward what a node appends to its log file until its exit status appears."""
+        assert self._log_follower is not None
+        assert self._policy.log_directory is not None
+
+        # The PID and exit status of an earlier run of the node must not be taken for this one's.
+        pid_file = node.logger.name + '.pid'
+        exit_file = node.logger.name + '.exit'
+        for name in (pid_file, exit_file):
+            try:
+                os.remove(os.path.join(self._policy.log_directory, name))
+            except FileNotFoundError:
+                pass
+
+        node.log_future = loop.create_future()
+        node.exit_status = None
+        self._log_follower.follow(node.logger.name + '.log',
+                                  functools.partial(self._handle_log_file_chunk, loop, node))
+        self._log_follower.follow(
+            pid_file, functools.partial(self._node_log_file_started, node), from_end=False)
+        self._log_follower.follow(
+            exit_file, functools.partial(self._node_log_file_exited, node), from_end=False)
+
+    def _handle_log_file_chunk(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        node: _DockerNode,
+        log: bytes
+    ) -> None:
+        """
+        Log a chunk of a node's log file, and stop reading the file while the log queue is full.
+
+        The output stays in the file meanwhile, so the 'block' drop policy loses nothing, and the
+        log queue stays bounded.
+        """
+        if self._handle_log_chunk(node, log, block=False):
+            return
+
+        assert self._log_follower is not None and self._log_queue is not None
+        self._log_follower.pause(node.logger.name + '.log')
+        loop.run_in_executor(None, self._log_queue.wait_for_room).add_done_callback(
+            lambda _: self._resume_log_file(node))
+
+    def _resume_log_file(self, node: _DockerNode) -> None:
+        """Read a node's log file again once the log queue has room, and finish an exited node."""
+        if self._log_follower is None:
+            return
+        self._log_follower.resume(node.logger.name + '.log')
+        if node.exit_status is not None:
+            self._node_log_file_exited(node, node.exit_status)
+
+    def _node_log_file_started(
+        self,
+        node: _DockerNode,
+        pid: bytes
+    ) -> None:
+        """Report a node as started once its wrapper wrote the node's PID."""
+        assert self._log_follower is not None
+
+        self._log_follower.unfollow(node.logger.name + '.pid')
+        if not node.exited:
+            node.pid = _optional_int(pid.decode('utf-8', 'replace').strip())
+        self._node_started(node)
+
+    def _node_log_file_exited(
+        self,
+        node: _DockerNode,
+        status: bytes
+    ) -> None:
+        """Forward the rest of a node's log file once the node wrote its exit status."""
+        assert self._log_follower is not None
+
+        log_file = node.logger.name + '.log'
+        self._log_follower.unfollow(node.logger.name + '.pid')
+        self._log_follower.unfollow(node.logger.name + '.exit')
+        self._log_follower.poll(log_file)
+        if self._log_follower.is_paused(log_file):
+            # The rest of the file is forwarded once the log queue has room again.
+            node.exit_status = status
+            return
+        node.exit_status = None
+        self._log_follower.unfollow(log_file)
+        self._flush_logs(node, block=False)
+        try:
+            returncode = int(status)  # type: Optional[int]
+        except ValueError:
+            returncode = None
+        self._node_exited(node, returncode)
+
+    def _start_log_file_node(self, node: _DockerNode) -> None:
+        """Start the exec running a node which writes its output to the log directory. Blocking."""
+        cmd = node.log_file_exec_cmd(
+            '{}/{}.log'.format(_CONTAINER_LOG_DIRECTORY, node.logger.name),
+            '{}/{}.pid'.format(_CONTAINER_LOG_DIRECTORY, node.logger.name),
+            '{}/{}.exit'.format(_CONTAINER_LOG_DIRECTORY, node.logger.name))
+        node.exec_id, _ = self._start_exec(cmd, attach=False)
+
+    def _close_node_logs(self) -> None:
+        """Detach the file sinks from the node loggers, closing their files once written."""
+        for node in self._nodes:
+            if node.log_handler is not None:
+                node.logger.removeHandler(node.log_handler)
+                node.log_handler.close()
+                node.log_handler = None
+
+    async def _wait_node_logs_written(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Wait until the output of the nodes was written to their file sinks and closed."""
+        if not any(node.log_sink is not None for node in self._nodes):
+            return
+        if not await loop.run_in_executor(None, get_log_writer().join, _LOG_WRITER_TIMEOUT):
+            self.__logger.warning('The log files of container "{}" were not written within {} '
+                                  'seconds'.format(self._policy.container_name,
+                                                   _LOG_WRITER_TIMEOUT))
+
+    async def _load_nodes_in_docker(
+        self,
+        context: LaunchContext
+    ) -> None:
+        """
+        Load all nodes into Docker container.
+
+        The execs of all nodes are independent, so they are created and started concurrently in
+        executors rather than one round trip to the Docker daemon after the other.
+        """
+        if self._container is None:
+            self.__logger.error('Unable to load nodes into Docker container: '
+                                'no active Docker container!')
+            return
+
+        if self._policy.use_supervisor:
+            await self._load_nodes_in_supervisor(context)
+        else:
+            await asyncio.gather(*[self._exec_node(context, node) for node in self._nodes])
+
+    async def _load_nodes_in_supervisor(
+        self,
+        context: LaunchContext
+    ) -> None:
+        """Start the node supervisor and hand it all nodes in a single request."""
+        loop = context.asyncio_loop
+        await loop.run_in_executor(None, self._start_supervisor)
+
+        for node in self._nodes:
+            node.log_future = loop.create_future()
+        loop.run_in_executor(self._reader_executor(), self._read_supervisor, loop)
 
-            context.asyncio_loop.run_in_executor(self._executor, self._handle_logs, log_generator)
+        request = node_supervisor.start_request([(node.index, node.cmd) for node in self._nodes])
+        await loop.run_in_executor(None, self._send_to_supervisor, request)
+        self.__logger.debug('Running {} nodes under the supervisor in container: "{}"'
+                            .format(len(self._nodes), self._policy.container_name))
 
-            self.__logger.debug('Running \"{}\" in container: \"{}\"'
-                                .format(cmd, self._policy.container_name))
+    def _start_supervisor(self) -> None:
+        """Copy the node supervisor into the container and start it. Blocking."""
+        assert self._container is not None
+
+        with open(node_supervisor.__file__, 'rb') as f:
+            source = f.read()
+        archive = io.BytesIO()
+        with tarfile.open(fileobj=archive, mode='w') as tar:
+            info = tarfile.TarInfo(_SUPERVISOR_PATH.lstrip('/'))
+            info.size = len(source)
+            tar.addfile(info, io.BytesIO(source))
+        self._container.put_archive('/', archive.getvalue())
+
+        # Without a TTY, stdin stays open for requests and the output is multiplexed by Docker.
+        api = self._docker_client.api
+        exec_id = api.exec_create(
+            self._container.id,
+            ['python3', '-u', _SUPERVISOR_PATH, _CONTAINER_STATE_DIRECTORY],
+            stdin=True,
+            tty=False
+        )['Id']
+        self._supervisor_socket = api.exec_start(exec_id, socket=True)
+
+    def _send_to_supervisor(
+        self,
+        request: bytes
+    ) -> None:
+        """Send a request to the node supervisor. Blocking."""
+        with self._supervisor_lock:
+            # Docker returns the socket wrapped in a file object when it is not a TLS socket.
+            getattr(self._supervisor_socket, '_sock', self._supervisor_socket).sendall(request)
+
+    def _read_supervisor(
+        self,
+        loop: asyncio.AbstractEventLoop
+    ) -> None:
+        """
+        Forward the output and exit status of the nodes reported by the supervisor. Blocking.
+
+        Runs until the supervisor exits, which is when the launch shuts down.
+        """
+        decoder = node_supervisor.FrameDecoder()
+        try:
+            for stream, data in frames_iter(self._supervisor_socket, tty=False):
+                if stream == STDERR:
+                    self.__logger.error('Node supervisor: {}'
+                                        .format(data.decode('utf-8', 'replace').rstrip()))
+                    continue
+
+                for kind, index, payload in decoder.feed(data):
+                    node = self._nodes[index]
+                    if kind == node_supervisor.OUTPUT:
+                        self._handle_log_chunk(node, payload)
+                    elif kind == node_supervisor.STARTED:
+                        node.pid = int(payload)
+                        loop.call_soon_threadsafe(self._node_started, node)
+                    elif kind == node_supervisor.EXITED:
+                        self._flush_logs(node)
+                        loop.call_soon_threadsafe(self._node_exited, node, int(payload))
+                    elif kind == node_supervisor.ERROR:
+                        self._flush_logs(node)
+                        self.__logger.error('Unable to run "{}": {}'.format(
+                            node.executable, payload.decode('utf-8', 'replace')))
+                        loop.call_soon_threadsafe(self._node_exited, node, None)
+        except (OSError, ValueError) as ex:
+            # The socket is closed when the container stops.
+            self.__logger.debug('Node supervisor stream closed: {}'.format(ex))
+
+        for node in self._nodes:
+            loop.call_soon_threadsafe(self._node_exited, node, None)
+
+    def _node_exited(
+        self,
+        node: _DockerNode,
+        returncode: Optional[int]
+    ) -> None:
+        """Record that a node exited whose output is not read by a task of its own."""
+        self._node_finished(node, returncode)
+        if node.log_future is not None and not node.log_future.done():
+            node.log_future.set_result(returncode)
+
+    def _node_started(self, node: _DockerNode) -> None:
+        """Emit the ProcessStarted event of a node, once per run."""
+        if node.started or node.exited:
+            return
+        node.started = True
+        if node.backoff is not None:
+            node.backoff.started()
+        if self._context is not None:
+            self._context.emit_event_sync(ProcessStarted(**self._process_event_args(node)))
+
+    def _node_finished(
+        self,
+        node: _DockerNode,
+        returncode: Optional[int]
+    ) -> None:
+        """
+        Emit the ProcessExited event of a node, once per run, and report an abnormal exit.
+
+        A node which exits with a known status before its start was reported is reported as
+        started first.
+        """
+        if node.exited:
+            return
+        if returncode is not None:
+            self._node_started(node)
+        node.exited = True
+        self._report_node_exit(node, returncode)
+        if node.started and self._context is not None:
+            self._context.emit_event_sync(ProcessExited(
+                returncode=returncode, **self._process_event_args(node)))
+        node.pid = None
+        self._schedule_respawn(node)
+
+    def _schedule_respawn(self, node: _DockerNode) -> None:
+        """Run a node which exited again after its backoff delay, if it respawns."""
+        if node.backoff is None or node.stopping or self._completed_future is None or \
+                self._context is None:
+            return
+
+        delay = node.backoff.next_delay()
+        if delay is None:
+            self.__logger.error('"{}" exited after {} restarts in a row; not restarting it'
+                                .format(node.logger.name, node.backoff.restarts))
+            return
+        self.__logger.info('Restarting "{}" in {:.2f} seconds (restart {} in a row)'
+                           .format(node.logger.name, delay, node.backoff.restarts))
+        node.respawn_task = self._context.asyncio_loop.create_task(
+            self._respawn_node(self._context, node, delay))
+
+    async def _respawn_node(
+        self,
+        context: LaunchContext,
+        node: _DockerNode,
+        delay: float
+    ) -> None:
+        """Run a node which exited again inside the running container after 'delay' seconds."""
+        await asyncio.sleep(delay)
+        node.respawn_task = None
+        try:
+            await self._exec_node(context, node)
+        except (APIError, OSError) as ex:
+            self.__logger.error('Unable to restart "{}" in container "{}": {}'
+                                .format(node.logger.name, self._policy.container_name, ex))
+
+    def _cancel_respawns(self) -> None:
+        """Cancel the pending restarts of the nodes which exited."""
+        for node in self._nodes:
+            if node.respawn_task is not None:
+                node.respawn_task.cancel()
+                node.respawn_task = None
+
+    def _process_event_args(self, node: _DockerNode) -> Dict[str, Any]:
+        """Return the arguments of the process events of a node."""
+        return {
+            'action': self._event_action,
+            'name': node.logger.name,
+            'cmd': node.cmd,
+            'cwd': None,
+            'env': None,
+            'pid': node.pid,
+        }
+
+    def _report_node_exit(
+        self,
+        node: _DockerNode,
+        returncode: Optional[int]
+    ) -> None:
+        """Log the recent output of a node which exited abnormally while the launch is running."""
+        if not returncode or node.stopping or self._completed_future is None or \
+                node.history is None:
+            return
+
+        lines = node.history.lines(DUMP_LINE_COUNT)
+        self.__logger.error('"{}" exited with {}; its last {} lines of output:\n{}'.format(
+            node.logger.name, returncode, len(lines), '\n'.join(lines)))
+
+    def _inspect_exec(self, node: _DockerNode) -> Dict[str, Any]:
+        """Return the state of the exec running a node; empty if it is unknown. Blocking."""
+        if node.exec_id is None:
+            return {}
+        try:
+            return self._docker_client.api.exec_inspect(node.exec_id)
+        except APIError as ex:
+            self.__logger.debug('Unable to inspect the exec of "{}": {}'
+                                .format(node.logger.name, ex))
+            return {}
+
+    async def _inspect_node_exit(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        node: _DockerNode
+    ) -> Optional[int]:
+        """
+        Return the exit code of a node whose exec ended; None if it is unknown.
+
+        The exec is inspected once, after its output ended, so no node is ever polled. Nothing is
+        inspected once the launch shuts down.
+        """
+        if self._completed_future is None:
+            return None
+        state = await loop.run_in_executor(None, self._inspect_exec, node)
+        return state.get('ExitCode')
+
+    def _stop_supervisor(self) -> None:
+        """Close the supervisor's stdin, which makes it stop all nodes and exit."""
+        if self._supervisor_socket is None:
+            return
+        try:
+            getattr(self._supervisor_socket, '_sock', self._supervisor_socket).shutdown(
+                socket.SHUT_WR)
+        except OSError as ex:
+            self.__logger.debug('Unable to close the node supervisor input: {}'.format(ex))
+
+    def _start_exec(
+        self,
+        cmd: List[str],
+        *,
+        attach: bool
+    ) -> Tuple[str, Any]:
+        """
+        Create and start an exec of 'cmd' in the Docker container. Blocking.
+
+        :returns the ID of the exec, and the socket of its output if 'attach' is True; or, if the
+        log collector reads the output, the ID of the exec again
+        """
+        assert self._container is not None
+
+        api = self._docker_client.api
+        tty = self._policy.tty
+        exec_id = api.exec_create(self._container.id, cmd, tty=tty)['Id']
+        if attach and self._log_collector is not None:
+            # The log collector starts the exec itself, so the exec stands in for its output.
+            return exec_id, exec_id
+        output_socket = api.exec_start(exec_id, detach=not attach, tty=tty, socket=attach)
+        return exec_id, output_socket
+
+    def _start_node(
+        self,
+        node: _DockerNode
+    ) -> Any:
+        """
+        Start the exec running a single node in the Docker container. Blocking.
+
+        :returns the socket of the node's output
+        """
+        assert self._container is not None
+
+        if self._policy.reattach:
+            # The output is followed once the node recorded its PID, so not before with an old one.
+            self._container.exec_run(['rm', '-f', node.pidfile])
+            node.exec_id, _ = self._start_exec(node.detached_exec_cmd, attach=False)
+            return self._start_following_output(node, from_start=True)
+
+        node.exec_id, output_socket = self._start_exec(node.exec_cmd, attach=True)
+        return output_socket
+
+    def _start_following_output(
+        self,
+        node: _DockerNode,
+        *,
+        from_start: bool
+    ) -> Any:
+        """
+        Start the exec following the output of a detached node until the node exits. Blocking.
+
+        :returns the socket of the node's output
+        """
+        _, output_socket = self._start_exec(node.follow_output_cmd(from_start), attach=True)
+        return output_socket
+
+    async def _exec_node(
+        self,
+        context: LaunchContext,
+        node: _DockerNode
+    ) -> None:
+        """Run a single node in the Docker container and forward its output to the logger."""
+        node.stopping = False
+        node.started = False
+        node.exited = False
+        if self._log_follower is not None:
+            # Follow the log file first, so no output written right after the start is missed.
+            self._follow_node_log_file(context.asyncio_loop, node)
+            await context.asyncio_loop.run_in_executor(None, self._start_log_file_node, node)
+            return
+
+        if self._supervisor_socket is not None:
+            node.log_future = context.asyncio_loop.create_future()
+            await context.asyncio_loop.run_in_executor(
+                None, self._send_to_supervisor,
+                node_supervisor.start_request([(node.index, node.cmd)]))
+            return
+
+        node.pid_header = PidHeader()
+        output_socket = await context.asyncio_loop.run_in_executor(None, self._start_node, node)
+        self._handle_node_output(context, node, output_socket)
+
+        self.__logger.debug('Running \"{}\" in container: \"{}\"'
+                            .format(node.cmd, self._policy.container_name))
+
+    async def _follow_node_output(
+        self,
+        context: LaunchContext,
+        node: _DockerNode,
+        *,
+        from_start: bool
+    ) -> None:
+        """Forward the output of a detached node to the logger until the node exits."""
+        node.pid_header = PidHeader()
+        output_socket = await context.asyncio_loop.run_in_executor(
+            None, functools.partial(self._start_following_output, node, from_start=from_start))
+        self._handle_node_output(context, node, output_socket)
+
+    def _handle_node_output(
+        self,
+        context: LaunchContext,
+        node: _DockerNode,
+        output_socket: Any
+    ) -> None:
+        """Forward the output of a node to the logger in the background."""
+        if self._log_collector is not None:
+            node.log_future = context.asyncio_loop.create_future()
+            self._log_collector.attach(node.index, output_socket, node.logger.name, node.log_sink)
+            return
+        if self._policy.log_mode == 'passthrough':
+            node.log_future = context.asyncio_loop.create_task(
+                self._pass_node_output_through(context.asyncio_loop, node, output_socket))
+            return
+
+        node.log_future = context.asyncio_loop.create_task(
+            self._read_node_output(context.asyncio_loop, node, output_socket))
+
+    async def _read_node_output(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        node: _DockerNode,
+        output_socket: Any
+    ) -> Optional[int]:
+        """
+        Forward the output read from the socket of a node's exec until the node exits.
+
+        The socket is read with non-blocking I/O on the event loop, so the number of threads does
+        not grow with the number of nodes. TLS sockets cannot be read that way and are read by a
+        thread instead.
+
+        :returns the exit code of the node, or None if it is unknown
+        """
+        # Docker returns the socket wrapped in a file object when it is not a TLS socket.
+        raw_socket = getattr(output_socket, '_sock', output_socket)
+        if isinstance(raw_socket, ssl.SSLSocket) or not isinstance(raw_socket, socket.socket):
+            frames = frames_iter(output_socket, tty=self._policy.tty)
+            await loop.run_in_executor(self._reader_executor(), self._handle_frames, node, frames)
+        else:
+            await self._read_node_socket(loop, node, raw_socket)
+
+        # The output stream ends when the node exits, so its exit code is known by now.
+        returncode = await self._inspect_node_exit(loop, node)
+        self._node_finished(node, returncode)
+        return returncode
+
+    async def _read_node_socket(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        node: _DockerNode,
+        raw_socket: socket.socket
+    ) -> None:
+        """
+        Forward the output read from a non-blocking socket until it ends.
+
+        Without a TTY, the output is made of frames of stdout and stderr, which are split here
+        without copying the payloads into a buffer first.
+        """
+        raw_socket.setblocking(False)
+        try:
+            while True:
+                chunk = await loop.sock_recv(raw_socket, _READ_SIZE)
+                if not chunk:
+                    break
+                if self._policy.tty:
+                    has_room = self._handle_log_chunk(node, chunk, block=False)
+                else:
+                    has_room = True
+                    for stream, payload in node.streams.feed(chunk):
+                        has_room &= self._handle_log_chunk(
+                            node, payload, stream=stream, block=False)
+                if not has_room:
+                    # Stop reading, and so eventually the node, until the log queue has room.
+                    assert self._log_queue is not None
+                    await loop.run_in_executor(
+                        self._reader_executor(), self._log_queue.wait_for_room)
+        except OSError as ex:
+            # The socket is closed when the container stops.
+            self.__logger.debug('Node output stream closed: {}'.format(ex))
+        finally:
+            raw_socket.close()
+            self._flush_logs(node, block=False)
+
+    async def _pass_node_output_through(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        node: _DockerNode,
+        output_socket: Any
+    ) -> Optional[int]:
+        """
+        Copy the raw output of a node by a thread until the node exits.
+
+        :returns the exit code of the node, or None if it is unknown
+        """
+        await loop.run_in_executor(
+            self._reader_executor(), self._pass_output_through, node, output_socket)
+        returncode = await self._inspect_node_exit(loop, node)
+        self._node_finished(node, returncode)
+        return returncode
+
+    def _pass_output_through(
+        self,
+        node: _DockerNode,
+        output_socket: Any
+    ) -> None:
+        """Copy the raw output of a node to stdout or its passthrough file until it ends."""
+        # Docker returns the socket wrapped in a file object when it is not a TLS socket.
+        raw_socket = getattr(output_socket, '_sock', output_socket)
+        directory = self._policy.passthrough_directory
+        output_file = None  # type: Optional[int]
+        try:
+            if directory is None:
+                # Output already written through sys.stdout must come first.
+                sys.stdout.flush()
+                fd = sys.stdout.fileno()
+            else:
+                os.makedirs(directory, exist_ok=True)
+                # Not opened with O_APPEND, which splice(2) does not support.
+                output_file = os.open(os.path.join(directory, node.logger.name + '.log'),
+                                      os.O_WRONLY | os.O_CREAT, 0o644)
+                os.lseek(output_file, 0, os.SEEK_END)
+                fd = output_file
+            size = forward_output(raw_socket, fd, prefix=self._read_pid_header(node, raw_socket))
+            self.__logger.debug('Passed {} bytes of output of "{}" through'
+                                .format(size, node.executable))
+        except OSError as ex:
+            # The socket is closed when the container stops.
+            self.__logger.debug('Node output stream closed: {}'.format(ex))
+        finally:
+            raw_socket.close()
+            if output_file is not None:
+                os.close(output_file)
+
+    def _read_pid_header(
+        self,
+        node: _DockerNode,
+        raw_socket: Any
+    ) -> bytes:
+        """
+        Read the header with its PID off the start of a node's raw output. Blocking.
+
+        The header is read a byte at a time, so no more of the output is read than it takes.
+
+        :returns the output read which is not part of a header
+        """
+        raw_socket.setblocking(True)
+        output = b''
+        while node.pid_header is not None and not output:
+            data = raw_socket.recv(1)
+            if not data:
+                output = node.pid_header.flush()
+                node.pid_header = None
+                break
+            output = self._split_pid_header(node, data)
+        return output
+
+    def _reader_executor(self) -> ThreadPoolExecutor:
+        """Return the executor of the output readers which have to block, creating it if needed."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=max(len(self._nodes), 1))
+        return self._executor
+
+    def _find_reattachable_container(self) -> bool:
+        """
+        Find a running container of an earlier launch with the same configuration. Blocking.
+
+        Only a container whose owner is gone is taken over, and only once its lock is taken, so a
+        container is never shared with a running launch, nor with another sandbox of this one.
+
+        :returns True if the container was taken over
+        """
+        try:
+            self._image_id = self._docker_client.images.get(self._image_name).id
+        except APIError as ex:
+            # ImageNotFound is reported when the container fails to start.
+            self.__logger.debug('Unable to resolve image "{}": {}'.format(self._image_name, ex))
+            return False
+
+        containers = self._docker_client.containers.list(filters={
+            'label': '{}={}'.format(FINGERPRINT_LABEL, self._fingerprint()),
+            'status': 'running',
+        })
+        for container in containers:
+            if owner_is_alive(container.labels):
+                continue
+            try:
+                container_lock = lock_container(container.id)
+            except OSError as ex:
+                self.__logger.warning('Unable to lock container "{}": {}'
+                                      .format(container.name, ex))
+                return False
+            if container_lock is None:
+                continue
+
+            self._container = container
+            self._container_lock = container_lock
+            self.__logger.info('Reattaching to Docker container: \"{}\"'.format(container.name))
+            return True
+        return False
+
+    def _running_node_pidfiles(self) -> List[str]:
+        """Return the PID files of the nodes still running in the container. Blocking."""
+        assert self._container is not None
+
+        _, output = self._container.exec_run([
+            '/bin/sh', '-c',
+            'for f in "$0"/*.pid; do kill -0 "$(cat "$f")" 2>/dev/null && echo "$f"; done; true',
+            _CONTAINER_STATE_DIRECTORY
+        ])
+        return output.decode('utf-8').split()
+
+    async def _reattach_nodes(
+        self,
+        context: LaunchContext
+    ) -> None:
+        """Follow the nodes still running in the container and run the nodes which exited."""
+        running_pidfiles = await context.asyncio_loop.run_in_executor(
+            None, self._running_node_pidfiles)
+
+        starts = []
+        for node in self._nodes:
+            if node.pidfile in running_pidfiles:
+                self.__logger.debug('Reattaching to "{}" in container: "{}"'
+                                    .format(node.executable, self._container_name()))
+                starts.append(self._follow_node_output(context, node, from_start=False))
+            else:
+                starts.append(self._exec_node(context, node))
+        await asyncio.gather(*starts)
+
+    def _fingerprint(self) -> str:
+        """Return the fingerprint of this sandbox's launch configuration and resolved image."""
+        return launch_fingerprint(
+            policy_hash=self._policy_hash(),
+            image_id=self._image_id,
+            node_cmds=[node.cmd for node in self._nodes]
+        )
+
+    def _policy_hash(self) -> str:
+        """Return a hash of the policy configuration the container is created for."""
+        return policy_hash({
+            'image': self._policy.image_name,
+            'entrypoint': self._policy.entrypoint,
+            'run_args': self._policy.run_args,
+            'setup_commands': self._policy.setup_commands,
+            'overlay': self._policy.overlay,
+            'sync_overlay': self._policy.sync_overlay,
+        })
+
+    def _container_labels(self) -> Dict[str, str]:
+        """
+        Return the labels of the container, including the labels set by the run arguments.
+
+        The labels identify the launch process owning the container, so 'ros2 sandbox gc' can
+        remove the container if that process is killed without stopping it.
+        """
+        labels = dict((self._policy.run_args or {}).get('labels') or {})
+        labels.update(owner_labels())
+        labels[LAUNCH_ID_LABEL] = launch_id()
+        labels[POLICY_HASH_LABEL] = self._policy_hash()
+        if self._policy.reattach:
+            labels[REATTACH_LABEL] = 'true'
+            labels[FINGERPRINT_LABEL] = self._fingerprint()
+        return labels
+
+    def _container_name(self) -> str:
+        """Return the name of the running container."""
+        if self._container is not None:
+            return self._container.name
+        return self._policy.container_name
+
+    def _signal_node(
+        self,
+        node: _DockerNode,
+        signal_name: str
+    ) -> None:
+        """Send a signal to a single node in the Docker container. Blocking."""
+        if self._supervisor_socket is not None:
+            self._send_to_supervisor(node_supervisor.signal_request(node.index, signal_name))
+        elif self._container is not None:
+            self._container.exec_run(node.signal_cmd(signal_name))
+
+    async def _restart_node(
+        self,
+        context: LaunchContext,
+        node: _DockerNode
+    ) -> None:
+        """Stop a single node, killing it if it does not exit in time, and run it again."""
+        loop = context.asyncio_loop
+        self.__logger.info('Restarting "{}" in container: "{}"'
+                           .format(node.executable, self._policy.container_name))
+
+        # A node waiting to respawn is run by this restart instead.
+        if node.respawn_task is not None:
+            node.respawn_task.cancel()
+            node.respawn_task = None
+        node.stopping = True
+        await loop.run_in_executor(None, self._signal_node, node, 'INT')
+        if not await self._wait_node_stopped(loop, node, self._policy.stop_timeout):
+            await loop.run_in_executor(None, self._signal_node, node, 'KILL')
+            await self._wait_node_stopped(loop, node, None)
+
+        # No process of the old run is left, so the new one cannot clash with it.
+        await self._exec_node(context, node)
+
+    async def _wait_node_stopped(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        node: _DockerNode,
+        timeout: Optional[float]
+    ) -> bool:
+        """Wait until a node's output ended and all its processes exited; False on timeout."""
+        deadline = None if timeout is None else loop.time() + timeout
+        if node.log_future is not None:
+            try:
+                await asyncio.wait_for(asyncio.shield(node.log_future), timeout)
+            except asyncio.TimeoutError:
+                return False
+
+        remaining = None if deadline is None else max(deadline - loop.time(), 0.0)
+        return await loop.run_in_executor(None, self._wait_node_group, node, remaining)
+
+    def _wait_node_group(
+        self,
+        node: _DockerNode,
+        timeout: Optional[float]
+    ) -> bool:
+        """Wait until every process of a node exited; False on timeout. Blocking."""
+        if self._container is None:
+            return True
+        exit_code, _ = self._container.exec_run(node.group_wait_cmd(timeout))
+        return exit_code == 0
+
+    def _push_workspace_changes(
+        self,
+        changed: List[str],
+        removed: List[str]
+    ) -> None:
+        """Upload changed overlay files to the container in one archive and delete removed ones."""
+        assert self._container is not None and self._workspace_sync is not None
+
+        if changed:
+            with self._workspace_sync.create_archive(changed) as archive:
+                self._container.put_archive(OVERLAY_CONTAINER_PATH, archive)
+        if removed:
+            self._container.exec_run(
+                ['rm', '-f', '--'] + [
+                    '{}/{}'.format(OVERLAY_CONTAINER_PATH, path) for path in removed
+                ])
+
+    async def _sync_workspace(
+        self,
+        context: LaunchContext
+    ) -> None:
+        """Keep the overlay in the container in sync and restart the nodes of changed packages."""
+        assert self._workspace_sync is not None
+        loop = context.asyncio_loop
+
+        while True:
+            await asyncio.sleep(self._policy.sync_period)
+            changes = await loop.run_in_executor(None, self._workspace_sync.poll)
+            if changes is None:
+                continue
+
+            changed, removed = changes
+            self.__logger.info('Synchronizing {} changed and {} removed overlay files'
+                               .format(len(changed), len(removed)))
+            try:
+                await loop.run_in_executor(None, self._push_workspace_changes, changed, removed)
+            except APIError as ex:
+                self.__logger.error('Unable to synchronize the overlay: {}'.format(ex))
+                continue
+
+            packages = affected_packages(changed + removed)
+            await asyncio.gather(*[
+                self._restart_node(context, node)
+                for node in self._nodes if node.package in packages
+            ])
 
     def _handle_logs(
         self,
-        log_generator: GeneratorType
+        node: _DockerNode,
+        log_generator: Iterable[bytes]
     ) -> None:
         """
-        Process the logs from a container and print to the logger.
+        Process the logs of a node and print them to the logger.
 
-        Expects the `log generator` returned from Docker-py's container.exec_run.
-        The generator blocks until a new log chunk is available.
-        The log chunk is of type `bytes`, so it must be decoded before its sent to the logger.
+        Expects an iterable of the chunks read from the output of the node, which may block until
+        a new log chunk is available. The whole output is processed, including a last line which
+        does not end with a line break.
         """
         for log in log_generator:
-            if not log:
-                pass  # Sometimes we receive None
-            elif isinstance(log, GeneratorType):
-                for text in log:
-                    self.__logger.info(text.decode('utf-8').strip())
-            else:
-                try:
-                    self.__logger.info(log.decode('utf-8').strip())
-                except (UnicodeDecodeError, AttributeError):
-                    self.__logger.exception('Unable to print log of type {}'.format(type(log)))
+            self._handle_log_chunk(node, log)
+        self._flush_logs(node)
+
+    def _handle_frames(
+        self,
+        node: _DockerNode,
+        frames: Iterable[Tuple[int, bytes]]
+    ) -> None:
+        """Process the logs of a node read as frames of its stdout or stderr. Blocking."""
+        for stream, log in frames:
+            self._handle_log_chunk(node, log, stream=stream)
+        self._flush_logs(node)
+
+    def _handle_log_chunk(
+        self,
+        node: _DockerNode,
+        log: bytes,
+        *,
+        stream: int = STDOUT,
+        block: bool = True
+    ) -> bool:
+        """
+        Print every line completed by a chunk of a node's output to the logger.
+
+        The log chunk is of type `bytes` and may end in the middle of a line or of a character, so
+        it is decoded incrementally and only complete lines are logged. Lines of the node's stderr
+        are logged with a higher severity than the lines of its stdout.
+
+        :returns False if the log queue is full and the caller has to wait for room before reading
+        more output, which only happens if 'block' is False
+        """
+        if not log:
+            return True
+        if stream == STDOUT and node.pid_header is not None:
+            log = self._split_pid_header(node, log)
+        if stream == STDERR:
+            return self._emit_lines(
+                node, node.error_output.feed(log), block=block, level=_STDERR_LEVEL)
+        return self._emit_lines(node, node.output.feed(log), block=block)
+
+    def _split_pid_header(
+        self,
+        node: _DockerNode,
+        log: bytes
+    ) -> bytes:
+        """
+        Split the header with its PID off the start of a node's output, and report it as started.
+
+        :returns the output following the header
+        """
+        assert node.pid_header is not None
+
+        log = node.pid_header.feed(log)
+        if node.pid_header.done:
+            node.pid = node.pid_header.pid
+            node.pid_header = None
+            if self._context is not None:
+                # The output of a node is read by threads too.
+                self._context.asyncio_loop.call_soon_threadsafe(self._node_started, node)
+        return log
+
+    def _flush_logs(
+        self,
+        node: _DockerNode,
+        *,
+        block: bool = True
+    ) -> None:
+        """Print the rest of a node's output to the logger once its output ended."""
+        if node.pid_header is not None:
+            # The output ended before a complete header, so it is output of its own.
+            self._emit_lines(node, node.output.feed(node.pid_header.flush()), block=block)
+            node.pid_header = None
+        self._emit_lines(node, node.output.flush(), block=block)
+        self._emit_lines(node, node.error_output.flush(), block=block, level=_STDERR_LEVEL)
+        if node.suppressed and self._log_queue is not None:
+            self._log_queue.put(
+                (node.logger, logging.WARNING, [suppressed_message(node.suppressed)]),
+                block=block)
+            node.suppressed = 0
+
+    def _emit_lines(
+        self,
+        node: _DockerNode,
+        lines: List[str],
+        *,
+        block: bool,
+        level: int = logging.INFO,
+        drop: bool = False
+    ) -> bool:
+        """
+        Log lines of a node's output with severity 'level', applying the log limits of the policy.
+
+        Lines over the node's or the sandbox's rate limit are suppressed, and their number is
+        logged as a warning before the next lines the node is allowed to log. If 'drop' is True,
+        the lines are dropped instead of waited for while the log queue is full.
+
+        :returns False if the caller has to wait for room in the log queue
+        """
+        # Suppressed lines are kept in the history too, which is what it is useful for.
+        if node.history is not None:
+            node.history.append(lines)
+        if self._log_queue is None:
+            emit_lines(node.logger, lines, level)
+            return True
+
+        allowed = len(lines)
+        for rate_limit in (node.rate_limit, self._sandbox_rate_limit):
+            if rate_limit is not None and allowed:
+                allowed = rate_limit.take(allowed)
+        node.suppressed_total += len(lines) - allowed
+        if not allowed:
+            node.suppressed += len(lines)
+            return True
+
+        # The lines of this chunk which are suppressed follow the allowed ones.
+        if node.suppressed:
+            self._put_log((node.logger, logging.WARNING, [suppressed_message(node.suppressed)]),
+                          block=block, drop=drop)
+        node.suppressed = len(lines) - allowed
+        return self._put_log((node.logger, level, lines[:allowed]), block=block, drop=drop)
+
+    def _put_log(
+        self,
+        item: Tuple[Any, int, List[str]],
+        *,
+        block: bool,
+        drop: bool
+    ) -> bool:
+        """Add lines to the log queue, dropping them while it is full if 'drop' is True."""
+        assert self._log_queue is not None
+        if drop:
+            self._log_queue.offer(item)
+            return True
+        return self._log_queue.put(item, block=block)
 
     async def _start_docker_nodes(
         self,
@@ -183,25 +2033,44 @@ class LoadDockerNodes(Action):
         Start the Docker container and load all nodes into it.
 
         This will first attempt to pull the docker image, start the docker container, and then load
-        all of the nodes.
+        all of the nodes. The image is pulled and the container is created in an executor so other
+        actions, including other sandboxes starting at the same time, are not blocked by them.
+
+        If the policy allows reattaching and a container of an earlier launch with the same
+        configuration is still running, that container and its running nodes are taken over.
 
         """
-        # Try to pull the image and warn if it cannot be found.
-        try:
-            self._pull_docker_image()
-        except ImageNotFound as ex:
-            self.__logger.warn('Image "{}" could not be pulled but may be found locally.'
-                               .format(self._policy.image_name))
-            self.__logger.debug(ex)
+        self._resolve_nodes(context)
+        self._start_log_limits()
+        await self._start_log_collector(context)
+        self._start_log_follower(context)
+        # Subscribe before the container starts, so none of its events can be missed.
+        self._event_lease = await context.asyncio_loop.run_in_executor(None, lease_docker_events)
+
+        # Snapshot before the overlay is baked in so no later change can be missed.
+        await context.asyncio_loop.run_in_executor(None, self._snapshot_workspace)
+
+        # Sandboxes sharing an image configuration share a single pull and build of the image.
+        orchestrator = get_orchestrator(context.asyncio_loop)
+        self._image_name = await orchestrator.single_flight(
+            self._image_preparation_key(), self._prepare_docker_image)
+
+        # The image is prepared first, so a container created from stale inputs is not reused.
+        if self._policy.reattach and await context.asyncio_loop.run_in_executor(
+                None, self._find_reattachable_container):
+            self._watch_container(context.asyncio_loop)
+            await self._reattach_nodes(context)
+            self._start_workspace_sync(context)
+            return
 
         # Try to run the image (even if it can't be pulled.) It might be available locally
         # Log an error if it cannot be found and cancel the future to signal that there is no work.
         try:
-            self._start_docker_container()
+            await orchestrator.run_limited(self._start_docker_container)
         except ImageNotFound as ex:
             self.__logger.error(
                 'Image "{}" could not be found; execution of container "{}" failed.'
-                .format(self._policy.image_name, self._policy.container_name))
+                .format(self._image_name, self._policy.container_name))
             self.__logger.debug(ex)
 
             with self._shutdown_lock:
@@ -211,7 +2080,100 @@ class LoadDockerNodes(Action):
 
             return
 
-        self._load_nodes_in_docker(context)
+        self._watch_container(context.asyncio_loop)
+        await self._load_nodes_in_docker(context)
+        self._start_workspace_sync(context)
+
+    def _watch_container(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Handle the Docker events of the container from now on."""
+        if self._event_lease is not None and self._container is not None:
+            self._event_lease.watch(loop, self._container.id, self._handle_container_event)
+
+    def _handle_container_event(self, event: Dict[str, Any]) -> None:
+        """Emit the launch event of a Docker event of the container, and complete on its exit."""
+        if self._container is None or self._context is None:
+            return
+
+        status = event.get('Action') or event.get('status')
+        attributes = event.get('Actor', {}).get('Attributes', {})
+        event_args = {
+            'action': self._event_action,
+            'container_name': self._container_name(),
+            'container_id': self._container.id,
+        }
+        if status == 'oom':
+            self._container_oom = True
+            self._context.emit_event_sync(ContainerOutOfMemory(**event_args))
+        elif status == 'kill':
+            self._container_signal = _optional_int(attributes.get('signal'))
+            self._context.emit_event_sync(ContainerKilled(
+                signal=self._container_signal, **event_args))
+        elif status == 'die':
+            exit_code = _optional_int(attributes.get('exitCode'))
+            if self._container_oom:
+                reason = 'oom'
+            elif self._container_signal is not None:
+                reason = 'killed'
+            else:
+                reason = 'exited'
+            self.__logger.error('Docker container "{}" exited with {} ({})'
+                                .format(self._container_name(), exit_code, reason))
+            self._context.emit_event_sync(ContainerDied(
+                exit_code=exit_code, reason=reason, **event_args))
+            self._container_died()
+
+    def _container_died(self) -> None:
+        """Complete the future of the action, since its container and all its nodes are gone."""
+        with self._shutdown_lock:
+            completed_future = self._completed_future
+            if completed_future is None:
+                return
+            self._completed_future = None
+            # The container was removed by Docker, so there is nothing left to stop.
+            self._container = None
+
+        self._cancel_respawns()
+        if self._sync_task is not None:
+            self._sync_task.cancel()
+            self._sync_task = None
+        if not completed_future.done():
+            completed_future.set_result(None)
+
+    def _start_workspace_sync(
+        self,
+        context: LaunchContext
+    ) -> None:
+        """Start synchronizing the overlay into the container, if enabled."""
+        if self._workspace_sync is not None:
+            self._sync_task = context.asyncio_loop.create_task(self._sync_workspace(context))
+
+    @property
+    def container(self) -> Optional[Container]:
+        """Getter for container; None unless the Docker container is running."""
+        return self._container
+
+    def recent_output(
+        self,
+        count: Optional[int] = None
+    ) -> Dict[str, List[str]]:
+        """
+        Return the most recent lines of output of each node, the oldest first.
+
+        Only nodes whose output passes through this process have a history, which excludes the
+        'pump' and 'passthrough' log modes.
+
+        :param: count is the number of lines returned per node. Defaults to None, which returns
+        all lines in the node's history.
+        :returns a dictionary mapping the logger name of each node to its lines
+        """
+        return {
+            node.logger.name: node.history.lines(count)
+            for node in self._nodes if node.history is not None
+        }
+
+    def report_events_as(self, action: Action) -> None:
+        """Emit the events of the sandbox for 'action', the action the user launched it by."""
+        self._event_action = action
 
     def get_asyncio_future(self) -> Optional[asyncio.Future]:
         """Return the asyncio Future that represents the lifecycle of the Docker container."""
@@ -233,6 +2195,7 @@ class LoadDockerNodes(Action):
             )
         )
 
+        self._context = context
         self._completed_future = create_future(context.asyncio_loop)
 
         self._started_task = context.asyncio_loop.create_task(
@@ -249,11 +2212,15 @@ class LoadDockerNodes(Action):
         """
         Run when the shutdown signal has been received.
 
-        This will cancel the started task, if running, call cancel
-        on the completed future, and stop the container.
-
+        This will cancel the started task, if running, and stop the sandbox in a task of its own:
+        the nodes are stopped, the container is stopped and the shared Docker client is released
+        without blocking the event loop. The completed future completes once the sandbox stopped,
+        so the launch waits for every sandbox to stop, all of them at the same time.
         """
         with self._shutdown_lock:
+            if self._stop_task is not None:
+                # The sandbox is already stopping.
+                return None
 
             # if still starting cancel
             if self._started_task is not None:
@@ -262,13 +2229,98 @@ class LoadDockerNodes(Action):
                 except asyncio.CancelledError:
                     self._started_task = None
 
-            if self._completed_future is not None:
-                self._executor.shutdown(wait=False)
-                self._completed_future.cancel()
-                self._completed_future = None
+            if self._sync_task is not None:
+                self._sync_task.cancel()
+                self._sync_task = None
+            self._cancel_respawns()
 
-                if self._container is not None:
-                    self._container.stop()
-                    self._container = None
+            # The container is stopped on purpose from here on.
+            if self._event_lease is not None:
+                self._event_lease.release()
+                self._event_lease = None
+
+            completed_future = self._completed_future
+            self._completed_future = None
 
+        self._stop_task = context.asyncio_loop.create_task(
+            self._stop_sandbox(context.asyncio_loop, completed_future))
         return None
+
+    async def _stop_sandbox(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        completed_future: Optional[asyncio.Future]
+    ) -> None:
+        """Stop the nodes and the container, release what the sandbox holds and complete it."""
+        try:
+            # A container which died on its own has neither nodes nor anything else to stop.
+            if completed_future is not None:
+                await self._stop_nodes(loop)
+                self._stop_supervisor()
+                with self._shutdown_lock:
+                    container = self._container
+                    self._container = None
+                if container is not None:
+                    await loop.run_in_executor(None, self._stop_docker_container, container)
+        finally:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+            self._stop_log_collector()
+            if self._log_follower is not None:
+                self._log_follower.close()
+                self._log_follower = None
+            await self._stop_log_limits(loop)
+            self._close_node_logs()
+            await self._wait_node_logs_written(loop)
+            if self._container_lock is not None:
+                self._container_lock.close()
+                self._container_lock = None
+
+            if not self._docker_lease.released:
+                self.__logger.debug('Docker connections in use: {}'
+                                    .format(connections_in_use(self._docker_client)))
+                self._docker_lease.release()
+
+            if completed_future is not None and not completed_future.done():
+                completed_future.set_result(None)
+
+    async def _stop_nodes(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Send SIGINT to all running nodes at once, and SIGKILL once the stop timeout elapsed."""
+        # Maps the future of each running node, which completes when it exits, to the node.
+        running = {
+            node.log_future: node for node in self._nodes
+            if node.log_future is not None and not node.log_future.done()
+        }
+        if not running:
+            return
+
+        for node in running.values():
+            node.stopping = True
+        await self._signal_nodes(loop, list(running.values()), 'INT')
+        _, pending = await asyncio.wait(list(running), timeout=self._policy.stop_timeout)
+        if not pending:
+            return
+
+        killed = [running[future] for future in pending]
+        self.__logger.warning('{} nodes of container "{}" did not exit within {} seconds; '
+                              'killing them'.format(len(killed), self._policy.container_name,
+                                                    self._policy.stop_timeout))
+        await self._signal_nodes(loop, killed, 'KILL')
+        await asyncio.wait(pending, timeout=_NODE_KILL_TIMEOUT)
+
+    async def _signal_nodes(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        nodes: List[_DockerNode],
+        signal_name: str
+    ) -> None:
+        """Send a signal to several nodes in the Docker container concurrently."""
+        results = await asyncio.gather(*[
+            loop.run_in_executor(None, self._signal_node, node, signal_name) for node in nodes
+        ], return_exceptions=True)
+        for node, result in zip(nodes, results):
+            if isinstance(result, (APIError, OSError)):
+                self.__logger.debug('Unable to send SIG{} to "{}": {}'
+                                    .format(signal_name, node.logger.name, result))
+            elif isinstance(result, BaseException):
+                raise result
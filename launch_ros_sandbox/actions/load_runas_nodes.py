@@ -20,7 +20,69 @@ LoadRunAsNodes is an Action that controls the lifecycle of a sandboxed environme
 a separate user. This Action is not exported and should only be used internally.
 """
 
-from launch import Action
+import asyncio
+import os
+import pwd
+import signal
+from typing import Any, Dict, List, Optional
+
+import launch
+from launch import Action, LaunchContext
+from launch.event import Event
+from launch.event_handlers import OnShutdown
+from launch.some_actions_type import SomeActionsType
+from launch.utilities import create_future, perform_substitutions
+
+from launch_ros.substitutions import ExecutableInPackage
+
+from launch_ros_sandbox.descriptions.sandboxed_node import SandboxedNode
+from launch_ros_sandbox.descriptions.user_policy import UserPolicy
+from launch_ros_sandbox.utilities.log_writer import FileSinkHandler
+from launch_ros_sandbox.utilities.log_writer import get_log_writer
+from launch_ros_sandbox.utilities.node_output import emit_lines
+from launch_ros_sandbox.utilities.node_output import LineDecoder
+from launch_ros_sandbox.utilities.output_history import DUMP_LINE_COUNT
+from launch_ros_sandbox.utilities.output_history import OutputHistory
+from launch_ros_sandbox.utilities.respawn_backoff import RespawnBackoff
+
+# Maximum number of bytes read from the output of a node at once.
+_READ_SIZE = 65536
+
+# Number of seconds the nodes are given to exit after SIGINT, and then after SIGTERM, on shutdown.
+_SIGTERM_TIMEOUT = 5.0
+_SIGKILL_TIMEOUT = 5.0
+
+# Number of seconds the output of a killed node is still read for.
+_NODE_KILL_TIMEOUT = 1.0
+
+# Number of seconds the action waits on shutdown for the output of its nodes to reach their files.
+_LOG_WRITER_TIMEOUT = 5.0
+
+
+class _RunAsNode:
+    """Runtime state of a SandboxedNode running as another user."""
+
+    def __init__(
+        self,
+        *,
+        cmd: List[str],
+        logger: Any,
+        history: Optional[OutputHistory],
+        backoff: Optional[RespawnBackoff] = None
+    ) -> None:
+        """Construct the node state from the resolved command, its logger and its history."""
+        self.cmd = cmd
+        self.logger = logger
+        self.history = history
+        # Restarts of the node once it exited, if it respawns, and the wait for the next one.
+        self.backoff = backoff
+        self.respawn_wait = None  # type: Optional[asyncio.Future]
+        # Handler writing the node's output to its file sink, if the node has one.
+        self.log_handler = None  # type: Optional[FileSinkHandler]
+        self.process = None  # type: Optional[asyncio.subprocess.Process]
+        # Task running the node until it is done, including its restarts.
+        self.task = None  # type: Optional[asyncio.Task]
+        self.output = LineDecoder()
 
 
 class LoadRunAsNodes(Action):
@@ -28,7 +90,359 @@ class LoadRunAsNodes(Action):
     LoadRunAsNodes is an Action that controls the sandbox environment spawned by `UserPolicy`.
 
     LoadRunAsNodes should only be constructed by `UserPolicy.apply`.
-    FIXME: Move the logic for launching the sandbox environment into `LoadRunAsNodes.execute`
     """
 
-    pass
+    def __init__(
+        self,
+        policy: UserPolicy,
+        node_descriptions: List[SandboxedNode],
+        **kwargs
+    ) -> None:
+        """
+        Construct the LoadRunAsNodes Action.
+
+        Parameters regarding initialization are copied here.
+        Most of the arguments are forwarded to Action.
+        """
+        super().__init__(**kwargs)
+        self._policy = policy
+        self._node_descriptions = node_descriptions
+        self._completed_future = None  # type: Optional[asyncio.Future]
+        self._started_task = None  # type: Optional[asyncio.Task]
+        self._stop_task = None  # type: Optional[asyncio.Task]
+        self._nodes = []  # type: List[_RunAsNode]
+        self.__logger = launch.logging.get_logger(__name__)
+
+    def _environment(self) -> Dict[str, str]:
+        """Return the environment of the nodes, with the home and name of the user to run as."""
+        user = self._policy.run_as
+        pw_record = pwd.getpwuid(user.uid)
+
+        env = os.environ.copy()
+        env['HOME'] = pw_record.pw_dir
+        env['LOGNAME'] = pw_record.pw_name
+        env['USER'] = pw_record.pw_name
+        self.__logger.debug('Running as: {}'.format(pw_record.pw_name))
+        self.__logger.debug('\tuid: {}'.format(user.uid))
+        self.__logger.debug('\tgid: {}'.format(user.gid))
+        self.__logger.debug('\thome: {}'.format(pw_record.pw_dir))
+        return env
+
+    def _resolve_nodes(
+        self,
+        context: LaunchContext
+    ) -> None:
+        """Resolve the command and the logger of every node to run."""
+        user_name = pwd.getpwuid(self._policy.run_as.uid).pw_name
+        logger_names = set()  # type: set
+        for index, description in enumerate(self._node_descriptions):
+            package_name = perform_substitutions(
+                context,
+                description.package
+            )
+            executable_name = perform_substitutions(
+                context,
+                description.node_executable
+            )
+
+            # TODO: support node namespace and node name
+            # TODO: support parameters
+            # TODO: support remappings
+
+            cmd = [ExecutableInPackage(
+                package=package_name,
+                executable=executable_name
+            ).perform(context)]
+
+            # Each node logs to its own logger, named after the user and the node.
+            node_name = executable_name
+            if description.node_name is not None:
+                node_name = perform_substitutions(context, description.node_name)
+            logger_name = '{}.{}'.format(user_name, node_name)
+            if logger_name in logger_names:
+                logger_name = '{}-{}'.format(logger_name, index)
+            logger_names.add(logger_name)
+
+            history = None
+            if description.output_history_size:
+                history = OutputHistory(description.output_history_size)
+            backoff = None
+            if description.respawn is not None:
+                backoff = RespawnBackoff(description.respawn)
+            node = _RunAsNode(
+                cmd=cmd,
+                logger=launch.logging.get_logger(logger_name),
+                history=history,
+                backoff=backoff
+            )
+            if description.log_sink is not None:
+                node.log_handler = FileSinkHandler(logger_name, description.log_sink)
+                node.logger.addHandler(node.log_handler)
+            self._nodes.append(node)
+
+    async def _start_nodes(
+        self,
+        context: LaunchContext
+    ) -> None:
+        """Run all nodes as the policy's user until they have exited."""
+        self._resolve_nodes(context)
+        await self._run_nodes(context.asyncio_loop, self._environment())
+
+    async def _run_nodes(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        env: Dict[str, str]
+    ) -> None:
+        """Run every node in a task of its own, and complete the action once all are done."""
+        for node in self._nodes:
+            node.task = loop.create_task(self._run_node(node, env))
+        # Unlike gather, wait does not cancel the nodes' tasks when the started task is cancelled.
+        if self._nodes:
+            await asyncio.wait([node.task for node in self._nodes if node.task is not None])
+
+        with_future = self._completed_future
+        if with_future is not None and not with_future.done():
+            with_future.set_result(None)
+
+    async def _run_node(
+        self,
+        node: _RunAsNode,
+        env: Dict[str, str]
+    ) -> None:
+        """Run a single node, and again whenever it exits if it respawns, until it is done."""
+        while await self._run_node_once(node, env):
+            assert node.backoff is not None
+            delay = node.backoff.next_delay()
+            if delay is None:
+                self.__logger.error('"{}" exited after {} restarts in a row; not restarting it'
+                                    .format(node.logger.name, node.backoff.restarts))
+                return
+            self.__logger.info('Restarting "{}" in {:.2f} seconds (restart {} in a row)'
+                               .format(node.logger.name, delay, node.backoff.restarts))
+            node.respawn_wait = asyncio.ensure_future(asyncio.sleep(delay))
+            try:
+                await node.respawn_wait
+            except asyncio.CancelledError:
+                # The launch shut down while waiting.
+                return
+            finally:
+                node.respawn_wait = None
+            if self._completed_future is None:
+                return
+
+    async def _run_node_once(
+        self,
+        node: _RunAsNode,
+        env: Dict[str, str]
+    ) -> bool:
+        """
+        Run a single node and forward its output to the logger until it exits.
+
+        :returns True if the node respawns and has to be run again
+        """
+        user = self._policy.run_as
+
+        def set_user() -> None:
+            """Set the current user."""
+            os.setgid(user.gid)
+            os.setuid(user.uid)
+
+        self.__logger.info('Running: {}'.format(node.cmd))
+        try:
+            node.process = await asyncio.create_subprocess_exec(
+                *node.cmd,
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.STDOUT,
+                preexec_fn=set_user,
+                env=env
+            )
+        except OSError as ex:
+            self.__logger.error('Unable to run {}: {}'.format(node.cmd, ex))
+            return False
+        if node.backoff is not None:
+            node.backoff.started()
+
+        assert node.process.stdout is not None
+        while True:
+            chunk = await node.process.stdout.read(_READ_SIZE)
+            if not chunk:
+                break
+            self._emit_lines(node, node.output.feed(chunk))
+        self._emit_lines(node, node.output.flush())
+
+        returncode = await node.process.wait()
+        self._report_node_exit(node, returncode)
+        return node.backoff is not None and self._completed_future is not None
+
+    def _emit_lines(
+        self,
+        node: _RunAsNode,
+        lines: List[str]
+    ) -> None:
+        """Log lines of a node's output and keep them in its history."""
+        if node.history is not None:
+            node.history.append(lines)
+        emit_lines(node.logger, lines)
+
+    def _report_node_exit(
+        self,
+        node: _RunAsNode,
+        returncode: int
+    ) -> None:
+        """Log the recent output of a node which exited abnormally while the launch is running."""
+        if returncode == 0 or self._completed_future is None or node.history is None:
+            return
+
+        lines = node.history.lines(DUMP_LINE_COUNT)
+        self.__logger.error('"{}" exited with {}; its last {} lines of output:\n{}'.format(
+            node.logger.name, returncode, len(lines), '\n'.join(lines)))
+
+    def recent_output(
+        self,
+        count: Optional[int] = None
+    ) -> Dict[str, List[str]]:
+        """
+        Return the most recent lines of output of each node, the oldest first.
+
+        :param: count is the number of lines returned per node. Defaults to None, which returns
+        all lines in the node's history.
+        :returns a dictionary mapping the logger name of each node to its lines
+        """
+        return {
+            node.logger.name: node.history.lines(count)
+            for node in self._nodes if node.history is not None
+        }
+
+    def get_asyncio_future(self) -> Optional[asyncio.Future]:
+        """Return the asyncio Future that completes once all nodes have exited."""
+        return self._completed_future
+
+    def execute(
+        self,
+        context: LaunchContext
+    ) -> Optional[List[Action]]:
+        """
+        Execute the nodes as the policy's user.
+
+        This will start each node as a subprocess and forward its output to its logger. There is
+        no additional work required, so this function always returns None.
+        """
+        context.register_event_handler(
+            OnShutdown(
+                on_shutdown=self.__on_shutdown
+            )
+        )
+
+        self._completed_future = create_future(context.asyncio_loop)
+
+        self._started_task = context.asyncio_loop.create_task(
+            self._start_nodes(context)
+        )
+
+        return None
+
+    def __on_shutdown(
+        self,
+        event: Event,
+        context: LaunchContext
+    ) -> Optional[SomeActionsType]:
+        """
+        Run when the shutdown signal has been received.
+
+        This will cancel the started task, if running, and stop the nodes in a task of its own:
+        every running node is sent SIGINT, then SIGTERM and finally SIGKILL if it does not exit in
+        time. The output of the nodes is still forwarded until they have exited, and the completed
+        future completes once they have, so the launch waits for them.
+        """
+        if self._stop_task is not None:
+            # The nodes are already stopping.
+            return None
+
+        # if still starting cancel
+        if self._started_task is not None:
+            self._started_task.cancel()
+            self._started_task = None
+
+        for node in self._nodes:
+            if node.respawn_wait is not None:
+                node.respawn_wait.cancel()
+
+        completed_future = self._completed_future
+        self._completed_future = None
+
+        self._stop_task = context.asyncio_loop.create_task(
+            self._stop(context.asyncio_loop, completed_future))
+        return None
+
+    async def _stop(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        completed_future: Optional[asyncio.Future]
+    ) -> None:
+        """Stop the nodes, close their log files and complete the action."""
+        try:
+            await self._stop_nodes()
+        finally:
+            logs_closed = self._close_node_logs()
+            if logs_closed and not await loop.run_in_executor(
+                    None, get_log_writer().join, _LOG_WRITER_TIMEOUT):
+                self.__logger.warning('The log files of the nodes were not written within {} '
+                                      'seconds'.format(_LOG_WRITER_TIMEOUT))
+            if completed_future is not None and not completed_future.done():
+                completed_future.set_result(None)
+
+    async def _stop_nodes(self) -> None:
+        """Send SIGINT to all running nodes, and SIGTERM and SIGKILL to those still running."""
+        escalation = [
+            (signal.SIGINT, _SIGTERM_TIMEOUT),
+            (signal.SIGTERM, _SIGKILL_TIMEOUT),
+            (signal.SIGKILL, _NODE_KILL_TIMEOUT),
+        ]
+        running = []  # type: List[_RunAsNode]
+        for signal_number, timeout in escalation:
+            running = [
+                node for node in self._nodes if node.task is not None and not node.task.done()
+            ]
+            if not running:
+                return
+            if signal_number != signal.SIGINT:
+                self.__logger.warning('{} nodes did not exit in time; sending them {}'.format(
+                    len(running), signal.Signals(signal_number).name))
+            for node in running:
+                self._signal_node(node, signal_number)
+            await asyncio.wait([node.task for node in running if node.task is not None],
+                               timeout=timeout)
+
+        # The output of a killed node is only left open by processes it started.
+        for node in running:
+            if node.task is not None:
+                node.task.cancel()
+
+    def _signal_node(
+        self,
+        node: _RunAsNode,
+        signal_number: int
+    ) -> None:
+        """Send a signal to a node, unless it already exited."""
+        if node.process is None or node.process.returncode is not None:
+            return
+        try:
+            node.process.send_signal(signal_number)
+        except ProcessLookupError:
+            pass
+
+    def _close_node_logs(self) -> bool:
+        """
+        Close the file sinks of all nodes, once they have exited.
+
+        :returns True if any file sink was closed
+        """
+        closed = False
+        for node in self._nodes:
+            if node.log_handler is not None:
+                node.logger.removeHandler(node.log_handler)
+                node.log_handler.close()
+                node.log_handler = None
+                closed = True
+        return closed
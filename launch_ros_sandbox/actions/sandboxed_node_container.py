@@ -15,6 +15,7 @@
 
 """Module for SandboxedNodeContainer class."""
 
+from typing import Dict
 from typing import List
 from typing import Optional
 
@@ -59,6 +60,7 @@ class SandboxedNodeContainer(Action):
             self.__node_descriptions = node_descriptions
 
         self.__policy = policy
+        self.__sandboxing_action = None  # type: Optional[Action]
 
     def execute(
         self,
@@ -79,11 +81,45 @@ class SandboxedNodeContainer(Action):
             )
 
             if sandboxing_action is not None:
+                # The events of the sandbox are emitted for this action, which the user launched.
+                report_events_as = getattr(sandboxing_action, 'report_events_as', None)
+                if report_events_as is not None:
+                    report_events_as(self)
+                self.__sandboxing_action = sandboxing_action
                 return [sandboxing_action]
 
         return None
 
+    def recent_output(
+        self,
+        count: Optional[int] = None
+    ) -> Dict[str, List[str]]:
+        """
+        Return the most recent lines of output of each node in the sandbox, the oldest first.
+
+        The output is only available once the SandboxedNodeContainer was executed, and only for
+        nodes whose SandboxedNode keeps a history of their output.
+
+        :param: count is the number of lines returned per node. Defaults to None, which returns
+        all lines in the node's history.
+        :returns a dictionary mapping the logger name of each node to its lines
+        """
+        recent_output = getattr(self.__sandboxing_action, 'recent_output', None)
+        if recent_output is None:
+            return {}
+        return recent_output(count)
+
     @property
     def sandbox_name(self) -> Optional[List[Substitution]]:
         """Get sandbox name as a sequence of substitutions to be performed."""
         return self.__sandbox_name
+
+    @property
+    def policy(self) -> Optional[Policy]:
+        """Get the sandboxing policy."""
+        return self.__policy
+
+    @property
+    def node_descriptions(self) -> Optional[List[SandboxedNode]]:
+        """Get the list of nodes to launch inside the sandbox environment."""
+        return self.__node_descriptions
@@ -0,0 +1,37 @@
+# Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Module for the 'ros2 sandbox' command."""
+
+from ros2cli.command import add_subparsers_on_demand
+from ros2cli.command import CommandExtension
+
+
+class SandboxCommand(CommandExtension):
+    """Various launch_ros_sandbox related sub-commands."""
+
+    def add_arguments(self, parser, cli_name):
+        """Add the verbs of 'ros2 sandbox' as sub-commands."""
+        self._subparser = parser
+        add_subparsers_on_demand(
+            parser, cli_name, '_verb', 'launch_ros_sandbox.verb', required=False)
+
+    def main(self, *, parser, args):
+        """Run the selected verb, or print the help if none was given."""
+        if not hasattr(args, '_verb'):
+            self._subparser.print_help()
+            return 0
+
+        extension = getattr(args, '_verb')
+        return extension.main(args=args)
@@ -16,7 +16,10 @@
 """Package of launch_ros_sandbox descriptions."""
 
 from launch_ros_sandbox.descriptions.docker_policy import DockerPolicy
+from launch_ros_sandbox.descriptions.file_log_sink import FileLogSink
+from launch_ros_sandbox.descriptions.log_limits import LogLimits
 from launch_ros_sandbox.descriptions.policy import Policy
+from launch_ros_sandbox.descriptions.respawn import Respawn
 from launch_ros_sandbox.descriptions.sandboxed_node import SandboxedNode
 from launch_ros_sandbox.descriptions.user import User
 from launch_ros_sandbox.descriptions.user_policy import UserPolicy
@@ -24,7 +27,10 @@ from launch_ros_sandbox.descriptions.user_policy import UserPolicy
 
 __all__ = [
     'DockerPolicy',
+    'FileLogSink',
+    'LogLimits',
     'Policy',
+    'Respawn',
     'SandboxedNode',
     'User',
     'UserPolicy',
@@ -49,6 +49,8 @@ parameters to docker-py.
 
 """
 
+import itertools
+import os
 import time
 from typing import Any
 from typing import Dict
@@ -59,17 +61,33 @@ import launch
 from launch import Action
 from launch import LaunchContext
 
+from launch_ros_sandbox.descriptions.log_limits import LogLimits
 from launch_ros_sandbox.descriptions.policy import Policy
 from launch_ros_sandbox.descriptions.sandboxed_node import SandboxedNode
 
 _DEFAULT_DOCKER_REPO = 'osrf/ros'
 _DEFAULT_DOCKER_TAG = 'dashing-desktop'
 _DEFAULT_EXEC_ENTRYPOINT = '/ros_entrypoint.sh'
+_DEFAULT_PULL_POLICY = 'always'
+_DEFAULT_SYNC_PERIOD = 1.0
+_DEFAULT_LOG_MODE = 'stream'
+_DEFAULT_STOP_TIMEOUT = 5.0
+_PULL_POLICIES = ('always', 'if-not-present', 'never')
+_LOG_MODES = ('stream', 'pump', 'passthrough', 'files')
+
+# Distinguishes the container names generated by this process within the same second.
+_container_name_counter = itertools.count()
 
 
 def _generate_container_name() -> str:
-    """Generate a Docker container name for use in DockerPolicy."""
-    return 'ros2launch-sandboxed-node-{}'.format(time.strftime('%H%M%S'))
+    """
+    Generate a Docker container name for use in DockerPolicy.
+
+    The name contains the process ID and a per-process counter, so policies constructed within the
+    same second, in this process or another, never share a name.
+    """
+    return 'ros2launch-sandboxed-node-{}-{}-{}'.format(
+        time.strftime('%H%M%S'), os.getpid(), next(_container_name_counter))
 
 
 class DockerPolicy(Policy):
@@ -88,6 +106,22 @@ class DockerPolicy(Policy):
         entrypoint: Optional[str] = None,
         container_name: Optional[str] = None,
         run_args: Optional[Dict[str, Any]] = None,
+        pull_policy: Optional[str] = None,
+        lockfile: Optional[str] = None,
+        image_archive: Optional[str] = None,
+        setup_commands: Optional[List[str]] = None,
+        overlay: Optional[str] = None,
+        sync_overlay: bool = False,
+        sync_period: Optional[float] = None,
+        use_broker: bool = False,
+        reattach: bool = False,
+        use_supervisor: bool = False,
+        log_limits: Optional[LogLimits] = None,
+        log_mode: str = _DEFAULT_LOG_MODE,
+        passthrough_directory: Optional[str] = None,
+        log_directory: Optional[str] = None,
+        tty: bool = True,
+        stop_timeout: float = _DEFAULT_STOP_TIMEOUT,
     ) -> None:
         """
         Construct the DockerPolicy.
@@ -107,12 +141,84 @@ class DockerPolicy(Policy):
         evaluates to 'osrf/ros'. Otherwise 'entrypoint' defaults to '/bin/bash -c'.
         :param: container_name is the name of the container passed to Docker to make it easier to
         identify when listing all the containers. Defaults to
-        ros2launch-sandboxed-node-<Hour><Minute><Sec> where the time is when the DockerPolicy
-        was constructed.
+        ros2launch-sandboxed-node-<Hour><Minute><Sec>-<PID>-<N> where the time is when the
+        DockerPolicy was constructed, PID is the ID of the launch process and N counts the names
+        generated by that process.
         :param: run_args is a dictionary of arguments (str to Any) passed into the 'run' command
         for the Docker container. See [1] for supported arguments.
         'image', 'tty', 'detach', 'auto_remove', and 'name' are not valid keywords for 'run_args'
         due to being defined by LoadDockerNodes.
+        :param: pull_policy decides when the image is pulled from its registry before the container
+        is started. 'always' pulls on every launch to pick up updates of the tag, 'if-not-present'
+        only pulls when the image is missing from the local image store, and 'never' uses the
+        local image store exclusively. Defaults to 'never' if 'image_archive' is set. Otherwise
+        'pull_policy' defaults to 'always'.
+        :param: lockfile is the path of an image lockfile generated by 'ros2 sandbox lock'. If the
+        lockfile exists and pins the image, the pinned digest is run from the local image store
+        without contacting the registry; the registry is only used to fetch the pinned digest if
+        it is missing locally and 'pull_policy' is not 'never'. Defaults to None.
+        :param: image_archive is the path of an image archive created by 'docker save', used as the
+        source of the image instead of a registry. The archive must contain the image
+        'repository:tag'. It is loaded into the local image store only if its content changed
+        since it was last loaded. Defaults to None.
+        :param: setup_commands is a list of shell commands, such as package installs, run on top of
+        the image before any node is started. Defaults to None.
+        :param: overlay is the path of a workspace install directory, such as a colcon 'install'
+        directory, copied into the image and sourced before each node is run. Defaults to None.
+        The setup commands and the overlay are baked into a derived image tagged with a hash of
+        the image, the commands and the overlay content. The derived image is only built again
+        when that hash changes.
+        :param: sync_overlay enables the development mode where changes to the 'overlay' directory
+        are pushed into the running container, and only the nodes of the packages that changed are
+        restarted. Requires 'overlay' to be set. Defaults to False.
+        :param: sync_period is the number of seconds between two checks of the overlay for changes
+        when 'sync_overlay' is enabled. Defaults to 1 second.
+        :param: use_broker claims an already started container from the container broker run by
+        'ros2 sandbox broker' instead of creating one, and hands it back on shutdown. The container
+        is renamed to 'container_name'. If the broker is not running or has no container ready
+        yet, the container is created as usual. 'run_args' must be JSON serializable to be sent to
+        the broker. Defaults to False.
+        :param: reattach makes the sandbox survive a crash of the launch process. The container is
+        labelled with a fingerprint of the launch configuration and of the image it runs, and a
+        later launch with the same fingerprint takes over the running container and its nodes
+        instead of creating a new one, once the launch owning the container is gone. Nodes which
+        are still running are not restarted. To allow this, node output is written to
+        a file in the container and followed from there. Reattachable containers are never claimed
+        from the container broker. Defaults to False.
+        :param: use_supervisor runs all nodes under a single supervisor process inside the
+        container instead of one 'docker exec' per node. The node list is handed to the supervisor
+        in one request, and the output and exit status of every node come back over one stream.
+        The image must provide 'python3'. Cannot be combined with 'reattach', since the nodes are
+        stopped when the launch process goes away. Defaults to False.
+        :param: log_limits rate-limits the output of the nodes and bounds the output waiting to be
+        logged, so a chatty node cannot flood the launch process. Defaults to None, which logs all
+        output as fast as it arrives.
+        :param: log_mode decides where the output of the nodes is read. 'stream' reads it in the
+        launch process. 'pump' reads it in a helper process, which writes the complete output to
+        the nodes' log sinks and only passes a sample of each node's lines, and the number of
+        lines and bytes it wrote, back to the launch process. 'passthrough' copies the raw output
+        verbatim to the launch process's stdout, or to the files in 'passthrough_directory',
+        without decoding or logging it; log sinks and log limits do not apply. 'files' has the
+        nodes write their output to files in 'log_directory', which is bind-mounted into the
+        container, and follows the files from the host instead of streaming the output through
+        the Docker daemon; the files are kept when the launch process goes away. Modes other than
+        'stream' cannot be combined with 'use_supervisor', since the supervisor's stream also
+        carries the exit status of the nodes. Defaults to 'stream'.
+        :param: passthrough_directory is the directory the 'passthrough' log mode writes the
+        output of each node to, as '<directory>/<logger name>.log'. It is created if it does not
+        exist. Defaults to None, which writes the output of all nodes to stdout.
+        :param: log_directory is the host directory the 'files' log mode mounts into the container.
+        Each node appends its output to '<log_directory>/<logger name>.log'. It is created if it
+        does not exist. Required by, and only allowed with, the 'files' log mode.
+        :param: tty runs each node with a pseudo-terminal, which merges its stdout and stderr.
+        If False, the nodes run without one and Docker keeps both streams apart: stdout is logged
+        with INFO severity and stderr with WARNING. Only supported by the 'stream' log mode, and
+        cannot be combined with 'reattach' or 'use_supervisor', which merge both streams inside
+        the container. Defaults to True.
+        :param: stop_timeout is the number of seconds the nodes are given to exit after SIGINT when
+        the launch shuts down, before they are killed. All sandboxes stop at the same time, so a
+        launch shuts down within this grace period however many sandboxes it runs. Defaults to 5
+        seconds.
 
          [1]: https://docker-py.readthedocs.io/en/stable/containers.html#docker.models.containers.ContainerCollection.run # noqa
         """
@@ -135,6 +241,60 @@ class DockerPolicy(Policy):
         self._container_name = container_name or _generate_container_name()
         self._run_args = run_args
 
+        self._image_archive = image_archive
+
+        # An image archive replaces the registry as the source of the image.
+        if self._image_archive is not None:
+            self._pull_policy = pull_policy or 'never'
+        else:
+            self._pull_policy = pull_policy or _DEFAULT_PULL_POLICY
+        if self._pull_policy not in _PULL_POLICIES:
+            raise ValueError('Invalid pull_policy "{}"; expected one of {}'.format(
+                self._pull_policy, ', '.join(_PULL_POLICIES)))
+
+        self._lockfile = lockfile
+        self._setup_commands = setup_commands
+        self._overlay = overlay
+
+        if sync_overlay and overlay is None:
+            raise ValueError('sync_overlay requires an overlay to synchronize')
+        self._sync_overlay = sync_overlay
+        self._sync_period = sync_period or _DEFAULT_SYNC_PERIOD
+        self._use_broker = use_broker
+        self._reattach = reattach
+
+        if use_supervisor and reattach:
+            raise ValueError('use_supervisor cannot be combined with reattach')
+        self._use_supervisor = use_supervisor
+        self._log_limits = log_limits
+
+        if log_mode not in _LOG_MODES:
+            raise ValueError('Invalid log_mode "{}"; expected one of {}'.format(
+                log_mode, ', '.join(_LOG_MODES)))
+        if log_mode != 'stream' and use_supervisor:
+            raise ValueError('log_mode "{}" cannot be combined with use_supervisor'
+                             .format(log_mode))
+        self._log_mode = log_mode
+
+        if passthrough_directory is not None and log_mode != 'passthrough':
+            raise ValueError('passthrough_directory requires the "passthrough" log_mode')
+        self._passthrough_directory = passthrough_directory
+
+        if (log_directory is not None) != (log_mode == 'files'):
+            raise ValueError('The "files" log_mode requires a log_directory, and only it')
+        if log_mode == 'files' and reattach:
+            raise ValueError('log_mode "files" cannot be combined with reattach')
+        self._log_directory = log_directory
+
+        if not tty and (log_mode != 'stream' or reattach or use_supervisor):
+            raise ValueError('tty=False requires the "stream" log_mode, without reattach or '
+                             'use_supervisor')
+        self._tty = tty
+
+        if stop_timeout < 0:
+            raise ValueError('stop_timeout must not be negative')
+        self._stop_timeout = stop_timeout
+
     @property
     def entrypoint(self) -> str:
         """Return the Docker container entrypoint."""
@@ -169,6 +329,86 @@ class DockerPolicy(Policy):
         """Return the dictionary of Docker container run arguments."""
         return self._run_args
 
+    @property
+    def pull_policy(self) -> str:
+        """Return the policy deciding when the Docker image is pulled."""
+        return self._pull_policy
+
+    @property
+    def image_archive(self) -> Optional[str]:
+        """Return the path of the image archive the image is loaded from."""
+        return self._image_archive
+
+    @property
+    def lockfile(self) -> Optional[str]:
+        """Return the path of the image lockfile."""
+        return self._lockfile
+
+    @property
+    def setup_commands(self) -> Optional[List[str]]:
+        """Return the shell commands baked into the derived image."""
+        return self._setup_commands
+
+    @property
+    def overlay(self) -> Optional[str]:
+        """Return the path of the workspace overlay baked into the derived image."""
+        return self._overlay
+
+    @property
+    def sync_overlay(self) -> bool:
+        """Return True if overlay changes are pushed into the running container."""
+        return self._sync_overlay
+
+    @property
+    def sync_period(self) -> float:
+        """Return the number of seconds between two checks of the overlay for changes."""
+        return self._sync_period
+
+    @property
+    def use_broker(self) -> bool:
+        """Return True if containers are claimed from the container broker."""
+        return self._use_broker
+
+    @property
+    def reattach(self) -> bool:
+        """Return True if a later launch may take over the running container."""
+        return self._reattach
+
+    @property
+    def use_supervisor(self) -> bool:
+        """Return True if the nodes are run by a supervisor process inside the container."""
+        return self._use_supervisor
+
+    @property
+    def log_limits(self) -> Optional[LogLimits]:
+        """Return the limits of the nodes' log output, if any."""
+        return self._log_limits
+
+    @property
+    def log_mode(self) -> str:
+        """Return where the output of the nodes is read."""
+        return self._log_mode
+
+    @property
+    def passthrough_directory(self) -> Optional[str]:
+        """Return the directory the 'passthrough' log mode writes to; None for stdout."""
+        return self._passthrough_directory
+
+    @property
+    def log_directory(self) -> Optional[str]:
+        """Return the host directory the 'files' log mode mounts into the container."""
+        return self._log_directory
+
+    @property
+    def tty(self) -> bool:
+        """Return True if the nodes run with a pseudo-terminal."""
+        return self._tty
+
+    @property
+    def stop_timeout(self) -> float:
+        """Return the number of seconds the nodes are given to exit on shutdown."""
+        return self._stop_timeout
+
     def apply(
         self,
         context: LaunchContext,
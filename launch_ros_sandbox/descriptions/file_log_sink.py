@@ -0,0 +1,92 @@
+# Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Module for FileLogSink."""
+
+import importlib.util
+from typing import Optional
+
+_DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+_DEFAULT_BACKUP_COUNT = 5
+_COMPRESSIONS = ('gzip', 'zstd')
+_FILE_EXTENSIONS = {None: '.log', 'gzip': '.log.gz', 'zstd': '.log.zst'}
+
+
+class FileLogSink:
+    """FileLogSink describes the files the output of a sandboxed node is written to."""
+
+    def __init__(
+        self,
+        *,
+        directory: str,
+        max_bytes: int = _DEFAULT_MAX_BYTES,
+        backup_count: int = _DEFAULT_BACKUP_COUNT,
+        compression: Optional[str] = 'gzip'
+    ) -> None:
+        """
+        Construct the FileLogSink.
+
+        The output of the node is written to '<directory>/<logger name>.log', with the extension
+        of the compression appended, by a background thread so the launch process never waits for
+        the disk.
+
+        :param: directory is the directory the log files are written to. It is created if it does
+        not exist.
+        :param: max_bytes is the size in bytes the log file may grow to on disk before it is
+        rotated. Defaults to 10 MiB.
+        :param: backup_count is the number of rotated log files which are kept, as
+        '<logger name>.1.log' to '<logger name>.<backup_count>.log' plus the extension of the
+        compression, the most recent first. Defaults to 5.
+        :param: compression is 'gzip', 'zstd' or None. The output is compressed as it is written.
+        'zstd' requires the 'zstandard' Python package. Defaults to 'gzip'.
+        """
+        if compression is not None and compression not in _COMPRESSIONS:
+            raise ValueError('Invalid compression "{}"; expected one of {} or None'.format(
+                compression, ', '.join(_COMPRESSIONS)))
+        if compression == 'zstd' and importlib.util.find_spec('zstandard') is None:
+            raise ValueError('zstd compression requires the "zstandard" Python package')
+        if max_bytes < 1:
+            raise ValueError('max_bytes must be positive, got {}'.format(max_bytes))
+        if backup_count < 0:
+            raise ValueError('backup_count must not be negative, got {}'.format(backup_count))
+
+        self._directory = directory
+        self._max_bytes = max_bytes
+        self._backup_count = backup_count
+        self._compression = compression
+
+    @property
+    def directory(self) -> str:
+        """Get the directory the log files are written to."""
+        return self._directory
+
+    @property
+    def max_bytes(self) -> int:
+        """Get the size in bytes a log file may grow to before it is rotated."""
+        return self._max_bytes
+
+    @property
+    def backup_count(self) -> int:
+        """Get the number of rotated log files which are kept."""
+        return self._backup_count
+
+    @property
+    def compression(self) -> Optional[str]:
+        """Get the compression of the log files."""
+        return self._compression
+
+    @property
+    def file_extension(self) -> str:
+        """Get the extension of the log files, including the one of the compression."""
+        return _FILE_EXTENSIONS[self._compression]
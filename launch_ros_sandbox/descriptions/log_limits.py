@@ -0,0 +1,112 @@
+# Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Module for LogLimits."""
+
+from typing import Optional
+
+_DEFAULT_QUEUE_SIZE = 10000
+_DEFAULT_DROP_POLICY = 'drop-oldest'
+DROP_POLICIES = ('drop-oldest', 'drop-newest', 'block')
+
+
+class LogLimits:
+    """LogLimits describes how much output of a sandbox's nodes is logged, and how fast."""
+
+    def __init__(
+        self,
+        *,
+        node_rate: Optional[float] = None,
+        node_burst: Optional[int] = None,
+        sandbox_rate: Optional[float] = None,
+        sandbox_burst: Optional[int] = None,
+        queue_size: int = _DEFAULT_QUEUE_SIZE,
+        drop_policy: str = _DEFAULT_DROP_POLICY
+    ) -> None:
+        """
+        Construct the LogLimits.
+
+        Lines over a rate limit are suppressed, and the number of suppressed lines is logged once
+        the node is allowed to log again. The lines which pass the rate limits are queued and
+        logged by a background thread, so a slow log sink does not slow down reading the output.
+
+        :param: node_rate is the number of lines per second each node may log on average. Defaults
+        to None, which does not limit the nodes.
+        :param: node_burst is the number of lines each node may log at once. Defaults to one
+        second worth of 'node_rate'.
+        :param: sandbox_rate is the number of lines per second all nodes of the sandbox together
+        may log on average. Defaults to None, which does not limit the sandbox.
+        :param: sandbox_burst is the number of lines all nodes of the sandbox together may log at
+        once. Defaults to one second worth of 'sandbox_rate'.
+        :param: queue_size is the number of lines which may wait to be logged. Defaults to 10000.
+        :param: drop_policy decides what happens to output while the queue is full.
+        'drop-oldest' drops the lines which waited the longest, 'drop-newest' drops the new
+        lines, and 'block' stops reading the node's output until there is room again, which
+        eventually blocks the node writing it. Defaults to 'drop-oldest'.
+        """
+        for name, rate in (('node_rate', node_rate), ('sandbox_rate', sandbox_rate)):
+            if rate is not None and rate <= 0:
+                raise ValueError('{} must be positive, got {}'.format(name, rate))
+        if queue_size < 1:
+            raise ValueError('queue_size must be positive, got {}'.format(queue_size))
+        if drop_policy not in DROP_POLICIES:
+            raise ValueError('Invalid drop_policy "{}"; expected one of {}'.format(
+                drop_policy, ', '.join(DROP_POLICIES)))
+
+        self._node_rate = node_rate
+        self._node_burst = _burst(node_rate, node_burst)
+        self._sandbox_rate = sandbox_rate
+        self._sandbox_burst = _burst(sandbox_rate, sandbox_burst)
+        self._queue_size = queue_size
+        self._drop_policy = drop_policy
+
+    @property
+    def node_rate(self) -> Optional[float]:
+        """Get the number of lines per second each node may log."""
+        return self._node_rate
+
+    @property
+    def node_burst(self) -> Optional[int]:
+        """Get the number of lines each node may log at once."""
+        return self._node_burst
+
+    @property
+    def sandbox_rate(self) -> Optional[float]:
+        """Get the number of lines per second all nodes of the sandbox may log."""
+        return self._sandbox_rate
+
+    @property
+    def sandbox_burst(self) -> Optional[int]:
+        """Get the number of lines all nodes of the sandbox may log at once."""
+        return self._sandbox_burst
+
+    @property
+    def queue_size(self) -> int:
+        """Get the number of lines which may wait to be logged."""
+        return self._queue_size
+
+    @property
+    def drop_policy(self) -> str:
+        """Get what happens to output while the queue is full."""
+        return self._drop_policy
+
+
+def _burst(rate: Optional[float], burst: Optional[int]) -> Optional[int]:
+    if rate is None:
+        return None
+    if burst is None:
+        return max(int(rate), 1)
+    if burst < 1:
+        raise ValueError('burst must be positive, got {}'.format(burst))
+    return burst
@@ -0,0 +1,107 @@
+# Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Module for Respawn."""
+
+from typing import Optional
+
+_DEFAULT_INITIAL_DELAY = 1.0
+_DEFAULT_MAX_DELAY = 60.0
+_DEFAULT_MULTIPLIER = 2.0
+_DEFAULT_JITTER = 0.1
+_DEFAULT_RESET_WINDOW = 60.0
+
+
+class Respawn:
+    """Respawn describes how a sandboxed node which exited is run again in its sandbox."""
+
+    def __init__(
+        self,
+        *,
+        max_restarts: Optional[int] = None,
+        initial_delay: float = _DEFAULT_INITIAL_DELAY,
+        max_delay: float = _DEFAULT_MAX_DELAY,
+        multiplier: float = _DEFAULT_MULTIPLIER,
+        jitter: float = _DEFAULT_JITTER,
+        reset_window: float = _DEFAULT_RESET_WINDOW
+    ) -> None:
+        """
+        Construct the Respawn.
+
+        Only the node which exited is run again, inside the running sandbox. The delay before a
+        restart grows exponentially with the number of restarts in a row, and is varied randomly
+        so that nodes which failed together are not restarted in lockstep. A node which ran for
+        at least 'reset_window' seconds before it exited is restarted as if it never was before.
+
+        :param: max_restarts is the number of restarts in a row after which the node is given up
+        on. Defaults to None, which restarts the node for as long as the launch runs.
+        :param: initial_delay is the number of seconds before the first restart. Defaults to 1.
+        :param: max_delay is the largest number of seconds before a restart. Defaults to 60.
+        :param: multiplier is the factor the delay grows by with each restart in a row. Defaults
+        to 2.
+        :param: jitter is the fraction of the delay it is randomly varied by, in either direction.
+        Defaults to 0.1.
+        :param: reset_window is the number of seconds a node has to run for its restarts in a row
+        to be forgotten. Defaults to 60.
+        """
+        if max_restarts is not None and max_restarts < 0:
+            raise ValueError('max_restarts must not be negative, got {}'.format(max_restarts))
+        if initial_delay < 0:
+            raise ValueError('initial_delay must not be negative, got {}'.format(initial_delay))
+        if max_delay < initial_delay:
+            raise ValueError('max_delay must not be less than initial_delay, got {}'
+                             .format(max_delay))
+        if multiplier < 1:
+            raise ValueError('multiplier must be at least 1, got {}'.format(multiplier))
+        if not 0 <= jitter <= 1:
+            raise ValueError('jitter must be between 0 and 1, got {}'.format(jitter))
+        if reset_window <= 0:
+            raise ValueError('reset_window must be positive, got {}'.format(reset_window))
+
+        self._max_restarts = max_restarts
+        self._initial_delay = initial_delay
+        self._max_delay = max_delay
+        self._multiplier = multiplier
+        self._jitter = jitter
+        self._reset_window = reset_window
+
+    @property
+    def max_restarts(self) -> Optional[int]:
+        """Get the number of restarts in a row after which the node is given up on."""
+        return self._max_restarts
+
+    @property
+    def initial_delay(self) -> float:
+        """Get the number of seconds before the first restart."""
+        return self._initial_delay
+
+    @property
+    def max_delay(self) -> float:
+        """Get the largest number of seconds before a restart."""
+        return self._max_delay
+
+    @property
+    def multiplier(self) -> float:
+        """Get the factor the delay grows by with each restart in a row."""
+        return self._multiplier
+
+    @property
+    def jitter(self) -> float:
+        """Get the fraction of the delay it is randomly varied by."""
+        return self._jitter
+
+    @property
+    def reset_window(self) -> float:
+        """Get the number of seconds a node has to run for its restarts to be forgotten."""
+        return self._reset_window
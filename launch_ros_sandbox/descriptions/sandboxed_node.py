@@ -31,6 +31,11 @@ from launch_ros.remap_rule_type import SomeRemapRules
 from launch_ros.utilities import normalize_parameters
 from launch_ros.utilities import normalize_remap_rules
 
+from launch_ros_sandbox.descriptions.file_log_sink import FileLogSink
+from launch_ros_sandbox.descriptions.respawn import Respawn
+
+_DEFAULT_OUTPUT_HISTORY_SIZE = 256 * 1024
+
 
 class SandboxedNode:
     """SandboxedNode describes sandbox launch configurations."""
@@ -45,6 +50,9 @@ class SandboxedNode:
         parameters: Optional[SomeParameters] = None,
         remappings: Optional[SomeRemapRules] = None,
         arguments: Optional[Iterable[SomeSubstitutionsType]] = None,
+        log_sink: Optional[FileLogSink] = None,
+        output_history_size: int = _DEFAULT_OUTPUT_HISTORY_SIZE,
+        respawn: Optional[Respawn] = None,
     ) -> None:
         """
         Construct a SandboxedNode description.
@@ -64,6 +72,15 @@ class SandboxedNode:
         node, read from a YAML file. Defaults to NONE.
         :param: remappings are the ordered list of 'to' and 'from' string
         pairs to be passed to a node as ROS remapping rules.
+        :param: log_sink is an optional FileLogSink the output of the node is
+        written to, in addition to the node's logger. Defaults to NONE.
+        :param: output_history_size is the number of bytes of the node's most
+        recent output kept in memory. The history is logged if the node exits
+        abnormally, and can be queried from the SandboxedNodeContainer. 0
+        disables it. Defaults to 256 KiB.
+        :param: respawn is an optional Respawn, which runs the node again inside
+        its sandbox whenever it exits while the launch is running. Defaults to
+        NONE, which leaves a node which exited alone.
         """
         self.__package = \
             normalize_to_list_of_substitutions(package)
@@ -87,6 +104,14 @@ class SandboxedNode:
         if remappings is not None:
             self.__remappings = normalize_remap_rules(remappings)
 
+        self.__log_sink = log_sink
+
+        if output_history_size < 0:
+            raise ValueError('output_history_size must not be negative, got {}'
+                             .format(output_history_size))
+        self.__output_history_size = output_history_size
+        self.__respawn = respawn
+
     @property
     def package(self) -> List[Substitution]:
         """Get node package name as a sequence of substitutions to be performed."""
@@ -111,3 +136,18 @@ class SandboxedNode:
     def remappings(self) -> Optional[RemapRules]:
         """Get node remapping rules as (from, to) tuples with substitutions to be performed."""
         return self.__remappings
+
+    @property
+    def log_sink(self) -> Optional[FileLogSink]:
+        """Get the file sink the node's output is written to."""
+        return self.__log_sink
+
+    @property
+    def output_history_size(self) -> int:
+        """Get the number of bytes of the node's most recent output kept in memory."""
+        return self.__output_history_size
+
+    @property
+    def respawn(self) -> Optional[Respawn]:
+        """Get how the node is run again once it exited."""
+        return self.__respawn
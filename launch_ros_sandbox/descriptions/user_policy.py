@@ -15,19 +15,12 @@
 """Module for UserPolicy."""
 
 import os
-import pwd
-import subprocess
 from typing import List
 from typing import Optional
 
-import launch
 from launch import Action
 from launch import LaunchContext
-from launch.utilities import perform_substitutions
 
-from launch_ros.substitutions import ExecutableInPackage
-
-from launch_ros_sandbox.actions.load_runas_nodes import LoadRunAsNodes
 from launch_ros_sandbox.descriptions.policy import Policy
 from launch_ros_sandbox.descriptions.sandboxed_node import SandboxedNode
 from launch_ros_sandbox.descriptions.user import User
@@ -47,7 +40,6 @@ class UserPolicy(Policy):
         run_as: Optional[User] = None,
     ) -> None:
         """Construct the UserPolicy."""
-        self.__logger = launch.logging.get_logger(__name__)
         # default to current user if `run_as` is undefined.
         if run_as is not None:
             self._run_as = run_as
@@ -66,52 +58,15 @@ class UserPolicy(Policy):
         context: LaunchContext,
         node_descriptions: List[SandboxedNode]
     ) -> Action:
-        """Apply the policy any launches the ROS2 nodes in the sandbox."""
-        user = self.run_as
-        pw_record = pwd.getpwuid(user.uid)
-
-        env = os.environ.copy()
-        env['HOME'] = pw_record.pw_dir
-        env['LOGNAME'] = pw_record.pw_name
-        env['USER'] = pw_record.pw_name
-        self.__logger.debug('Running as: {}'.format(pw_record.pw_name))
-        self.__logger.debug('\tuid: {}'.format(user.uid))
-        self.__logger.debug('\tgid: {}'.format(user.gid))
-        self.__logger.debug('\thome: {}'.format(pw_record.pw_dir))
-
-        def set_user() -> None:
-            """Set the current user."""
-            os.setgid(user.gid)
-            os.setuid(user.uid)
-
-        for description in node_descriptions:
-            package_name = perform_substitutions(
-                context,
-                description.package
-            )
-            executable_name = perform_substitutions(
-                context,
-                description.node_executable
-            )
-
-            # TODO: support node namespace and node name
-            # TODO: support parameters
-            # TODO: support remappings
-
-            cmd = [ExecutableInPackage(
-                package=package_name,
-                executable=executable_name
-            ).perform(context)]
-
-            self.__logger.info('Running: {}'.format(cmd))
-
-            subprocess.Popen(
-                cmd,
-                preexec_fn=set_user,
-                env=env
-            )
-
-            # TODO: handle events for process
-
-        # TODO: LaunchAsUser is currently NO-OP due to all sandboxing logic being handled here.
-        return LoadRunAsNodes()
+        """
+        Apply the policy and run each node as the policy's user.
+
+        The nodes are started once the returned LoadRunAsNodes Action is executed. Their output is
+        forwarded to a logger per node.
+        """
+        from launch_ros_sandbox.actions.load_runas_nodes import LoadRunAsNodes
+
+        return LoadRunAsNodes(
+            policy=self,
+            node_descriptions=node_descriptions
+        )
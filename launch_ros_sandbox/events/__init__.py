@@ -0,0 +1,27 @@
+# Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Package for the launch events emitted by launch_ros_sandbox sandboxes."""
+
+from launch_ros_sandbox.events.container import ContainerDied
+from launch_ros_sandbox.events.container import ContainerEvent
+from launch_ros_sandbox.events.container import ContainerKilled
+from launch_ros_sandbox.events.container import ContainerOutOfMemory
+
+__all__ = [
+    'ContainerDied',
+    'ContainerEvent',
+    'ContainerKilled',
+    'ContainerOutOfMemory',
+]
@@ -0,0 +1,120 @@
+# Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Module for the events about the Docker container of a sandbox.
+
+The events are emitted by the action running the sandbox when the Docker daemon reports that its
+container was killed, ran out of memory or exited. Event handlers can match them by type, and by
+'action' to react to a single sandbox.
+"""
+
+from typing import Optional
+
+from launch import Action
+from launch.event import Event
+
+
+class ContainerEvent(Event):
+    """Base class of the events about the Docker container of a sandbox."""
+
+    name = 'launch_ros_sandbox.events.ContainerEvent'
+
+    def __init__(
+        self,
+        *,
+        action: Action,
+        container_name: str,
+        container_id: str
+    ) -> None:
+        """Construct the event about the container of the sandbox run by 'action'."""
+        super().__init__()
+        self.__action = action
+        self.__container_name = container_name
+        self.__container_id = container_id
+
+    @property
+    def action(self) -> Action:
+        """Get the action running the sandbox."""
+        return self.__action
+
+    @property
+    def container_name(self) -> str:
+        """Get the name of the container."""
+        return self.__container_name
+
+    @property
+    def container_id(self) -> str:
+        """Get the ID of the container."""
+        return self.__container_id
+
+
+class ContainerKilled(ContainerEvent):
+    """Event emitted when a signal is sent to the container by the Docker daemon."""
+
+    name = 'launch_ros_sandbox.events.ContainerKilled'
+
+    def __init__(
+        self,
+        *,
+        signal: Optional[int],
+        **kwargs
+    ) -> None:
+        """Construct the event, where 'signal' is the number of the signal sent."""
+        super().__init__(**kwargs)
+        self.__signal = signal
+
+    @property
+    def signal(self) -> Optional[int]:
+        """Get the number of the signal sent to the container, if it is known."""
+        return self.__signal
+
+
+class ContainerOutOfMemory(ContainerEvent):
+    """Event emitted when a process of the container is killed for running out of memory."""
+
+    name = 'launch_ros_sandbox.events.ContainerOutOfMemory'
+
+
+class ContainerDied(ContainerEvent):
+    """
+    Event emitted when the container exited.
+
+    The reason is 'oom' if the container ran out of memory, 'killed' if it was killed by a signal,
+    and 'exited' otherwise.
+    """
+
+    name = 'launch_ros_sandbox.events.ContainerDied'
+
+    def __init__(
+        self,
+        *,
+        exit_code: Optional[int],
+        reason: str,
+        **kwargs
+    ) -> None:
+        """Construct the event from the exit code of the container and the reason it exited."""
+        super().__init__(**kwargs)
+        self.__exit_code = exit_code
+        self.__reason = reason
+
+    @property
+    def exit_code(self) -> Optional[int]:
+        """Get the exit code of the container, if it is known."""
+        return self.__exit_code
+
+    @property
+    def reason(self) -> str:
+        """Get why the container exited: 'oom', 'killed' or 'exited'."""
+        return self.__reason
@@ -0,0 +1,357 @@
+# Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Module for the warm container broker.
+
+Creating and starting a container is the largest fixed cost of launching a Docker sandbox. The
+broker is a long running local process which keeps a pool of started containers for every
+combination of image and run arguments it has been asked for. LoadDockerNodes claims a container
+from the pool instead of creating one, and releases it on shutdown. Released containers are never
+reused: the broker removes them and starts a fresh container to refill the pool.
+
+The broker listens on a Unix socket. Each connection carries a single request and its response,
+both encoded as one line of JSON:
+
+- {"op": "claim", "image": ..., "run_args": {...}, "policy_hash": ..., "owner_pid": ...,
+  "launch_id": ...} is answered with {"container_id": ...}, where the ID is null if no warm
+  container is available yet. The pool for that image, run arguments and policy hash is filled in
+  the background either way.
+- {"op": "release", "container_id": ...} is answered with {} and recycles the container.
+
+Warm containers are labelled as owned by the broker, and with the hash of the policy they are
+started for. Docker cannot change the labels of a container, so the launch which claimed a
+container is only known to the broker, which also recycles claimed containers whose claiming
+process exited without releasing them.
+
+Without XDG_RUNTIME_DIR, the socket falls back to a directory in /tmp, which any user could have
+created first, to listen in place of the broker. Neither the broker nor its clients use that
+directory unless it belongs to the current user.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import socket
+import stat
+import time
+from typing import Any
+from typing import Dict
+from typing import Optional
+
+import docker
+from docker.errors import APIError
+
+import launch
+
+from launch_ros_sandbox.utilities.labels import LAUNCH_ID_LABEL
+from launch_ros_sandbox.utilities.labels import owner_is_alive
+from launch_ros_sandbox.utilities.labels import owner_labels
+from launch_ros_sandbox.utilities.labels import OWNER_PID_LABEL
+from launch_ros_sandbox.utilities.labels import POLICY_HASH_LABEL
+
+BROKER_SOCKET_ENV = 'LAUNCH_ROS_SANDBOX_BROKER_SOCKET'
+BROKER_LABEL = 'launch_ros_sandbox.broker'
+
+_DEFAULT_POOL_SIZE = 1
+_CLIENT_TIMEOUT = 2.0
+# Number of seconds between two checks for claimed containers whose owner is gone.
+_REAP_PERIOD = 5.0
+
+
+def _fallback_runtime_directory() -> str:
+    """Return the runtime directory used if XDG_RUNTIME_DIR is not set."""
+    return '/tmp/launch_ros_sandbox-{}'.format(os.getuid())
+
+
+def default_broker_socket() -> str:
+    """Return the path of the broker socket, which can be overridden by the environment."""
+    if os.environ.get(BROKER_SOCKET_ENV):
+        return os.environ[BROKER_SOCKET_ENV]
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR') or _fallback_runtime_directory()
+    return os.path.join(runtime_dir, 'launch_ros_sandbox', 'broker.sock')
+
+
+def _check_socket_directory(socket_path: str) -> None:
+    """
+    Check that the fallback runtime directory of a socket in it belongs to the current user.
+
+    :raises PermissionError if the directory is a symbolic link, or belongs to another user
+    """
+    directory = _fallback_runtime_directory()
+    if not socket_path.startswith(directory + os.sep):
+        return
+    try:
+        status = os.lstat(directory)
+    except FileNotFoundError:
+        return
+    if not stat.S_ISDIR(status.st_mode) or status.st_uid != os.getuid():
+        raise PermissionError('"{}" is not a directory of the current user'.format(directory))
+
+
+def pool_key(
+    image_name: str,
+    run_args: Optional[Dict[str, Any]],
+    policy_hash: Optional[str] = None
+) -> str:
+    """
+    Return the key of the pool holding containers for an image, its run arguments and policy.
+
+    :raises TypeError if the run arguments cannot be encoded as JSON
+    """
+    key = json.dumps({'image': image_name, 'run_args': run_args or {}, 'policy': policy_hash},
+                     sort_keys=True)
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+
+class BrokerClient:
+    """BrokerClient sends requests to the warm container broker. All methods are blocking."""
+
+    def __init__(
+        self,
+        socket_path: Optional[str] = None,
+        *,
+        timeout: float = _CLIENT_TIMEOUT
+    ) -> None:
+        """Construct the BrokerClient for the broker listening on 'socket_path'."""
+        self._socket_path = socket_path or default_broker_socket()
+        self._timeout = timeout
+
+    def _request(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Send a request and return its response.
+
+        :raises OSError if the broker cannot be reached, or its socket is not safe to use
+        :raises ValueError if the broker sent a malformed response
+        """
+        _check_socket_directory(self._socket_path)
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(self._timeout)
+            sock.connect(self._socket_path)
+            sock.sendall(json.dumps(request).encode('utf-8') + b'\n')
+            with sock.makefile('rb') as response:
+                return json.loads(response.readline().decode('utf-8'))
+
+    def claim(
+        self,
+        image_name: str,
+        run_args: Optional[Dict[str, Any]],
+        *,
+        policy_hash: Optional[str] = None,
+        owner_pid: Optional[int] = None,
+        launch_id: Optional[str] = None
+    ) -> Optional[str]:
+        """
+        Claim a started container for the image and run arguments, if one is available.
+
+        The container is labelled with 'policy_hash', and claimed for the launch 'launch_id' of
+        the process 'owner_pid'.
+        """
+        response = self._request({
+            'op': 'claim',
+            'image': image_name,
+            'run_args': run_args or {},
+            'policy_hash': policy_hash,
+            'owner_pid': owner_pid,
+            'launch_id': launch_id,
+        })
+        return response.get('container_id')
+
+    def release(self, container_id: str) -> None:
+        """Hand a claimed container back to the broker."""
+        self._request({'op': 'release', 'container_id': container_id})
+
+
+class ContainerBroker:
+    """ContainerBroker keeps pools of started containers and hands them out over a Unix socket."""
+
+    def __init__(
+        self,
+        *,
+        socket_path: Optional[str] = None,
+        pool_size: int = _DEFAULT_POOL_SIZE
+    ) -> None:
+        """
+        Construct the ContainerBroker.
+
+        :param: socket_path is the Unix socket to listen on. Defaults to 'default_broker_socket()'.
+        :param: pool_size is the number of started containers kept for every image and run
+        arguments. Defaults to 1.
+        """
+        self._socket_path = socket_path or default_broker_socket()
+        self._pool_size = pool_size
+        self._docker_client = docker.from_env()
+        self._pools = {}  # type: Dict[str, list]
+        self._pool_configs = {}  # type: Dict[str, Dict[str, Any]]
+        self._filling = {}  # type: Dict[str, asyncio.Task]
+        # Maps each claimed container ID to the owner labels of the process that claimed it, and
+        # the ID of its launch.
+        self._claimed = {}  # type: Dict[str, Dict[str, str]]
+        self._counter = 0
+        self.__logger = launch.logging.get_logger(__name__)
+
+    def _run_container(self, config: Dict[str, Any]) -> str:
+        """Create and start a warm container. Blocking."""
+        self._counter += 1
+        run_args = dict(config['run_args'])
+        # The labels set by the run arguments are kept, next to the labels of the broker.
+        labels = dict(run_args.pop('labels', None) or {})
+        labels.update(owner_labels())
+        labels[BROKER_LABEL] = str(os.getpid())
+        if config['policy_hash'] is not None:
+            labels[POLICY_HASH_LABEL] = config['policy_hash']
+        container = self._docker_client.containers.run(
+            config['image'],
+            detach=True,
+            auto_remove=True,
+            tty=True,
+            name='ros2launch-sandbox-warm-{}-{}-{}'.format(
+                os.getpid(), time.strftime('%H%M%S'), self._counter),
+            labels=labels,
+            **run_args
+        )
+        return container.id
+
+    def _is_running(self, container_id: str) -> bool:
+        """Return True if the container is still running. Blocking."""
+        try:
+            return self._docker_client.containers.get(container_id).status == 'running'
+        except APIError:
+            return False
+
+    def _remove_container(self, container_id: str) -> None:
+        """Kill a container, which is removed automatically once it stops. Blocking."""
+        try:
+            self._docker_client.containers.get(container_id).kill()
+        except APIError as ex:
+            self.__logger.debug('Unable to kill container "{}": {}'.format(container_id, ex))
+
+    async def _fill_pool(self, key: str) -> None:
+        """Start containers until the pool for 'key' is full."""
+        loop = asyncio.get_event_loop()
+        pool = self._pools.setdefault(key, [])
+        while len(pool) < self._pool_size:
+            try:
+                container_id = await loop.run_in_executor(
+                    None, self._run_container, self._pool_configs[key])
+            except (APIError, TypeError, ValueError) as ex:
+                # Invalid run arguments raise TypeError or ValueError.
+                self.__logger.error('Unable to start a warm container for "{}": {}'
+                                    .format(self._pool_configs[key]['image'], ex))
+                return
+            pool.append(container_id)
+            self.__logger.info('Warm container "{}" ready for "{}"'
+                               .format(container_id[:12], self._pool_configs[key]['image']))
+
+    def _schedule_fill(self, key: str) -> None:
+        """Fill the pool for 'key' in the background unless it is already being filled."""
+        if key not in self._filling or self._filling[key].done():
+            self._filling[key] = asyncio.ensure_future(self._fill_pool(key))
+
+    async def _claim(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Hand out a warm container and schedule its replacement."""
+        loop = asyncio.get_event_loop()
+        config = {
+            'image': request['image'],
+            'run_args': request.get('run_args') or {},
+            'policy_hash': request.get('policy_hash'),
+        }
+        key = pool_key(config['image'], config['run_args'], config['policy_hash'])
+        self._pool_configs[key] = config
+
+        pool = self._pools.setdefault(key, [])
+        container_id = None
+        while pool:
+            candidate = pool.pop(0)
+            if await loop.run_in_executor(None, self._is_running, candidate):
+                container_id = candidate
+                break
+
+        if container_id is not None and request.get('owner_pid') is not None:
+            labels = owner_labels(int(request['owner_pid']))
+            if request.get('launch_id') is not None:
+                labels[LAUNCH_ID_LABEL] = request['launch_id']
+            self._claimed[container_id] = labels
+
+        self._schedule_fill(key)
+        return {'container_id': container_id}
+
+    async def _release(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Recycle a released container in the background."""
+        loop = asyncio.get_event_loop()
+        self._claimed.pop(request['container_id'], None)
+        loop.run_in_executor(None, self._remove_container, request['container_id'])
+        return {}
+
+    async def _reap_orphans(self) -> None:
+        """Periodically recycle claimed containers whose claiming process is gone."""
+        loop = asyncio.get_event_loop()
+        while True:
+            await asyncio.sleep(_REAP_PERIOD)
+            for container_id, labels in list(self._claimed.items()):
+                if not owner_is_alive(labels):
+                    self.__logger.info('Recycling container "{}" of exited process {} (launch {})'
+                                       .format(container_id[:12], labels.get(OWNER_PID_LABEL),
+                                               labels.get(LAUNCH_ID_LABEL, '?')[:12]))
+                    del self._claimed[container_id]
+                    loop.run_in_executor(None, self._remove_container, container_id)
+
+    async def _handle_connection(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter
+    ) -> None:
+        """Serve a single request."""
+        try:
+            request = json.loads((await reader.readline()).decode('utf-8'))
+            if request.get('op') == 'claim':
+                response = await self._claim(request)
+            elif request.get('op') == 'release':
+                response = await self._release(request)
+            else:
+                response = {'error': 'Unknown operation "{}"'.format(request.get('op'))}
+        except (ValueError, KeyError, AttributeError) as ex:
+            response = {'error': 'Malformed request: {}'.format(ex)}
+
+        writer.write(json.dumps(response).encode('utf-8') + b'\n')
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def serve(self) -> None:
+        """Serve requests until cancelled, then remove every warm container."""
+        os.makedirs(os.path.dirname(self._socket_path), mode=0o700, exist_ok=True)
+        _check_socket_directory(self._socket_path)
+        if os.path.exists(self._socket_path):
+            os.remove(self._socket_path)
+
+        server = await asyncio.start_unix_server(self._handle_connection, path=self._socket_path)
+        self.__logger.info('Container broker listening on "{}"'.format(self._socket_path))
+        reaper = asyncio.ensure_future(self._reap_orphans())
+        try:
+            await asyncio.Event().wait()
+        finally:
+            reaper.cancel()
+            server.close()
+            for task in self._filling.values():
+                task.cancel()
+            await asyncio.gather(reaper, *self._filling.values(), return_exceptions=True)
+            for pool in self._pools.values():
+                for container_id in pool:
+                    self._remove_container(container_id)
+            if os.path.exists(self._socket_path):
+                os.remove(self._socket_path)
+            self._docker_client.close()
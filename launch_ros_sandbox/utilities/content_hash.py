@@ -0,0 +1,143 @@
+# Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Module for content hashing with a persistent cache.
+
+Hashing large files, such as multi-gigabyte image archives, costs as much disk I/O as reading them.
+FileHashCache remembers the hash of each file together with its size, modification time and inode
+so an unchanged file is never read twice. The cache is stored as JSON in the user's cache
+directory and is shared by every launch.
+"""
+
+import hashlib
+import json
+import os
+import stat
+from typing import Dict
+from typing import Optional
+import uuid
+
+_HASH_CHUNK_SIZE = 1 << 20
+
+
+def cache_directory() -> str:
+    """Return the directory launch_ros_sandbox keeps its caches in."""
+    cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.join(
+        os.path.expanduser('~'), '.cache')
+    return os.path.join(cache_home, 'launch_ros_sandbox')
+
+
+def load_json_cache(path: str) -> Dict:
+    """Load a JSON cache file, returning an empty cache if it is missing or unreadable."""
+    try:
+        with open(path, 'r') as cache_file:
+            content = json.load(cache_file)
+    except (OSError, ValueError):
+        return {}
+    return content if isinstance(content, dict) else {}
+
+
+def save_json_cache(path: str, content: Dict) -> None:
+    """Atomically write a JSON cache file, creating its directory if needed."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Every writer, even in the same process, writes a temporary file of its own.
+    tmp_path = '{}.{}.tmp'.format(path, uuid.uuid4().hex)
+    try:
+        with open(tmp_path, 'w') as cache_file:
+            json.dump(content, cache_file, sort_keys=True)
+        os.replace(tmp_path, path)
+    except OSError:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _stat_signature(stat_result: os.stat_result) -> list:
+    """Return the stat fields that change whenever the content of a file is replaced."""
+    return [stat_result.st_size, stat_result.st_mtime_ns, stat_result.st_ino]
+
+
+def hash_file_content(path: str) -> str:
+    """Return the SHA-256 hex digest of a file, read in chunks to bound memory use."""
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as content:
+        for chunk in iter(lambda: content.read(_HASH_CHUNK_SIZE), b''):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+class FileHashCache:
+    """FileHashCache memoizes file content hashes by the file's stat signature."""
+
+    def __init__(
+        self,
+        path: Optional[str] = None
+    ) -> None:
+        """
+        Construct the FileHashCache.
+
+        :param: path is the JSON file the cache is persisted to. Defaults to 'file_hashes.json' in
+        the launch_ros_sandbox cache directory.
+        """
+        self._path = path or os.path.join(cache_directory(), 'file_hashes.json')
+        self._entries = load_json_cache(self._path)
+        self._dirty = False
+
+    def hash_file(self, file_path: str) -> str:
+        """Return the SHA-256 hex digest of a file, reading it only if it changed."""
+        file_path = os.path.abspath(file_path)
+        signature = _stat_signature(os.stat(file_path))
+
+        entry = self._entries.get(file_path)
+        if entry is not None and entry.get('stat') == signature:
+            return entry['sha256']
+
+        digest = hash_file_content(file_path)
+        self._entries[file_path] = {'stat': signature, 'sha256': digest}
+        self._dirty = True
+        return digest
+
+    def save(self) -> None:
+        """Persist the cache if any hash was added or updated."""
+        if self._dirty:
+            save_json_cache(self._path, self._entries)
+            self._dirty = False
+
+    def hash_tree(self, root: str) -> str:
+        """
+        Return a SHA-256 hex digest of a directory tree.
+
+        The digest covers the relative path, type, executable bit and content of every entry, so
+        it changes whenever the tree would produce a different copy. Only files that changed are
+        read.
+        """
+        sha256 = hashlib.sha256()
+        for dir_path, dir_names, file_names in os.walk(root):
+            dir_names.sort()
+            for name in sorted(dir_names + file_names):
+                path = os.path.join(dir_path, name)
+                sha256.update(os.path.relpath(path, root).encode('utf-8', 'surrogateescape'))
+                mode = os.lstat(path).st_mode
+                if stat.S_ISLNK(mode):
+                    sha256.update(b'\0l' + os.readlink(path).encode('utf-8', 'surrogateescape'))
+                elif stat.S_ISDIR(mode):
+                    sha256.update(b'\0d')
+                else:
+                    executable = b'x' if mode & stat.S_IXUSR else b'-'
+                    sha256.update(b'\0f' + executable + self.hash_file(path).encode('ascii'))
+                sha256.update(b'\n')
+        return sha256.hexdigest()
@@ -0,0 +1,98 @@
+# Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Module for derived sandbox images.
+
+A DockerPolicy can declare setup commands and a workspace overlay which are baked into an image
+derived from the policy's image. The derived image is content addressed: its tag is a hash of the
+base image ID, the setup commands and the overlay content, so it only has to be built again when
+one of those changes.
+"""
+
+import hashlib
+import io
+import json
+import tarfile
+import tempfile
+from typing import IO
+from typing import List
+from typing import Optional
+
+DERIVED_IMAGE_REPOSITORY = 'launch_ros_sandbox/derived'
+OVERLAY_CONTAINER_PATH = '/opt/launch_ros_sandbox/overlay'
+
+_DOCKERFILE = 'Dockerfile'
+_OVERLAY_CONTEXT_PATH = 'overlay'
+
+
+def derived_image_name(
+    base_image_id: str,
+    setup_commands: List[str],
+    overlay_hash: Optional[str]
+) -> str:
+    """Return the content addressed name of the image derived from the given inputs."""
+    key = json.dumps(
+        {
+            'base': base_image_id,
+            'setup_commands': setup_commands,
+            'overlay': overlay_hash,
+        },
+        sort_keys=True
+    )
+    return '{}:{}'.format(
+        DERIVED_IMAGE_REPOSITORY, hashlib.sha256(key.encode('utf-8')).hexdigest()[:32])
+
+
+def derived_dockerfile(
+    base_image_id: str,
+    setup_commands: List[str],
+    with_overlay: bool
+) -> str:
+    """
+    Return the Dockerfile building the derived image.
+
+    Setup commands run before the overlay is copied so Docker's layer cache can reuse them when
+    only the overlay changes. Each command is passed to the shell in the exec form of RUN, so a
+    newline in a command cannot start another Dockerfile instruction.
+    """
+    lines = ['FROM {}'.format(base_image_id)]
+    lines += [
+        'RUN {}'.format(json.dumps(['/bin/sh', '-c', command])) for command in setup_commands
+    ]
+    if with_overlay:
+        lines.append('COPY {} {}'.format(_OVERLAY_CONTEXT_PATH, OVERLAY_CONTAINER_PATH))
+    return '\n'.join(lines) + '\n'
+
+
+def create_build_context(
+    dockerfile: str,
+    overlay: Optional[str]
+) -> IO[bytes]:
+    """
+    Create the build context of the derived image as a tar archive.
+
+    The archive is spooled to disk if it grows large, so big overlays do not have to fit in memory.
+    The returned file is positioned at its start.
+    """
+    context = tempfile.SpooledTemporaryFile(max_size=1 << 24)
+    with tarfile.open(fileobj=context, mode='w') as tar:
+        dockerfile_content = dockerfile.encode('utf-8')
+        info = tarfile.TarInfo(_DOCKERFILE)
+        info.size = len(dockerfile_content)
+        tar.addfile(info, io.BytesIO(dockerfile_content))
+        if overlay is not None:
+            tar.add(overlay, arcname=_OVERLAY_CONTEXT_PATH)
+    context.seek(0)
+    return context
@@ -0,0 +1,146 @@
+# Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Module for the Docker client shared by all sandboxes of a process.
+
+Every sandbox leases the same client, so all of them share one environment and TLS setup and one
+pool of connections to the Docker daemon. The client is closed once the last lease is released.
+"""
+
+import os
+from threading import Lock
+from typing import Any, Callable, Iterator, Optional
+
+import docker
+
+# Environment variable setting the number of connections kept open to the Docker daemon.
+DOCKER_POOL_SIZE_ENV = 'LAUNCH_ROS_SANDBOX_DOCKER_POOL_SIZE'
+
+# Streamed node output holds a connection for as long as the node runs, so the pool has to be
+# considerably larger than docker-py's default of 10.
+_DEFAULT_POOL_SIZE = 64
+
+_lock = Lock()
+_client = None  # type: Optional[docker.DockerClient]
+_lease_count = 0
+
+
+def docker_pool_size() -> int:
+    """
+    Return the number of connections the shared client keeps open to the Docker daemon.
+
+    The size is read from LAUNCH_ROS_SANDBOX_DOCKER_POOL_SIZE and defaults to 64.
+
+    :raises ValueError if the environment variable is not a positive integer
+    """
+    value = os.environ.get(DOCKER_POOL_SIZE_ENV)
+    if value is None:
+        return _DEFAULT_POOL_SIZE
+
+    size = int(value)
+    if size < 1:
+        raise ValueError('{} must be a positive integer, got {}'
+                         .format(DOCKER_POOL_SIZE_ENV, value))
+    return size
+
+
+def _connection_pools(client: docker.DockerClient) -> Iterator[Any]:
+    """Yield the urllib3 connection pools of every transport adapter of 'client'."""
+    for adapter in client.api.adapters.values():
+        pools = getattr(adapter, 'pools', None)
+        if pools is None:
+            pool_manager = getattr(adapter, 'poolmanager', None)
+            pools = getattr(pool_manager, 'pools', None)
+        if pools is None:
+            continue
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is not None:
+                yield pool
+
+
+def connections_in_use(client: Optional[docker.DockerClient] = None) -> int:
+    """
+    Return the number of connections of 'client' currently serving a request.
+
+    Defaults to the shared client, and to 0 if it has not been created.
+    """
+    if client is None:
+        client = _client
+    if client is None:
+        return 0
+
+    in_use = 0
+    for pool in _connection_pools(client):
+        # Idle connections and unused slots are both kept in the pool's queue.
+        in_use += max(pool.pool.maxsize - pool.pool.qsize(), 0)
+    return in_use
+
+
+class DockerClientLease:
+    """A hold on the shared Docker client, which is kept open until every lease is released."""
+
+    def __init__(
+        self,
+        client: docker.DockerClient,
+        release: Callable[[], None]
+    ) -> None:
+        """Construct the lease of 'client'; 'release' is called once when it is released."""
+        self._client = client
+        self._release = release
+        self._released = False
+
+    @property
+    def client(self) -> docker.DockerClient:
+        """Getter for client."""
+        return self._client
+
+    @property
+    def released(self) -> bool:
+        """Getter for released."""
+        return self._released
+
+    def release(self) -> None:
+        """Release the lease; releasing it again has no effect."""
+        if not self._released:
+            self._released = True
+            self._release()
+
+
+def lease_docker_client() -> DockerClientLease:
+    """
+    Lease the Docker client shared by all sandboxes of this process.
+
+    The client is created from the environment on the first lease, with a connection pool sized by
+    docker_pool_size().
+    """
+    global _client, _lease_count
+
+    with _lock:
+        if _client is None:
+            _client = docker.from_env(max_pool_size=docker_pool_size())
+        _lease_count += 1
+        return DockerClientLease(_client, _release_docker_client)
+
+
+def _release_docker_client() -> None:
+    """Drop one lease of the shared client, and close the client with the last one."""
+    global _client, _lease_count
+
+    with _lock:
+        _lease_count -= 1
+        if _lease_count == 0 and _client is not None:
+            _client.close()
+            _client = None
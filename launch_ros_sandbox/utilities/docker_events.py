@@ -0,0 +1,199 @@
+# Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Module for the Docker events of all sandbox containers of a process.
+
+Every sandbox leases the same watcher, which holds a single subscription to the Docker events API,
+filtered by the sandbox label, and reads it with a single thread. Each event is passed to the
+sandbox watching its container on the sandbox's event loop, so no sandbox needs a thread or a poll
+of its own to learn that its container exited. The subscription is closed once the last lease is
+released.
+
+A container may exit before its sandbox watches it. The subscription starts when the watcher is
+created and the latest events of unwatched containers are kept, so a sandbox leasing the watcher
+before it starts its container never misses an event.
+"""
+
+import asyncio
+import collections
+from threading import Lock
+from threading import Thread
+import time
+from typing import Any, Callable, Dict, Optional
+
+from docker.errors import APIError
+import launch
+
+from launch_ros_sandbox.utilities.docker_client import DockerClientLease
+from launch_ros_sandbox.utilities.docker_client import lease_docker_client
+from launch_ros_sandbox.utilities.labels import SANDBOX_LABEL
+
+# Events of a container the watcher subscribes to.
+WATCHED_EVENTS = ('die', 'kill', 'oom')
+
+# Number of events of containers nobody watches yet which are kept.
+_RECENT_EVENT_COUNT = 256
+
+_lock = Lock()
+_watcher = None  # type: Optional[DockerEventWatcher]
+_lease_count = 0
+
+
+def container_id(event: Dict[str, Any]) -> Optional[str]:
+    """Return the ID of the container an event is about."""
+    return event.get('id') or event.get('Actor', {}).get('ID')
+
+
+class DockerEventWatcher:
+    """Read the Docker events of all sandbox containers and pass each to its sandbox."""
+
+    def __init__(self, client_lease: DockerClientLease) -> None:
+        """Construct the watcher and subscribe to the events from now on."""
+        self.__logger = launch.logging.get_logger(__name__)
+        self._client_lease = client_lease
+        # Seconds are enough, since events of unwatched containers are kept anyway.
+        self._since = int(time.time())
+        self._lock = Lock()
+        # Maps the ID of each watched container to its event loop and callback.
+        self._watches = {}  # type: dict
+        self._recent = collections.deque(maxlen=_RECENT_EVENT_COUNT)  # type: collections.deque
+        self._stream = None  # type: Any
+        self._closed = False
+        self._thread = Thread(target=self._run, name='docker-events', daemon=True)
+        self._thread.start()
+
+    def watch(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        container: str,
+        callback: Callable[[Dict[str, Any]], Any]
+    ) -> None:
+        """Call 'callback' on 'loop' with each event of the container with the ID 'container'."""
+        with self._lock:
+            self._watches[container] = (loop, callback)
+            missed = [event for event in self._recent if container_id(event) == container]
+        for event in missed:
+            loop.call_soon_threadsafe(callback, event)
+
+    def unwatch(self, container: str) -> None:
+        """Stop passing on the events of the container with the ID 'container'."""
+        with self._lock:
+            self._watches.pop(container, None)
+
+    def close(self) -> None:
+        """Close the subscription."""
+        with self._lock:
+            self._closed = True
+            stream = self._stream
+        if stream is not None:
+            stream.close()
+        self._client_lease.release()
+
+    def _run(self) -> None:
+        try:
+            stream = self._client_lease.client.api.events(
+                since=self._since,
+                filters={
+                    'type': 'container',
+                    'label': '{}=true'.format(SANDBOX_LABEL),
+                    'event': list(WATCHED_EVENTS),
+                },
+                decode=True)
+            with self._lock:
+                if self._closed:
+                    stream.close()
+                    return
+                self._stream = stream
+
+            for event in stream:
+                self._dispatch(event)
+        except (APIError, OSError, ValueError) as ex:
+            # The stream fails when it is closed while it is read.
+            if not self._closed:
+                self.__logger.warning('Docker events stream failed: {}'.format(ex))
+
+    def _dispatch(self, event: Dict[str, Any]) -> None:
+        with self._lock:
+            watch = self._watches.get(container_id(event))
+            if watch is None:
+                self._recent.append(event)
+                return
+        loop, callback = watch
+        loop.call_soon_threadsafe(callback, event)
+
+
+class DockerEventLease:
+    """A hold on the shared DockerEventWatcher, which is kept until every lease is released."""
+
+    def __init__(
+        self,
+        watcher: DockerEventWatcher,
+        release: Callable[[], None]
+    ) -> None:
+        """Construct the lease of 'watcher'; 'release' is called once when it is released."""
+        self._watcher = watcher
+        self._release = release
+        self._released = False
+        self._containers = set()  # type: set
+
+    @property
+    def released(self) -> bool:
+        """Getter for released."""
+        return self._released
+
+    def watch(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        container: str,
+        callback: Callable[[Dict[str, Any]], Any]
+    ) -> None:
+        """Call 'callback' on 'loop' with each event of the container until the release."""
+        self._containers.add(container)
+        self._watcher.watch(loop, container, callback)
+
+    def release(self) -> None:
+        """Stop watching the containers and release the lease; releasing it again has no effect."""
+        if self._released:
+            return
+        self._released = True
+        for container in self._containers:
+            self._watcher.unwatch(container)
+        self._release()
+
+
+def lease_docker_events() -> DockerEventLease:
+    """
+    Lease the watcher of the Docker events shared by all sandboxes of this process.
+
+    The watcher subscribes to the events on the first lease, with a lease of the shared client.
+    """
+    global _watcher, _lease_count
+
+    with _lock:
+        if _watcher is None:
+            _watcher = DockerEventWatcher(lease_docker_client())
+        _lease_count += 1
+        return DockerEventLease(_watcher, _release_docker_events)
+
+
+def _release_docker_events() -> None:
+    """Drop one lease of the watcher, and close the watcher with the last one."""
+    global _watcher, _lease_count
+
+    with _lock:
+        _lease_count -= 1
+        if _lease_count == 0 and _watcher is not None:
+            _watcher.close()
+            _watcher = None
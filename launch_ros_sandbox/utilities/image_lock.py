@@ -0,0 +1,156 @@
+# Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Module for the Docker image lockfile.
+
+The lockfile pins each Docker image used by a DockerPolicy to the content digest it resolved to
+when the lockfile was generated. When a DockerPolicy is given a lockfile, LoadDockerNodes runs the
+pinned digest straight from the local image store and never asks the registry what the tag
+currently points to. This makes launches reproducible and lets them start without network access.
+
+The lockfile is a JSON document of the form:
+
+.. code-block:: json
+
+    {
+        "version": 1,
+        "images": {
+            "osrf/ros:dashing-desktop": {
+                "digest": "sha256:...",
+                "id": "sha256:..."
+            }
+        }
+    }
+
+'digest' is the registry content digest of the image and 'id' is the ID of the image in the local
+image store. 'digest' is omitted for images that were never pushed to or pulled from a registry;
+those are pinned by their ID instead.
+"""
+
+import json
+import os
+from typing import Dict
+from typing import Optional
+from typing import Tuple
+
+import docker
+from docker.utils import parse_repository_tag
+
+LOCKFILE_VERSION = 1
+
+
+class ImageLock:
+    """ImageLock maps Docker image names to the content they are pinned to."""
+
+    def __init__(
+        self,
+        images: Optional[Dict[str, Dict[str, str]]] = None
+    ) -> None:
+        """Construct the ImageLock from a mapping of image names to their pinned content."""
+        self._images = dict(images or {})
+
+    @classmethod
+    def load(cls, path: str) -> 'ImageLock':
+        """
+        Load an ImageLock from a lockfile.
+
+        :raises OSError if the lockfile cannot be read
+        :raises ValueError if the lockfile is malformed or of an unsupported version
+        """
+        with open(path, 'r') as lockfile:
+            content = json.load(lockfile)
+
+        if not isinstance(content, dict) or content.get('version') != LOCKFILE_VERSION:
+            raise ValueError('Unsupported image lockfile "{}"; expected version {}'.format(
+                path, LOCKFILE_VERSION))
+
+        return cls(images=content.get('images', {}))
+
+    def save(self, path: str) -> None:
+        """
+        Write the ImageLock to a lockfile.
+
+        The lockfile is replaced atomically so a concurrent launch never reads a partial file.
+        """
+        tmp_path = '{}.tmp'.format(path)
+        with open(tmp_path, 'w') as lockfile:
+            json.dump(
+                {'version': LOCKFILE_VERSION, 'images': self._images},
+                lockfile,
+                indent=4,
+                sort_keys=True
+            )
+            lockfile.write('\n')
+        os.replace(tmp_path, path)
+
+    @property
+    def images(self) -> Dict[str, Dict[str, str]]:
+        """Return the mapping of image names to their pinned content."""
+        return self._images
+
+    def pin(
+        self,
+        image_name: str,
+        *,
+        image_id: str,
+        digest: Optional[str] = None
+    ) -> None:
+        """Pin 'image_name' to the given image ID and registry digest."""
+        entry = {'id': image_id}
+        if digest is not None:
+            entry['digest'] = digest
+        self._images[image_name] = entry
+
+    def pinned_reference(self, image_name: str) -> Optional[str]:
+        """
+        Return the reference to run in place of 'image_name', or None if it is not pinned.
+
+        Images with a registry digest resolve to 'repository@digest', which also allows pulling
+        exactly the pinned content if it is missing locally. Other images resolve to their ID.
+        """
+        entry = self._images.get(image_name)
+        if entry is None:
+            return None
+
+        digest = entry.get('digest')
+        if digest is not None:
+            repository, _ = parse_repository_tag(image_name)
+            return '{}@{}'.format(repository, digest)
+
+        return entry.get('id')
+
+
+def resolve_image(
+    docker_client: docker.DockerClient,
+    image_name: str
+) -> Tuple[str, Optional[str]]:
+    """
+    Resolve a local Docker image to its ID and registry digest.
+
+    :returns a tuple of the image ID and the registry digest, which is None if the image has no
+    digest for its repository
+    :raises ImageNotFound if the image is not in the local image store
+    """
+    image = docker_client.images.get(image_name)
+    repository, _ = parse_repository_tag(image_name)
+
+    digest = None
+    for repo_digest in image.attrs.get('RepoDigests') or []:
+        digest_repository, _, repo_digest_value = repo_digest.partition('@')
+        if digest_repository == repository:
+            digest = repo_digest_value
+            break
+
+    return image.id, digest
@@ -0,0 +1,174 @@
+# Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Module for the Docker labels of sandbox containers.
+
+LoadDockerNodes labels the containers it creates so they can be found again by their labels rather
+than by their name. Every sandbox container records the process owning it, which allows finding
+and removing the containers leaked by a launch process that was killed.
+"""
+
+import fcntl
+import hashlib
+import json
+import os
+import socket
+from typing import Any
+from typing import Dict
+from typing import IO
+from typing import List
+from typing import Mapping
+from typing import Optional
+import uuid
+
+from launch_ros_sandbox.utilities.content_hash import cache_directory
+
+LABEL_PREFIX = 'launch_ros_sandbox'
+
+# Set on every sandbox container, to list them with a single label filter.
+SANDBOX_LABEL = '{}.sandbox'.format(LABEL_PREFIX)
+# Host, PID and start time of the process owning the container.
+OWNER_HOST_LABEL = '{}.owner_host'.format(LABEL_PREFIX)
+OWNER_PID_LABEL = '{}.owner_pid'.format(LABEL_PREFIX)
+OWNER_START_LABEL = '{}.owner_start'.format(LABEL_PREFIX)
+# ID shared by every sandbox started by the same launch process.
+LAUNCH_ID_LABEL = '{}.launch_id'.format(LABEL_PREFIX)
+# Hash of the DockerPolicy configuration the container was created for.
+POLICY_HASH_LABEL = '{}.policy_hash'.format(LABEL_PREFIX)
+# Set on containers which are meant to outlive their owner to be reattached to.
+REATTACH_LABEL = '{}.reattach'.format(LABEL_PREFIX)
+# Fingerprint of the launch configuration of the sandbox, used to find a container to reattach to.
+FINGERPRINT_LABEL = '{}.fingerprint'.format(LABEL_PREFIX)
+
+_LAUNCH_ID = uuid.uuid4().hex
+
+
+def sandbox_filters() -> Dict[str, Any]:
+    """Return the Docker filters listing every sandbox container."""
+    return {'label': '{}=true'.format(SANDBOX_LABEL)}
+
+
+def launch_id() -> str:
+    """Return the ID of the current launch process."""
+    return _LAUNCH_ID
+
+
+def process_start_time(pid: int) -> Optional[str]:
+    """
+    Return the start time of a process, or None if it is unknown.
+
+    Together with the PID, the start time identifies a process even after its PID is reused. It is
+    read from procfs and is therefore only known on Linux.
+    """
+    try:
+        with open('/proc/{}/stat'.format(pid), 'r') as stat_file:
+            stat = stat_file.read()
+    except OSError:
+        return None
+    # The command name may contain spaces, so split the fields after its closing parenthesis.
+    return stat[stat.rindex(')') + 2:].split()[19]
+
+
+def owner_labels(pid: Optional[int] = None) -> Dict[str, str]:
+    """Return the labels recording a process, by default the current one, as owner."""
+    pid = pid or os.getpid()
+    labels = {
+        SANDBOX_LABEL: 'true',
+        OWNER_HOST_LABEL: socket.gethostname(),
+        OWNER_PID_LABEL: str(pid),
+    }
+    start_time = process_start_time(pid)
+    if start_time is not None:
+        labels[OWNER_START_LABEL] = start_time
+    return labels
+
+
+def owner_is_alive(labels: Mapping[str, str]) -> bool:
+    """
+    Return True unless the process owning a container is known to be gone.
+
+    Containers owned by another host, or without an owner, are always considered alive.
+    """
+    if labels.get(OWNER_HOST_LABEL) != socket.gethostname():
+        return True
+    try:
+        pid = int(labels[OWNER_PID_LABEL])
+    except (KeyError, ValueError):
+        return True
+
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass  # The process exists but belongs to another user
+
+    start_time = labels.get(OWNER_START_LABEL)
+    return start_time is None or process_start_time(pid) in (None, start_time)
+
+
+def policy_hash(configuration: Dict[str, Any]) -> str:
+    """Return a short hash of a policy configuration."""
+    content = json.dumps(configuration, sort_keys=True, default=repr)
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()[:16]
+
+
+def launch_fingerprint(
+    *,
+    policy_hash: str,
+    image_id: Optional[str],
+    node_cmds: List[List[str]]
+) -> str:
+    """
+    Return the fingerprint of a sandbox's launch configuration.
+
+    Two launches with the same fingerprint run the same nodes the same way from the same image, so
+    the container of one can be taken over by the other. 'image_id' is the ID of the image the
+    container is created from, which changes whenever the lockfile pins another digest or a
+    derived image is built from other inputs.
+    """
+    configuration = json.dumps(
+        {
+            'policy': policy_hash,
+            'image': image_id,
+            'nodes': node_cmds,
+        },
+        sort_keys=True,
+        default=repr
+    )
+    return hashlib.sha256(configuration.encode('utf-8')).hexdigest()
+
+
+def lock_container(container_id: str) -> Optional[IO]:
+    """
+    Take the lock of a container taken over from an earlier launch, unless another process has it.
+
+    The lock is a file keyed on the container ID and locked with flock, so it is released when the
+    returned file is closed or when the process exits, however it exits. flock locks conflict
+    within a single process as well, so two sandboxes of one launch cannot both take it.
+
+    :returns the locked file, to be closed once the container is no longer used, or None if the
+    lock is held by another owner
+    :raises OSError if the lock file cannot be created
+    """
+    directory = os.path.join(cache_directory(), 'locks')
+    os.makedirs(directory, exist_ok=True)
+    lock_file = open(os.path.join(directory, '{}.lock'.format(container_id)), 'a')
+    try:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        lock_file.close()
+        return None
+    return lock_file
@@ -0,0 +1,406 @@
+# Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Module for collecting the output of sandboxed nodes in a process of its own.
+
+When a DockerPolicy uses the 'pump' log mode, LoadDockerNodes runs this module as a helper process
+with the same Python interpreter. The launch process creates the exec of each node and hands its
+ID to the collector as a JSON line on stdin. The collector starts the exec, reads its output,
+splits it into lines and writes them to the node's log sink, so decoding, formatting and writing
+the output never compete with the launch event loop for the GIL.
+
+The collector shares a SampleRing with the launch process: the number of lines and bytes each node
+wrote, and a sample of at most a few lines per second of each node, which the launch process logs.
+Once the wrapper of a node wrote the node's PID and once the output of a node ends, the collector
+writes a JSON line to stdout. If stdin is closed, the launch process went away and the collector
+exits.
+"""
+
+import asyncio
+import json
+import logging
+from multiprocessing import shared_memory
+import socket
+import struct
+import sys
+from threading import Lock
+from threading import Thread
+from typing import Any, Dict, List, Optional, Tuple
+
+from launch_ros_sandbox.descriptions.file_log_sink import FileLogSink
+from launch_ros_sandbox.utilities.docker_client import lease_docker_client
+from launch_ros_sandbox.utilities.log_writer import FileSinkHandler
+from launch_ros_sandbox.utilities.log_writer import get_log_writer
+from launch_ros_sandbox.utilities.node_output import emit_lines
+from launch_ros_sandbox.utilities.node_output import LineDecoder
+from launch_ros_sandbox.utilities.node_output import PidHeader
+from launch_ros_sandbox.utilities.node_output import TokenBucket
+
+# Default number of lines per second of each node the launch process logs.
+SAMPLE_RATE = 10.0
+
+# Default number of bytes of samples the ring holds until the launch process reads them.
+_RING_CAPACITY = 256 * 1024
+
+# Longest sampled line in bytes; the complete line is still written to the log sink.
+_MAX_SAMPLE_LENGTH = 4096
+
+_READ_SIZE = 65536
+
+# Head and tail of the ring, as offsets growing without bound, and the number of dropped samples.
+_HEADER = struct.Struct('=QQQ')
+_COUNTER = struct.Struct('=Q')
+_HEAD_OFFSET = 0
+_TAIL_OFFSET = 8
+_DROPPED_OFFSET = 16
+# Number of lines and bytes of a node's output.
+_COUNTERS = struct.Struct('=QQ')
+# Length of a sampled line and index of its node.
+_RECORD = struct.Struct('=II')
+
+
+class SampleRing:
+    """
+    Counters and sampled lines of the node output, shared by the collector and the launch process.
+
+    The ring has a single producer, the collector, and a single consumer, the launch process. The
+    producer only advances the head and the consumer only advances the tail, so neither needs a
+    lock. A sample which does not fit while the ring is full is dropped and counted.
+    """
+
+    def __init__(
+        self,
+        buffer: Any,
+        node_count: int
+    ) -> None:
+        """Construct the ring in 'buffer', which holds the counters of 'node_count' nodes."""
+        self._buffer = buffer
+        self._node_count = node_count
+        self._data_offset = _HEADER.size + node_count * _COUNTERS.size
+        self._capacity = len(buffer) - self._data_offset
+
+    @staticmethod
+    def size(
+        node_count: int,
+        capacity: int = _RING_CAPACITY
+    ) -> int:
+        """Return the size of a buffer for the counters of 'node_count' nodes and 'capacity'."""
+        return _HEADER.size + node_count * _COUNTERS.size + capacity
+
+    @property
+    def dropped(self) -> int:
+        """Return the number of samples dropped because the ring was full."""
+        return _HEADER.unpack_from(self._buffer, 0)[2]
+
+    def count_output(
+        self,
+        index: int,
+        lines: int,
+        size: int
+    ) -> None:
+        """Add to the number of lines and bytes written by a node."""
+        offset = _HEADER.size + index * _COUNTERS.size
+        total_lines, total_size = _COUNTERS.unpack_from(self._buffer, offset)
+        _COUNTERS.pack_into(self._buffer, offset, total_lines + lines, total_size + size)
+
+    def output(self, index: int) -> Tuple[int, int]:
+        """Return the number of lines and bytes written by a node."""
+        return _COUNTERS.unpack_from(self._buffer, _HEADER.size + index * _COUNTERS.size)
+
+    def put(
+        self,
+        index: int,
+        line: str
+    ) -> bool:
+        """
+        Add a sampled line of a node, unless the ring is full.
+
+        :returns False if the sample was dropped
+        """
+        payload = line.encode('utf-8', 'replace')[:_MAX_SAMPLE_LENGTH]
+        record = _RECORD.pack(len(payload), index) + payload
+
+        head, tail, dropped = _HEADER.unpack_from(self._buffer, 0)
+        if self._capacity - (head - tail) < len(record):
+            _COUNTER.pack_into(self._buffer, _DROPPED_OFFSET, dropped + 1)
+            return False
+
+        self._write(head, record)
+        # Publish the record only once it is complete.
+        _COUNTER.pack_into(self._buffer, _HEAD_OFFSET, head + len(record))
+        return True
+
+    def take(self) -> List[Tuple[int, str]]:
+        """Remove and return every sampled (node index, line) in the ring."""
+        head, tail, _ = _HEADER.unpack_from(self._buffer, 0)
+        samples = []
+        while tail < head:
+            length, index = _RECORD.unpack(self._read(tail, _RECORD.size))
+            line = self._read(tail + _RECORD.size, length).decode('utf-8', 'replace')
+            samples.append((index, line))
+            tail += _RECORD.size + length
+        _COUNTER.pack_into(self._buffer, _TAIL_OFFSET, tail)
+        return samples
+
+    def _write(
+        self,
+        position: int,
+        data: bytes
+    ) -> None:
+        start = position % self._capacity
+        first = min(len(data), self._capacity - start)
+        begin = self._data_offset + start
+        self._buffer[begin:begin + first] = data[:first]
+        if first < len(data):
+            self._buffer[self._data_offset:self._data_offset + len(data) - first] = data[first:]
+
+    def _read(
+        self,
+        position: int,
+        length: int
+    ) -> bytes:
+        start = position % self._capacity
+        first = min(length, self._capacity - start)
+        begin = self._data_offset + start
+        data = bytes(self._buffer[begin:begin + first])
+        if first < length:
+            data += bytes(self._buffer[self._data_offset:self._data_offset + length - first])
+        return data
+
+
+class LogCollector:
+    """Run the log collector process of a sandbox and read what it shares."""
+
+    def __init__(
+        self,
+        node_count: int,
+        *,
+        sample_rate: float = SAMPLE_RATE,
+        ring_capacity: int = _RING_CAPACITY
+    ) -> None:
+        """Construct the collector of 'node_count' nodes; the process is started by start."""
+        self._node_count = node_count
+        self._sample_rate = sample_rate
+        self._memory = shared_memory.SharedMemory(
+            create=True, size=SampleRing.size(node_count, ring_capacity))
+        self.ring = SampleRing(self._memory.buf, node_count)
+        self._process = None  # type: Any
+
+    async def start(self) -> None:
+        """Start the collector process."""
+        self._process = await asyncio.create_subprocess_exec(
+            sys.executable, '-m', __name__,
+            self._memory.name, str(self._node_count), str(self._sample_rate),
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE
+        )
+
+    def attach(
+        self,
+        index: int,
+        exec_id: str,
+        logger_name: str,
+        sink: Optional[FileLogSink]
+    ) -> None:
+        """Hand the exec writing the output of a node to the collector, which starts it."""
+        request = {'index': index, 'exec_id': exec_id, 'logger': logger_name, 'sink': None}
+        if sink is not None:
+            request['sink'] = {
+                'directory': sink.directory,
+                'max_bytes': sink.max_bytes,
+                'backup_count': sink.backup_count,
+                'compression': sink.compression,
+            }
+        self._process.stdin.write((json.dumps(request) + '\n').encode('utf-8'))
+
+    async def report(self) -> Optional[Dict[str, Any]]:
+        """
+        Wait for the next report of the collector; None once it exited.
+
+        A report holds the 'index' of a node and, if the node started, its 'pid'; otherwise the
+        output of the node ended.
+        """
+        line = await self._process.stdout.readline()
+        if not line:
+            return None
+        return json.loads(line.decode('utf-8'))
+
+    def close(self) -> None:
+        """Close the collector's stdin, which makes it exit, and free the shared memory."""
+        if self._process is not None and not self._process.stdin.is_closing():
+            self._process.stdin.close()
+        # The collector keeps its own mapping, so the memory is freed once both let go of it.
+        self._memory.close()
+        self._memory.unlink()
+
+
+def _attach_shared_memory(name: str) -> shared_memory.SharedMemory:
+    """Attach to the memory created by the launch process, which alone frees it."""
+    try:
+        return shared_memory.SharedMemory(name, track=False)  # type: ignore
+    except TypeError:
+        # Before Python 3.13, attaching always tracks the memory and frees it when this exits.
+        from multiprocessing import resource_tracker
+        memory = shared_memory.SharedMemory(name)
+        resource_tracker.unregister(memory._name, 'shared_memory')  # type: ignore
+        return memory
+
+
+class _Collector:
+    """Read the output of the nodes of a sandbox and write it to their log sinks."""
+
+    def __init__(
+        self,
+        ring: SampleRing,
+        sample_rate: float,
+        *,
+        output: Any = None
+    ) -> None:
+        self._ring = ring
+        self._sample_rate = sample_rate
+        self._output = output or sys.stdout
+        # Serializes the reader threads, which share the ring and the output.
+        self._lock = Lock()
+        self._loggers = {}  # type: Dict[int, logging.Logger]
+        self._sockets = {}  # type: Dict[int, Any]
+        self._threads = []  # type: List[Thread]
+
+    def run(self, requests: Any) -> None:
+        """Serve the requests until their stream ends, then stop reading and close the sinks."""
+        lease = lease_docker_client()
+        for line in requests:
+            if line.strip():
+                self._attach(lease.client.api, json.loads(line))
+
+        with self._lock:
+            for output_socket in self._sockets.values():
+                # Shutting the socket down wakes up the thread reading it.
+                try:
+                    output_socket.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+        for thread in self._threads:
+            thread.join()
+        for logger in self._loggers.values():
+            for handler in list(logger.handlers):
+                logger.removeHandler(handler)
+                handler.close()
+        get_log_writer().join()
+        lease.release()
+
+    def _attach(
+        self,
+        api: Any,
+        request: Dict[str, Any]
+    ) -> None:
+        index = request['index']
+        output_socket = api.exec_start(request['exec_id'], tty=True, socket=True)
+        sink = FileLogSink(**request['sink']) if request['sink'] is not None else None
+        thread = Thread(
+            target=self.collect, args=(index, output_socket, request['logger'], sink), daemon=True)
+        self._threads.append(thread)
+        thread.start()
+
+    def collect(
+        self,
+        index: int,
+        output_socket: Any,
+        logger_name: str,
+        sink: Optional[FileLogSink]
+    ) -> None:
+        """Read the output of a node until it ends. Blocking."""
+        logger = self._logger(index, logger_name, sink)
+        pid_header = PidHeader()
+        decoder = LineDecoder()
+        samples = TokenBucket(self._sample_rate, max(int(self._sample_rate), 1))
+        # Docker returns the socket wrapped in a file object when it is not a TLS socket.
+        raw_socket = getattr(output_socket, '_sock', output_socket)
+        with self._lock:
+            self._sockets[index] = raw_socket
+        try:
+            while True:
+                try:
+                    chunk = raw_socket.recv(_READ_SIZE)
+                except OSError:
+                    # The socket is closed when the container stops or the collector exits.
+                    break
+                if not chunk:
+                    break
+                if not pid_header.done:
+                    chunk = pid_header.feed(chunk)
+                    if pid_header.pid is not None:
+                        self._report({'index': index, 'pid': pid_header.pid})
+                lines = decoder.feed(chunk)
+                emit_lines(logger, lines)
+                self._share(index, lines, len(chunk), samples)
+
+            lines = decoder.feed(pid_header.flush()) + decoder.flush()
+            emit_lines(logger, lines)
+            self._share(index, lines, 0, samples)
+        finally:
+            raw_socket.close()
+            with self._lock:
+                self._sockets.pop(index, None)
+            self._report({'index': index})
+
+    def _report(self, report: Dict[str, Any]) -> None:
+        with self._lock:
+            self._output.write(json.dumps(report) + '\n')
+            self._output.flush()
+
+    def _logger(
+        self,
+        index: int,
+        logger_name: str,
+        sink: Optional[FileLogSink]
+    ) -> logging.Logger:
+        # A restarted node keeps writing to the same logger and files.
+        if index not in self._loggers:
+            logger = logging.getLogger(logger_name)
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+            if sink is not None:
+                logger.addHandler(FileSinkHandler(logger_name, sink))
+            self._loggers[index] = logger
+        return self._loggers[index]
+
+    def _share(
+        self,
+        index: int,
+        lines: List[str],
+        size: int,
+        samples: TokenBucket
+    ) -> None:
+        sampled = samples.take(len(lines)) if lines else 0
+        with self._lock:
+            self._ring.count_output(index, len(lines), size)
+            for line in lines[:sampled]:
+                self._ring.put(index, line)
+
+
+def main() -> None:
+    """Run the collector on the shared memory, node count and sample rate given in argv."""
+    try:
+        memory = _attach_shared_memory(sys.argv[1])
+    except FileNotFoundError:
+        # The launch process already shut down and freed the memory.
+        return
+    ring = SampleRing(memory.buf, int(sys.argv[2]))
+    _Collector(ring, float(sys.argv[3])).run(sys.stdin)
+    memory.close()
+
+
+if __name__ == '__main__':
+    main()
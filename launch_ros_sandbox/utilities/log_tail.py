@@ -0,0 +1,231 @@
+# Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Module for following files which sandboxed nodes write to a directory on the host.
+
+LogFileFollower only reads the files it was asked to follow. On Linux, it learns about new output
+from inotify, called through ctypes, with a single watch on the directory; the event loop reads
+the inotify file descriptor, so no thread is needed. Elsewhere, or if inotify is unavailable, the
+files are polled periodically instead.
+"""
+
+import asyncio
+import ctypes
+import ctypes.util
+import os
+import struct
+from typing import Any, Callable, Optional
+
+_READ_SIZE = 65536
+
+# Number of seconds between two checks of the followed files when inotify is not used.
+POLL_PERIOD = 0.25
+
+# Flags and event masks of inotify(7).
+_IN_NONBLOCK = os.O_NONBLOCK
+_IN_CLOEXEC = os.O_CLOEXEC
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_Q_OVERFLOW = 0x00004000
+_IN_WATCH_MASK = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE
+
+# Watch descriptor, mask, cookie and name length of an inotify event, followed by the name.
+_EVENT = struct.Struct('iIII')
+
+
+def _init_inotify(directory: str) -> Optional[int]:
+    """Return an inotify file descriptor watching 'directory'; None if inotify is unavailable."""
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        init = libc.inotify_init1
+        add_watch = libc.inotify_add_watch
+    except (OSError, AttributeError):
+        return None
+
+    fd = init(_IN_NONBLOCK | _IN_CLOEXEC)
+    if fd < 0:
+        return None
+    if add_watch(fd, os.fsencode(directory), _IN_WATCH_MASK) < 0:
+        os.close(fd)
+        return None
+    return fd
+
+
+class _FollowedFile:
+    """A followed file, opened once it exists, and the callback of the data appended to it."""
+
+    def __init__(
+        self,
+        path: str,
+        callback: Callable[[bytes], Any],
+        from_end: bool
+    ) -> None:
+        self.path = path
+        self.callback = callback
+        self.from_end = from_end
+        self.file = None  # type: Any
+        # Whether reading is paused; what is appended meanwhile is read once it is resumed.
+        self.paused = False
+
+    def read(self) -> None:
+        """Pass everything appended to the file since it was last read to the callback."""
+        if self.paused:
+            return
+        if self.file is None:
+            try:
+                self.file = open(self.path, 'rb')
+            except FileNotFoundError:
+                return
+            if self.from_end:
+                self.file.seek(0, os.SEEK_END)
+
+        # Start over if the file was truncated.
+        if os.fstat(self.file.fileno()).st_size < self.file.tell():
+            self.file.seek(0)
+        # The callback may stop following the file, which closes it, or pause reading it.
+        while self.file is not None and not self.paused:
+            data = self.file.read(_READ_SIZE)
+            if not data:
+                return
+            self.callback(data)
+
+    def close(self) -> None:
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+class LogFileFollower:
+    """Follow files in a directory, passing the data appended to each file to a callback."""
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        directory: str,
+        *,
+        use_inotify: bool = True
+    ) -> None:
+        """Construct the follower of files in 'directory', which must exist."""
+        self._loop = loop
+        self._directory = directory
+        # Maps the name of each followed file to its state.
+        self._files = {}  # type: dict
+        self._timer = None  # type: Optional[asyncio.TimerHandle]
+        self._inotify = _init_inotify(directory) if use_inotify else None
+        if self._inotify is not None:
+            loop.add_reader(self._inotify, self._read_events)
+        else:
+            self._schedule_poll()
+
+    @property
+    def uses_inotify(self) -> bool:
+        """Return True if inotify reports changes, False if the files are polled."""
+        return self._inotify is not None
+
+    def follow(
+        self,
+        name: str,
+        callback: Callable[[bytes], Any],
+        *,
+        from_end: bool = True
+    ) -> None:
+        """
+        Follow the file 'name' in the directory, which need not exist yet.
+
+        If the file exists and 'from_end' is True, only data appended from now on is passed to
+        'callback'.
+        """
+        self.unfollow(name)
+        path = os.path.join(self._directory, name)
+        # A file created later is passed to the callback from its start.
+        followed = _FollowedFile(path, callback, from_end and os.path.exists(path))
+        self._files[name] = followed
+        followed.read()
+
+    def unfollow(self, name: str) -> None:
+        """Stop following the file 'name'."""
+        followed = self._files.pop(name, None)
+        if followed is not None:
+            followed.close()
+
+    def pause(self, name: str) -> None:
+        """Stop reading the file 'name' until it is resumed, without losing what is appended."""
+        followed = self._files.get(name)
+        if followed is not None:
+            followed.paused = True
+
+    def resume(self, name: str) -> None:
+        """Read the file 'name' again, starting with what was appended while it was paused."""
+        followed = self._files.get(name)
+        if followed is not None:
+            followed.paused = False
+            followed.read()
+
+    def is_paused(self, name: str) -> bool:
+        """Return True if reading the file 'name' is paused."""
+        followed = self._files.get(name)
+        return followed is not None and followed.paused
+
+    def poll(self, name: Optional[str] = None) -> None:
+        """Read what was appended to the file 'name', or to all followed files, right away."""
+        names = [name] if name is not None else list(self._files)
+        for followed_name in names:
+            followed = self._files.get(followed_name)
+            if followed is not None:
+                followed.read()
+
+    def close(self) -> None:
+        """Stop following all files."""
+        if self._inotify is not None:
+            self._loop.remove_reader(self._inotify)
+            os.close(self._inotify)
+            self._inotify = None
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        for name in list(self._files):
+            self.unfollow(name)
+
+    def _read_events(self) -> None:
+        assert self._inotify is not None
+
+        try:
+            data = os.read(self._inotify, _READ_SIZE)
+        except BlockingIOError:
+            return
+
+        names = set()  # type: set
+        offset = 0
+        while offset < len(data):
+            _, mask, _, length = _EVENT.unpack_from(data, offset)
+            offset += _EVENT.size
+            if mask & _IN_Q_OVERFLOW:
+                # Events were lost, so any followed file may have changed.
+                names.update(self._files)
+            else:
+                names.add(os.fsdecode(data[offset:offset + length].rstrip(b'\0')))
+            offset += length
+
+        for name in names:
+            self.poll(name)
+
+    def _schedule_poll(self) -> None:
+        self._timer = self._loop.call_later(POLL_PERIOD, self._poll_periodically)
+
+    def _poll_periodically(self) -> None:
+        self.poll()
+        self._schedule_poll()
@@ -0,0 +1,302 @@
+# Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Module for writing node output to rotating, compressed log files in the background.
+
+A single writer thread serves every log file of the process, so logging a line from the launch
+process only costs putting it in a queue. The writer compresses the output as it is written and
+rotates each file once it reached its maximum size on disk.
+
+The queue of the writer is bounded. If the disk cannot keep up, the output which does not fit is
+dropped rather than waited for, since logging must never stall the nodes or the event loop, and
+the number of lines dropped is written to each log file in their place.
+
+The writer thread is a daemon thread, so it never keeps the process alive. Every log file still
+open when the process exits is closed by an exit hook, once everything queued for it was written,
+so compressed files always end with their trailer.
+"""
+
+import atexit
+import gzip
+import logging
+import os
+import queue
+from threading import Lock
+from threading import Thread
+from typing import Any, Optional, Tuple
+import zlib
+
+from launch_ros_sandbox.descriptions.file_log_sink import FileLogSink
+
+# Number of seconds after which buffered output is written to the disk if no more output arrives.
+_FLUSH_INTERVAL = 1.0
+
+# Maximum number of writes waiting for the writer thread, across all log files.
+_QUEUE_SIZE = 65536
+
+# Number of seconds the process waits on exit for the log files to be written and closed.
+_EXIT_TIMEOUT = 10.0
+
+_LOG_FORMAT = '%(asctime)s [%(levelname)s] %(message)s'
+
+
+class RotatingCompressedFile:
+    """
+    A log file compressed as it is written, and rotated once it reached its maximum size.
+
+    Output appended to an existing file is compressed as a new gzip member or zstd frame, which
+    decompressing the file joins transparently. Not thread safe; only used by the writer thread.
+    """
+
+    def __init__(
+        self,
+        path_prefix: str,
+        sink: FileLogSink
+    ) -> None:
+        """Construct the file written to 'path_prefix' plus the extension of the sink."""
+        self._path_prefix = path_prefix
+        self._sink = sink
+        self._raw = None  # type: Any
+        self._stream = None  # type: Any
+
+    @property
+    def path(self) -> str:
+        """Return the path of the current log file."""
+        return self._backup_path(0)
+
+    def _backup_path(self, number: int) -> str:
+        if number == 0:
+            return self._path_prefix + self._sink.file_extension
+        return '{}.{}{}'.format(self._path_prefix, number, self._sink.file_extension)
+
+    def _open(self) -> None:
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self._raw = open(self.path, 'ab')
+        if self._sink.compression == 'gzip':
+            self._stream = gzip.GzipFile(fileobj=self._raw, mode='wb')
+        elif self._sink.compression == 'zstd':
+            import zstandard
+            self._stream = zstandard.ZstdCompressor().stream_writer(self._raw)
+        else:
+            self._stream = self._raw
+
+    def write(self, data: bytes) -> None:
+        """Append 'data' to the log file, rotating it first if it is full."""
+        if self._raw is None:
+            self._open()
+        elif self._raw.tell() >= self._sink.max_bytes:
+            self._rotate()
+        self._stream.write(data)
+
+    def flush(self) -> None:
+        """Write the output compressed so far to the disk."""
+        if self._raw is None:
+            return
+        if self._sink.compression == 'gzip':
+            self._stream.flush(zlib.Z_SYNC_FLUSH)
+        elif self._sink.compression == 'zstd':
+            self._stream.flush()
+        self._raw.flush()
+
+    def close(self) -> None:
+        """Finish the compressed stream and close the log file."""
+        if self._raw is None:
+            return
+        if self._sink.compression == 'gzip':
+            self._stream.close()
+        elif self._sink.compression == 'zstd':
+            import zstandard
+            self._stream.flush(zstandard.FLUSH_FRAME)
+        self._raw.close()
+        self._raw = None
+        self._stream = None
+
+    def _rotate(self) -> None:
+        self.close()
+        if self._sink.backup_count == 0:
+            os.remove(self.path)
+        else:
+            for number in range(self._sink.backup_count - 1, -1, -1):
+                if os.path.exists(self._backup_path(number)):
+                    os.replace(self._backup_path(number), self._backup_path(number + 1))
+        self._open()
+
+
+class LogWriter:
+    """Write to log files from a single background thread."""
+
+    def __init__(
+        self,
+        *,
+        flush_interval: float = _FLUSH_INTERVAL,
+        queue_size: int = _QUEUE_SIZE
+    ) -> None:
+        """Construct the writer of at most 'queue_size' pending writes and start its thread."""
+        self._flush_interval = flush_interval
+        # Each item is a file, the data to write to it or None to close the file, and the number of
+        # writes to the file dropped right before.
+        self._queue = queue.Queue(maxsize=queue_size)  # type: queue.Queue
+        # Maps each log file to the number of writes to it dropped since a write was queued.
+        self._dropped = {}  # type: dict
+        self._dropped_total = 0
+        # Files written to and not closed yet.
+        self._open_files = set()  # type: set
+        self._lock = Lock()
+        self._thread = Thread(target=self._run, name='launch_ros_sandbox log writer', daemon=True)
+        self._thread.start()
+
+    def write(
+        self,
+        log_file: RotatingCompressedFile,
+        data: bytes
+    ) -> None:
+        """Queue 'data' to be written to 'log_file', or drop it if the queue is full."""
+        with self._lock:
+            self._open_files.add(log_file)
+            dropped = self._dropped.pop(log_file, 0)
+            try:
+                self._queue.put_nowait((log_file, data, dropped))
+            except queue.Full:
+                self._dropped[log_file] = dropped + 1
+                self._dropped_total += 1
+
+    @property
+    def dropped(self) -> int:
+        """Return the number of writes dropped because the queue was full."""
+        return self._dropped_total
+
+    def close(self, log_file: RotatingCompressedFile) -> None:
+        """Queue closing 'log_file' after everything queued for it was written."""
+        with self._lock:
+            self._open_files.discard(log_file)
+            dropped = self._dropped.pop(log_file, 0)
+        # Closing is never dropped; the writer thread makes room for it.
+        self._queue.put((log_file, None, dropped))
+
+    def join(
+        self,
+        timeout: Optional[float] = None
+    ) -> bool:
+        """
+        Wait until everything queued so far was written.
+
+        :returns False if it was not written within 'timeout' seconds, True otherwise
+        """
+        with self._queue.all_tasks_done:
+            return self._queue.all_tasks_done.wait_for(
+                lambda: not self._queue.unfinished_tasks, timeout)
+
+    def close_all(
+        self,
+        timeout: Optional[float] = None
+    ) -> bool:
+        """
+        Close every open log file once everything queued for it was written, and wait for it.
+
+        :returns False if the files were not closed within 'timeout' seconds, True otherwise
+        """
+        with self._lock:
+            open_files = list(self._open_files)
+        for log_file in open_files:
+            self.close(log_file)
+        return self.join(timeout)
+
+    def _run(self) -> None:
+        unflushed = set()  # type: set
+        while True:
+            try:
+                item = self._queue.get(timeout=self._flush_interval if unflushed else None)
+            except queue.Empty:
+                for log_file in unflushed:
+                    self._call(log_file.flush)
+                unflushed.clear()
+                continue
+
+            try:
+                self._handle(item, unflushed)
+            finally:
+                self._queue.task_done()
+
+    def _handle(
+        self,
+        item: Tuple[RotatingCompressedFile, Optional[bytes], int],
+        unflushed: set
+    ) -> None:
+        log_file, data, dropped = item
+        if dropped:
+            unflushed.add(log_file)
+            self._call(log_file.write, '[{} lines dropped: the log files could not be written '
+                       'fast enough]\n'.format(dropped).encode('utf-8'))
+        if data is None:
+            unflushed.discard(log_file)
+            self._call(log_file.close)
+        else:
+            unflushed.add(log_file)
+            self._call(log_file.write, data)
+
+    @staticmethod
+    def _call(method: Any, *args: Any) -> None:
+        try:
+            method(*args)
+        except OSError as ex:
+            # Never let a full or broken disk stop the writer for every other log file.
+            logging.getLogger(__name__).error('Unable to write log file: {}'.format(ex))
+
+
+_writer_lock = Lock()
+_writer = None  # type: Optional[LogWriter]
+
+
+def get_log_writer() -> LogWriter:
+    """Return the writer shared by all log files of this process, starting it if needed."""
+    global _writer
+
+    with _writer_lock:
+        if _writer is None:
+            _writer = LogWriter()
+            atexit.register(_writer.close_all, _EXIT_TIMEOUT)
+        return _writer
+
+
+class FileSinkHandler(logging.Handler):
+    """Logging handler writing the records of a node's logger to the files of a FileLogSink."""
+
+    def __init__(
+        self,
+        logger_name: str,
+        sink: FileLogSink
+    ) -> None:
+        """Construct the handler writing to '<sink directory>/<logger_name>' files."""
+        super().__init__()
+        self.setFormatter(logging.Formatter(_LOG_FORMAT))
+        self._file = RotatingCompressedFile(os.path.join(sink.directory, logger_name), sink)
+        self._writer = get_log_writer()
+
+    @property
+    def path(self) -> str:
+        """Return the path of the current log file."""
+        return self._file.path
+
+    def emit(self, record: logging.LogRecord) -> None:
+        """Queue the formatted record to be written by the writer thread."""
+        try:
+            self._writer.write(self._file, (self.format(record) + '\n').encode('utf-8'))
+        except Exception:
+            self.handleError(record)
+
+    def close(self) -> None:
+        """Close the log file once everything queued for it was written."""
+        self._writer.close(self._file)
+        super().close()
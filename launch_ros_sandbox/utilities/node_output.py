@@ -0,0 +1,362 @@
+# Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Module for turning the raw output of sandboxed nodes into log records.
+
+Node output arrives in chunks of arbitrary size: a chunk may end in the middle of a line or even
+in the middle of a multibyte character, and a single chunk may hold many lines. LineDecoder keeps
+the state between chunks so that every complete line is logged exactly once. emit_lines logs each
+line of a chunk as its own record, but checks the level and looks up the caller once per chunk
+rather than once per line. Nodes running without a TTY send stdout and stderr over one stream,
+which StreamDemultiplexer splits back into the two streams first. The wrapper starting a node
+writes the node's PID in a header line before any output of the node, which PidHeader splits off.
+
+When a sandbox limits its log output, TokenBucket enforces the rate limits and LogQueue bounds the
+output waiting for the LogPump thread which logs it.
+"""
+
+import codecs
+import collections
+import logging
+import struct
+from threading import Condition
+from threading import Lock
+from threading import Thread
+import time
+from typing import Callable, List, Optional, Tuple
+
+# Lines longer than this many characters are split, so a node never printing a line break cannot
+# grow the buffer without bound.
+MAX_LINE_LENGTH = 65536
+
+
+class LineDecoder:
+    """
+    Incrementally decode UTF-8 node output and split it into lines.
+
+    Invalid UTF-8 is replaced rather than dropped. Trailing whitespace, including the carriage
+    return a TTY adds to every line break, is removed, and empty lines are skipped.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_line_length: int = MAX_LINE_LENGTH
+    ) -> None:
+        """Construct the decoder with no partial line."""
+        self._decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self._max_line_length = max_line_length
+        self._partial = ''
+
+    def feed(self, data: bytes) -> List[str]:
+        """Decode a chunk of output and return the lines it completes."""
+        text = self._partial + self._decoder.decode(data)
+        *lines, self._partial = text.split('\n')
+
+        if len(self._partial) >= self._max_line_length:
+            lines.append(self._partial)
+            self._partial = ''
+        return [line.rstrip() for line in lines if line and not line.isspace()]
+
+    def flush(self) -> List[str]:
+        """Return the last line of the output, if it did not end with a line break."""
+        text = self._partial + self._decoder.decode(b'', final=True)
+        self._partial = ''
+        return [text.rstrip()] if text and not text.isspace() else []
+
+
+# Start of the header line holding the PID of a node, which the wrapper of the node writes first.
+PID_HEADER = b'\x1elaunch_ros_sandbox.pid='
+# printf format of the header line, given the PID.
+PID_HEADER_FORMAT = '\\036launch_ros_sandbox.pid=%s\\n'
+# Longest header line, beyond which output is not taken for a header.
+_MAX_PID_HEADER_LENGTH = 64
+
+
+class PidHeader:
+    """
+    Split the header line holding the PID of a node off the start of the node's output.
+
+    The header may be split across chunks. Output which does not start with a header is passed on
+    unchanged, and no PID is known then.
+    """
+
+    def __init__(self) -> None:
+        """Construct the parser at the start of the output."""
+        self._buffer = bytearray()
+        self.pid = None  # type: Optional[int]
+        self.done = False
+
+    def feed(self, data: bytes) -> bytes:
+        """Add a chunk of output and return the output following the header, if it is complete."""
+        if self.done:
+            return data
+        self._buffer += data
+        if not PID_HEADER.startswith(bytes(self._buffer[:len(PID_HEADER)])):
+            return self.flush()
+        end = self._buffer.find(b'\n')
+        if end < 0:
+            return self.flush() if len(self._buffer) > _MAX_PID_HEADER_LENGTH else b''
+
+        try:
+            self.pid = int(self._buffer[len(PID_HEADER):end].rstrip(b'\r'))
+        except ValueError:
+            return self.flush()
+        rest = bytes(self._buffer[end + 1:])
+        self._buffer.clear()
+        self.done = True
+        return rest
+
+    def flush(self) -> bytes:
+        """Stop looking for a header and return the output kept meanwhile."""
+        self.done = True
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+
+# Header of each frame of the output of an exec without a TTY: the stream the payload belongs to,
+# three bytes of padding and the length of the payload.
+_FRAME_HEADER = struct.Struct('>BxxxL')
+
+
+class StreamDemultiplexer:
+    """
+    Incrementally split the output of an exec without a TTY into its stdout and stderr.
+
+    Docker sends both streams over one connection as frames, each with a header naming its stream.
+    Headers and payloads may be split across chunks. The payload of a frame is returned as soon as
+    it arrives rather than once the frame is complete, so a large frame is never buffered.
+    """
+
+    def __init__(self) -> None:
+        """Construct the demultiplexer at the start of a frame."""
+        self._header = bytearray()
+        self._stream = 0
+        self._remaining = 0
+
+    def feed(self, data: bytes) -> List[Tuple[int, bytes]]:
+        """Return the stream and the bytes of each payload in a chunk of output, in order."""
+        payloads = []
+        view = memoryview(data)
+        offset = 0
+        while offset < len(view):
+            if self._remaining:
+                size = min(self._remaining, len(view) - offset)
+                payloads.append((self._stream, bytes(view[offset:offset + size])))
+                self._remaining -= size
+                offset += size
+                continue
+
+            size = min(_FRAME_HEADER.size - len(self._header), len(view) - offset)
+            self._header += view[offset:offset + size]
+            offset += size
+            if len(self._header) == _FRAME_HEADER.size:
+                self._stream, self._remaining = _FRAME_HEADER.unpack(self._header)
+                self._header.clear()
+        return payloads
+
+
+def emit_lines(
+    logger: logging.Logger,
+    lines: List[str],
+    level: int = logging.INFO
+) -> None:
+    """
+    Log each of 'lines' as its own record at 'level'.
+
+    The level is checked and the caller is looked up once for all lines, rather than once per
+    line as calling the logger for each line would.
+    """
+    if not lines or not logger.isEnabledFor(level):
+        return
+
+    filename, lineno, function, stack_info = logger.findCaller()
+    for line in lines:
+        logger.handle(logger.makeRecord(
+            logger.name, level, filename, lineno, line, (), None, function, None, stack_info))
+
+
+class TokenBucket:
+    """
+    Allow lines at an average rate, with bursts up to a fixed number of lines.
+
+    Thread safe, since one bucket may be shared by the output readers of all nodes of a sandbox.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int,
+        *,
+        clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        """Construct a full bucket refilled with 'rate' tokens per second up to 'burst' tokens."""
+        self._rate = rate
+        self._burst = burst
+        self._clock = clock
+        self._tokens = float(burst)
+        self._last_refill = clock()
+        self._lock = Lock()
+
+    def take(self, count: int) -> int:
+        """Take up to 'count' tokens and return how many were available."""
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self._tokens + (now - self._last_refill) * self._rate, self._burst)
+            self._last_refill = now
+
+            taken = min(count, int(self._tokens))
+            self._tokens -= taken
+            return taken
+
+
+# An item of the LogQueue: the logger, the level, and the lines to log.
+LogItem = Tuple[logging.Logger, int, List[str]]
+
+
+class LogQueue:
+    """
+    Bounded queue of the lines waiting to be logged.
+
+    The size of the queue is counted in lines. While the queue is full, the drop policy decides
+    whether the oldest or the newest lines are dropped, or whether adding lines blocks.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        drop_policy: str
+    ) -> None:
+        """Construct an empty queue of at most 'maxsize' lines."""
+        self._maxsize = maxsize
+        self._drop_policy = drop_policy
+        self._items = collections.deque()  # type: collections.deque
+        self._size = 0
+        self._dropped = 0
+        self._closed = False
+        self._condition = Condition()
+
+    @property
+    def dropped(self) -> int:
+        """Return the number of lines dropped because the queue was full."""
+        return self._dropped
+
+    def put(
+        self,
+        item: LogItem,
+        *,
+        block: bool = True
+    ) -> bool:
+        """
+        Add the lines of 'item' to the queue according to the drop policy.
+
+        With the 'block' policy, this waits until there is room for more lines. If 'block' is
+        False, the item is added without waiting instead, letting the queue exceed its size by one
+        item, and the caller must call wait_for_room before adding more.
+
+        :returns False if the caller has to wait for room before adding more lines
+        """
+        lines = len(item[2])
+        with self._condition:
+            if self._drop_policy == 'drop-newest' and self._size + lines > self._maxsize:
+                self._dropped += lines
+                return True
+            if self._drop_policy == 'block' and block:
+                self._condition.wait_for(lambda: self._has_room() or self._closed)
+
+            self._items.append(item)
+            self._size += lines
+
+            if self._drop_policy == 'drop-oldest':
+                while self._size > self._maxsize and len(self._items) > 1:
+                    dropped = self._items.popleft()
+                    self._size -= len(dropped[2])
+                    self._dropped += len(dropped[2])
+            self._condition.notify_all()
+            return self._drop_policy != 'block' or self._has_room()
+
+    def offer(self, item: LogItem) -> None:
+        """
+        Add the lines of 'item' to the queue without ever waiting.
+
+        This is 'put' for callers which cannot wait for room: with the 'block' policy, the lines
+        are dropped and counted while the queue is full, as with the 'drop-newest' policy.
+        """
+        with self._condition:
+            if self._drop_policy == 'block' and not self._has_room():
+                self._dropped += len(item[2])
+                return
+        self.put(item, block=False)
+
+    def wait_for_room(self) -> None:
+        """Wait until the queue has room for more lines or is closed. Blocking."""
+        with self._condition:
+            self._condition.wait_for(lambda: self._has_room() or self._closed)
+
+    def get(self) -> Optional[LogItem]:
+        """Return the oldest item, waiting for one; None once the queue is closed and empty."""
+        with self._condition:
+            self._condition.wait_for(lambda: self._items or self._closed)
+            if not self._items:
+                return None
+            item = self._items.popleft()
+            self._size -= len(item[2])
+            self._condition.notify_all()
+            return item
+
+    def close(self) -> None:
+        """Close the queue; the items already in it are still returned by get."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    def _has_room(self) -> bool:
+        return self._size < self._maxsize
+
+
+class LogPump:
+    """Log the items of a LogQueue from a background thread."""
+
+    def __init__(
+        self,
+        log_queue: LogQueue,
+        name: str
+    ) -> None:
+        """Construct the pump and start its thread."""
+        self._queue = log_queue
+        self._thread = Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        """Wait until the queue was closed and everything in it was logged."""
+        self._thread.join(timeout)
+
+    def is_alive(self) -> bool:
+        """Return True until the queue was closed and everything in it was logged."""
+        return self._thread.is_alive()
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            logger, level, lines = item
+            emit_lines(logger, lines, level)
+
+
+def suppressed_message(count: int) -> str:
+    """Return the line logged in place of 'count' lines suppressed by a rate limit."""
+    return '[{} line{} suppressed by the log rate limit]'.format(count, '' if count == 1 else 's')
@@ -0,0 +1,272 @@
+# Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Module for the supervisor running the nodes of a sandbox inside its Docker container.
+
+When a DockerPolicy enables the supervisor, LoadDockerNodes copies this module into the container
+and runs it with the container's Python 3 interpreter. The supervisor reads requests as JSON lines
+from stdin, spawns, signals and reaps the nodes, and writes their output and lifecycle back to
+stdout as frames. Since it runs inside the container, this module only uses the standard library.
+
+Each frame is a header made of a kind byte, the index of the node and the length of the payload,
+followed by the payload:
+
+- OUTPUT: a chunk of the node's output
+- STARTED: the node was started; the payload is its PID
+- EXITED: the node exited; the payload is its exit status
+- ERROR: the node could not be started; the payload is the error message
+
+If stdin is closed, the launch process went away and the supervisor stops all nodes and exits.
+"""
+
+import json
+import os
+import selectors
+import signal
+import struct
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Tuple
+
+OUTPUT = b'o'
+STARTED = b's'
+EXITED = b'x'
+ERROR = b'e'
+
+_HEADER = struct.Struct('>cII')
+
+_READ_SIZE = 65536
+
+# Number of seconds the nodes are given to exit after SIGINT when the supervisor stops.
+_STOP_TIMEOUT = 5.0
+
+# Number of seconds between two checks for exited nodes.
+_REAP_PERIOD = 0.1
+
+
+def encode_frame(
+    kind: bytes,
+    index: int,
+    payload: bytes
+) -> bytes:
+    """Encode a single frame sent by the supervisor."""
+    return _HEADER.pack(kind, index, len(payload)) + payload
+
+
+class FrameDecoder:
+    """Split the stream written by the supervisor back into frames."""
+
+    def __init__(self) -> None:
+        """Construct the decoder with an empty buffer."""
+        self._buffer = bytearray()
+
+    def feed(self, data: bytes) -> List[Tuple[bytes, int, bytes]]:
+        """
+        Add 'data' read from the stream and return the frames it completes.
+
+        :returns a list of (kind, node index, payload) tuples
+        """
+        self._buffer += data
+        frames = []
+        offset = 0
+        while len(self._buffer) - offset >= _HEADER.size:
+            kind, index, length = _HEADER.unpack_from(self._buffer, offset)
+            end = offset + _HEADER.size + length
+            if len(self._buffer) < end:
+                break
+            frames.append((kind, index, bytes(self._buffer[offset + _HEADER.size:end])))
+            offset = end
+        del self._buffer[:offset]
+        return frames
+
+
+def start_request(nodes: List[Tuple[int, List[str]]]) -> bytes:
+    """Return the request starting each (index, command) of 'nodes'."""
+    return _encode_request({
+        'op': 'start',
+        'nodes': [{'index': index, 'cmd': cmd} for index, cmd in nodes],
+    })
+
+
+def signal_request(
+    index: int,
+    signal_name: str
+) -> bytes:
+    """Return the request sending the signal 'signal_name', such as 'INT', to a node."""
+    return _encode_request({'op': 'signal', 'index': index, 'signal': signal_name})
+
+
+def _encode_request(request: Dict[str, Any]) -> bytes:
+    return (json.dumps(request) + '\n').encode('utf-8')
+
+
+class _Supervisor:
+    """Spawn, track and reap the nodes of a sandbox."""
+
+    def __init__(
+        self,
+        state_directory: str,
+        *,
+        input_fd: int = 0,
+        output_fd: int = 1
+    ) -> None:
+        self._state_directory = state_directory
+        self._input_fd = input_fd
+        self._output_fd = output_fd
+        self._selector = selectors.DefaultSelector()
+        self._requests = b''
+        # Maps the index of each running node to its process.
+        self._processes = {}  # type: Dict[int, subprocess.Popen]
+        # Indices of the nodes whose output reached its end.
+        self._closed = set()  # type: set
+        self._stopping = False
+
+        self._environment = dict(os.environ)
+        # Node output goes to a pipe, so ask the nodes not to buffer it.
+        self._environment.setdefault('PYTHONUNBUFFERED', '1')
+        self._environment.setdefault('RCUTILS_LOGGING_BUFFERED_STREAM', '0')
+
+    def run(self) -> None:
+        """Serve requests until stdin is closed and all nodes have exited."""
+        os.makedirs(self._state_directory, exist_ok=True)
+        self._selector.register(self._input_fd, selectors.EVENT_READ, None)
+
+        while not self._stopping or self._processes:
+            for key, _ in self._selector.select(_REAP_PERIOD):
+                if key.data is None:
+                    self._read_requests()
+                else:
+                    self._read_output(key.data, key.fileobj)
+            self._reap()
+
+    def _write(
+        self,
+        kind: bytes,
+        index: int,
+        payload: bytes
+    ) -> None:
+        frame = memoryview(encode_frame(kind, index, payload))
+        while frame:
+            frame = frame[os.write(self._output_fd, frame):]
+
+    def _read_requests(self) -> None:
+        data = os.read(self._input_fd, _READ_SIZE)
+        if not data:
+            self._selector.unregister(self._input_fd)
+            self._stop_all()
+            return
+
+        self._requests += data
+        *lines, self._requests = self._requests.split(b'\n')
+        for line in lines:
+            if line.strip():
+                self._handle_request(json.loads(line.decode('utf-8')))
+
+    def _handle_request(self, request: Dict[str, Any]) -> None:
+        if request['op'] == 'start':
+            for node in request['nodes']:
+                self._start(node['index'], node['cmd'])
+        elif request['op'] == 'signal':
+            self._signal(request['index'], request['signal'])
+
+    def _start(
+        self,
+        index: int,
+        cmd: List[str]
+    ) -> None:
+        if index in self._processes:
+            self._write(ERROR, index, b'node is already running')
+            return
+
+        try:
+            process = subprocess.Popen(
+                cmd,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                env=self._environment,
+                # 'ros2 run' does not pass signals on to the node it starts, so the node is
+                # signalled through the process group of its own session.
+                start_new_session=True
+            )
+        except OSError as ex:
+            self._write(ERROR, index, str(ex).encode('utf-8'))
+            return
+
+        assert process.stdout is not None
+        self._processes[index] = process
+        self._closed.discard(index)
+        self._selector.register(process.stdout, selectors.EVENT_READ, index)
+        pidfile = os.path.join(self._state_directory, '{}.pid'.format(index))
+        with open(pidfile, 'w') as f:
+            f.write('{}\n'.format(process.pid))
+        self._write(STARTED, index, str(process.pid).encode('ascii'))
+
+    def _signal(
+        self,
+        index: int,
+        signal_name: str
+    ) -> None:
+        process = self._processes.get(index)
+        if process is not None:
+            try:
+                os.killpg(process.pid, getattr(signal, 'SIG' + signal_name))
+            except ProcessLookupError:
+                pass
+
+    def _read_output(
+        self,
+        index: int,
+        pipe: Any
+    ) -> None:
+        data = os.read(pipe.fileno(), _READ_SIZE)
+        if data:
+            self._write(OUTPUT, index, data)
+        else:
+            self._selector.unregister(pipe)
+            pipe.close()
+            self._closed.add(index)
+
+    def _reap(self) -> None:
+        for index, process in list(self._processes.items()):
+            # A node has exited once it is gone and its output has been forwarded completely.
+            if index in self._closed and process.poll() is not None:
+                del self._processes[index]
+                self._write(EXITED, index, str(process.returncode).encode('ascii'))
+
+    def _stop_all(self) -> None:
+        self._stopping = True
+        for index in list(self._processes):
+            self._signal(index, 'INT')
+
+        deadline = time.monotonic() + _STOP_TIMEOUT
+        while self._processes and time.monotonic() < deadline:
+            for key, _ in self._selector.select(_REAP_PERIOD):
+                if key.data is not None:
+                    self._read_output(key.data, key.fileobj)
+            self._reap()
+
+        for index in list(self._processes):
+            self._signal(index, 'KILL')
+
+
+def main() -> None:
+    """Run the supervisor, keeping the PID files of the nodes in the directory given in argv."""
+    _Supervisor(sys.argv[1]).run()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+# Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Module for coordinating the startup of many sandboxes in one process.
+
+A launch file with many sandboxes starts all of them at once. The SandboxOrchestrator makes sure
+that sandboxes needing the same image share a single preparation of that image, and bounds how
+many containers are created at the same time so the Docker daemon is not flooded.
+"""
+
+import asyncio
+import os
+from typing import Any, Callable, Hashable, Optional
+import weakref
+
+# Environment variable setting how many containers may be created concurrently.
+MAX_CONCURRENT_STARTS_ENV = 'LAUNCH_ROS_SANDBOX_MAX_CONCURRENT_STARTS'
+
+_DEFAULT_MAX_CONCURRENT_STARTS = 8
+
+_orchestrators = weakref.WeakKeyDictionary()  # type: weakref.WeakKeyDictionary
+
+
+def max_concurrent_starts() -> int:
+    """
+    Return how many containers may be created concurrently.
+
+    The limit is read from LAUNCH_ROS_SANDBOX_MAX_CONCURRENT_STARTS and defaults to 8.
+
+    :raises ValueError if the environment variable is not a positive integer
+    """
+    value = os.environ.get(MAX_CONCURRENT_STARTS_ENV)
+    if value is None:
+        return _DEFAULT_MAX_CONCURRENT_STARTS
+
+    limit = int(value)
+    if limit < 1:
+        raise ValueError('{} must be a positive integer, got {}'
+                         .format(MAX_CONCURRENT_STARTS_ENV, value))
+    return limit
+
+
+class SandboxOrchestrator:
+    """
+    Coordinate the startup work of all sandboxes running on one event loop.
+
+    Blocking Docker calls are run in the loop's default executor, so the startup of all sandboxes
+    proceeds in parallel and takes about as long as the slowest sandbox.
+    """
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        *,
+        max_concurrent_starts: int
+    ) -> None:
+        """Construct the orchestrator for 'loop'."""
+        self._loop = loop
+        self._in_flight = {}  # type: dict
+        # Created on first use so it is bound to the running loop.
+        self._start_semaphore = None  # type: Optional[asyncio.Semaphore]
+        self._max_concurrent_starts = max_concurrent_starts
+
+    @property
+    def max_concurrent_starts(self) -> int:
+        """Getter for max_concurrent_starts."""
+        return self._max_concurrent_starts
+
+    def in_flight(self, key: Hashable) -> bool:
+        """Return True if work for 'key' is currently running."""
+        return key in self._in_flight
+
+    async def single_flight(
+        self,
+        key: Hashable,
+        func: Callable[[], Any]
+    ) -> Any:
+        """
+        Run the blocking 'func' in an executor unless work for 'key' is already running.
+
+        Callers asking for the same key while the work is running wait for that work instead of
+        starting it again, and all of them receive its result or exception. Cancelling one caller
+        does not cancel the work for the others.
+        """
+        future = self._in_flight.get(key)
+        if future is None:
+            future = self._loop.run_in_executor(None, func)
+            self._in_flight[key] = future
+            future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        return await asyncio.shield(future)
+
+    async def run_limited(
+        self,
+        func: Callable[[], Any]
+    ) -> Any:
+        """Run the blocking 'func' in an executor once fewer than the limit of starts run."""
+        if self._start_semaphore is None:
+            self._start_semaphore = asyncio.Semaphore(self._max_concurrent_starts)
+        async with self._start_semaphore:
+            return await self._loop.run_in_executor(None, func)
+
+
+def get_orchestrator(
+    loop: Optional[asyncio.AbstractEventLoop] = None
+) -> SandboxOrchestrator:
+    """Return the orchestrator shared by all sandboxes running on 'loop'."""
+    if loop is None:
+        loop = asyncio.get_event_loop()
+
+    orchestrator = _orchestrators.get(loop)
+    if orchestrator is None:
+        orchestrator = SandboxOrchestrator(loop, max_concurrent_starts=max_concurrent_starts())
+        _orchestrators[loop] = orchestrator
+    return orchestrator
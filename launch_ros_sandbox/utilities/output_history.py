@@ -0,0 +1,77 @@
+# Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Module for keeping the most recent output of each sandboxed node in memory.
+
+The history of a node is a single bytearray of fixed size, allocated once, holding its most recent
+lines encoded as UTF-8 and separated by line breaks. New lines overwrite the oldest ones, so the
+memory a node's history takes never grows, however long the node runs.
+"""
+
+from threading import Lock
+from typing import List, Optional
+
+# Number of lines of a node's history logged when the node exits abnormally.
+DUMP_LINE_COUNT = 200
+
+
+class OutputHistory:
+    """Ring buffer of the most recent lines of a node's output. Thread safe."""
+
+    def __init__(self, size: int) -> None:
+        """Construct an empty history of 'size' bytes."""
+        self._buffer = bytearray(size)
+        self._end = 0
+        self._wrapped = False
+        self._lock = Lock()
+
+    def append(self, lines: List[str]) -> None:
+        """Add 'lines' to the history, overwriting the oldest lines if it is full."""
+        if not lines or not self._buffer:
+            return
+
+        data = ('\n'.join(lines) + '\n').encode('utf-8', 'replace')
+        size = len(self._buffer)
+        with self._lock:
+            if len(data) >= size:
+                # Only the end of the new lines fits.
+                self._buffer[:] = data[-size:]
+                self._end = 0
+                self._wrapped = True
+                return
+
+            first = min(len(data), size - self._end)
+            self._buffer[self._end:self._end + first] = data[:first]
+            if first < len(data):
+                self._buffer[:len(data) - first] = data[first:]
+                self._wrapped = True
+            self._end = (self._end + len(data)) % size
+            if self._end == 0:
+                self._wrapped = True
+
+    def lines(self, count: Optional[int] = None) -> List[str]:
+        """Return the last 'count' lines of the history, or all of them, the oldest first."""
+        with self._lock:
+            if self._wrapped:
+                data = self._buffer[self._end:] + self._buffer[:self._end]
+                # The oldest line may have been partly overwritten, so it is skipped.
+                data = data[data.find(b'\n') + 1:]
+            else:
+                data = self._buffer[:self._end]
+
+        lines = data.decode('utf-8', 'replace').split('\n')[:-1]
+        if count is not None:
+            lines = lines[-count:] if count > 0 else []
+        return lines
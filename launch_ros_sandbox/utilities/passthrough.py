@@ -0,0 +1,124 @@
+# Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Module for copying the raw output of sandboxed nodes to a file descriptor.
+
+Where the platform supports it, the output is moved from the socket of the exec to the file
+descriptor with splice(2) through a pipe, so the bytes never reach user space. sendfile(2) cannot
+read from a socket, so it is no alternative. Otherwise, and for TLS sockets whose bytes have to be
+decrypted, the output is copied through a single reused buffer.
+"""
+
+import errno
+import os
+import socket
+import ssl
+from typing import Any
+
+_CHUNK_SIZE = 65536
+
+# Errors of splice(2) meaning it does not support the file descriptors, rather than a failure.
+_UNSUPPORTED = (errno.EINVAL, errno.ENOSYS, errno.EOPNOTSUPP)
+
+
+def forward_output(
+    source: socket.socket,
+    fd: int,
+    *,
+    prefix: bytes = b''
+) -> int:
+    """
+    Copy everything read from 'source' to 'fd' until 'source' reaches its end. Blocking.
+
+    'prefix' is output which was already read from 'source', and is written first. 'fd' must not
+    be opened with O_APPEND, which splice(2) does not support.
+
+    :returns the number of bytes copied, including 'prefix'
+    """
+    _write_all(fd, prefix)
+    return len(prefix) + _forward_output(source, fd)
+
+
+def _forward_output(
+    source: socket.socket,
+    fd: int
+) -> int:
+    source.setblocking(True)
+    if hasattr(os, 'splice') and not isinstance(source, ssl.SSLSocket):
+        try:
+            return _splice_output(source, fd)
+        except OSError as ex:
+            # Nothing was moved yet if splice(2) does not support the socket.
+            if ex.errno not in _UNSUPPORTED:
+                raise
+    return _copy_output(source, fd, 0)
+
+
+def _splice_output(
+    source: socket.socket,
+    fd: int
+) -> int:
+    read_end, write_end = os.pipe()
+    total = 0
+    # Whether splice(2) supports writing to 'fd'; some character devices only support write(2).
+    splice_out = True
+    try:
+        while True:
+            size = os.splice(source.fileno(), write_end, _CHUNK_SIZE)  # type: ignore
+            if not size:
+                return total
+            total += size
+
+            while size and splice_out:
+                try:
+                    size -= os.splice(read_end, fd, size)  # type: ignore
+                except OSError as ex:
+                    if ex.errno not in _UNSUPPORTED:
+                        raise
+                    splice_out = False
+            while size:
+                data = os.read(read_end, size)
+                _write_all(fd, data)
+                size -= len(data)
+
+            if not splice_out:
+                return _copy_output(source, fd, total)
+    finally:
+        os.close(read_end)
+        os.close(write_end)
+
+
+def _copy_output(
+    source: socket.socket,
+    fd: int,
+    total: int
+) -> int:
+    buffer = bytearray(_CHUNK_SIZE)
+    view = memoryview(buffer)
+    while True:
+        size = source.recv_into(buffer)
+        if not size:
+            return total
+        _write_all(fd, view[:size])
+        total += size
+
+
+def _write_all(
+    fd: int,
+    data: Any
+) -> None:
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
@@ -0,0 +1,71 @@
+# Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Module for deciding when a sandboxed node which exited is run again."""
+
+import random
+import time
+from typing import Callable, Optional
+
+from launch_ros_sandbox.descriptions.respawn import Respawn
+
+
+class RespawnBackoff:
+    """Track the restarts of a single node and the delay before its next restart."""
+
+    def __init__(
+        self,
+        respawn: Respawn,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+        uniform: Callable[[float, float], float] = random.uniform
+    ) -> None:
+        """Construct the backoff of a node which was not started yet."""
+        self._respawn = respawn
+        self._clock = clock
+        self._uniform = uniform
+        self._restarts = 0
+        self._delay = 0.0
+        self._started_at = None  # type: Optional[float]
+
+    @property
+    def restarts(self) -> int:
+        """Return the number of restarts in a row."""
+        return self._restarts
+
+    def started(self) -> None:
+        """Record that the node started."""
+        self._started_at = self._clock()
+
+    def next_delay(self) -> Optional[float]:
+        """
+        Return the number of seconds to wait before restarting the node which exited.
+
+        :returns None if the node has reached its maximum number of restarts in a row
+        """
+        respawn = self._respawn
+        if self._started_at is not None and \
+                self._clock() - self._started_at >= respawn.reset_window:
+            self._restarts = 0
+        self._started_at = None
+
+        if respawn.max_restarts is not None and self._restarts >= respawn.max_restarts:
+            return None
+
+        if self._restarts:
+            self._delay = min(self._delay * respawn.multiplier, respawn.max_delay)
+        else:
+            self._delay = respawn.initial_delay
+        self._restarts += 1
+        return self._delay * self._uniform(1 - respawn.jitter, 1 + respawn.jitter)
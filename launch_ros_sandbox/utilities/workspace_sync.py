@@ -0,0 +1,167 @@
+# Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Module for incremental workspace synchronization.
+
+WorkspaceSync tracks the files of a host workspace directory with a manifest of their size,
+modification time and content hash. Polling the workspace only stats its files; a file is hashed
+only when its stat changed, and it is reported only when its content changed. The hashes come from
+a FileHashCache, so a snapshot of an unchanged workspace only stats its files as well. Changes are
+reported once they have been stable for two consecutive polls, so a build still writing the
+workspace is not pushed half way through.
+"""
+
+import os
+import tarfile
+import tempfile
+from typing import Dict
+from typing import IO
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Set
+from typing import Tuple
+
+from launch_ros_sandbox.utilities.content_hash import FileHashCache
+
+# Top level directories of a merged install space; the package name is the directory below them.
+_MERGED_INSTALL_DIRECTORIES = ('bin', 'include', 'lib', 'share')
+
+
+def affected_packages(paths: Iterable[str]) -> Set[str]:
+    """
+    Return the names of the packages owning the given install space paths.
+
+    Both isolated ('<package>/lib/...') and merged ('lib/<package>/...') install spaces are
+    supported, as are Python packages installed in 'site-packages'. Paths that do not belong to a
+    single package, such as the workspace's setup files, are ignored.
+    """
+    packages = set()
+    for path in paths:
+        parts = path.split('/')
+        if 'site-packages' in parts[:-1]:
+            packages.add(parts[parts.index('site-packages') + 1])
+        elif parts[0] in _MERGED_INSTALL_DIRECTORIES:
+            if len(parts) > 2:
+                packages.add(parts[1])
+        elif len(parts) > 1:
+            packages.add(parts[0])
+    return packages
+
+
+class WorkspaceSync:
+    """WorkspaceSync detects the files changed in a workspace directory since the last sync."""
+
+    def __init__(
+        self,
+        root: str,
+        hash_cache: Optional[FileHashCache] = None
+    ) -> None:
+        """
+        Construct the WorkspaceSync for the workspace directory 'root'.
+
+        :param: hash_cache is the cache of the hashes of the workspace files. Defaults to the
+        persistent FileHashCache; it is not saved by the WorkspaceSync.
+        """
+        self._root = root
+        self._hash_cache = hash_cache if hash_cache is not None else FileHashCache()
+        # Maps each file path relative to the root to its size, modification time and hash.
+        self._manifest = {}  # type: Dict[str, list]
+        # Stat signatures of the changes seen by the last poll, to detect when they settle.
+        self._pending = None  # type: Optional[Dict[str, Tuple[int, int]]]
+
+    @property
+    def root(self) -> str:
+        """Return the workspace directory."""
+        return self._root
+
+    @property
+    def hash_cache(self) -> FileHashCache:
+        """Return the cache of the hashes of the workspace files."""
+        return self._hash_cache
+
+    def _stat_files(self) -> Dict[str, Tuple[int, int]]:
+        """Return the size and modification time of every file in the workspace."""
+        files = {}
+        for dir_path, _, file_names in os.walk(self._root):
+            for name in file_names:
+                path = os.path.join(dir_path, name)
+                try:
+                    stat_result = os.stat(path)
+                except OSError:
+                    continue  # Removed while walking, or a dangling symbolic link
+                files[os.path.relpath(path, self._root)] = \
+                    (stat_result.st_size, stat_result.st_mtime_ns)
+        return files
+
+    def snapshot(self) -> None:
+        """Record the current content of the workspace as synchronized."""
+        self._manifest = {
+            path: [size, mtime_ns, self._hash_cache.hash_file(os.path.join(self._root, path))]
+            for path, (size, mtime_ns) in self._stat_files().items()
+        }
+        self._pending = None
+
+    def poll(self) -> Optional[Tuple[List[str], List[str]]]:
+        """
+        Return the files changed and removed since the last sync, once the changes are stable.
+
+        Returns None if nothing changed or the changes are still in progress. The returned
+        changes are considered synchronized.
+        """
+        files = self._stat_files()
+        candidates = {
+            path: signature for path, signature in files.items()
+            if self._manifest.get(path, [None, None])[:2] != list(signature)
+        }
+        removed = sorted(path for path in self._manifest if path not in files)
+        if not candidates and not removed:
+            self._pending = None
+            return None
+
+        pending = dict(candidates, **{path: (-1, -1) for path in removed})
+        if pending != self._pending:
+            self._pending = pending
+            return None
+        self._pending = None
+
+        changed = []
+        for path, (size, mtime_ns) in sorted(candidates.items()):
+            try:
+                digest = self._hash_cache.hash_file(os.path.join(self._root, path))
+            except OSError:
+                continue
+            if self._manifest.get(path, [None, None, None])[2] != digest:
+                changed.append(path)
+            self._manifest[path] = [size, mtime_ns, digest]
+        for path in removed:
+            del self._manifest[path]
+
+        if not changed and not removed:
+            return None
+        return changed, removed
+
+    def create_archive(self, paths: List[str]) -> IO[bytes]:
+        """
+        Return a tar archive of the given workspace files, positioned at its start.
+
+        The archive is spooled to disk if it grows large.
+        """
+        archive = tempfile.SpooledTemporaryFile(max_size=1 << 24)
+        with tarfile.open(fileobj=archive, mode='w') as tar:
+            for path in paths:
+                tar.add(os.path.join(self._root, path), arcname=path, recursive=False)
+        archive.seek(0)
+        return archive
@@ -0,0 +1,56 @@
+# Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Module for the 'ros2 sandbox broker' verb."""
+
+import asyncio
+import signal
+
+from ros2cli.verb import VerbExtension
+
+from launch_ros_sandbox.utilities.container_broker import ContainerBroker
+from launch_ros_sandbox.utilities.container_broker import default_broker_socket
+
+
+def _raise_keyboard_interrupt(signum, frame) -> None:
+    """Turn SIGTERM into the same clean shutdown as SIGINT."""
+    raise KeyboardInterrupt()
+
+
+class BrokerVerb(VerbExtension):
+    """Run the broker keeping warm containers for Docker sandboxes."""
+
+    def add_arguments(self, parser, cli_name):
+        """Add the arguments of 'ros2 sandbox broker'."""
+        parser.add_argument(
+            '--socket', default=default_broker_socket(),
+            help='Unix socket to listen on (default: %(default)s)')
+        parser.add_argument(
+            '--pool-size', type=int, default=1,
+            help='Number of warm containers kept per image and run arguments (default: 1)')
+
+    def main(self, *, args):
+        """Serve until interrupted, then remove the warm containers."""
+        if args.pool_size < 1:
+            return '--pool-size must be at least 1'
+
+        signal.signal(signal.SIGTERM, _raise_keyboard_interrupt)
+        broker = ContainerBroker(socket_path=args.socket, pool_size=args.pool_size)
+        try:
+            asyncio.run(broker.serve())
+        except KeyboardInterrupt:
+            pass
+        except PermissionError as ex:
+            return 'Unable to listen for requests: {}'.format(ex)
+        return 0
@@ -0,0 +1,62 @@
+# Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Module for the 'ros2 sandbox gc' verb."""
+
+import docker
+from docker.errors import APIError
+
+from ros2cli.verb import VerbExtension
+
+from launch_ros_sandbox.utilities.labels import owner_is_alive
+from launch_ros_sandbox.utilities.labels import REATTACH_LABEL
+from launch_ros_sandbox.utilities.labels import sandbox_filters
+
+
+class GcVerb(VerbExtension):
+    """Remove the Docker sandbox containers whose owning launch process is gone."""
+
+    def add_arguments(self, parser, cli_name):
+        """Add the arguments of 'ros2 sandbox gc'."""
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Only print the containers which would be removed')
+        parser.add_argument(
+            '--include-reattachable', action='store_true',
+            help='Also remove containers left running on purpose to be reattached to')
+
+    def main(self, *, args):
+        """Remove every orphaned sandbox container of this host."""
+        docker_client = docker.from_env()
+        failed = False
+        try:
+            for container in docker_client.containers.list(all=True, filters=sandbox_filters()):
+                labels = container.labels
+                if owner_is_alive(labels):
+                    continue
+                if labels.get(REATTACH_LABEL) == 'true' and not args.include_reattachable:
+                    continue
+
+                print('Removing {}'.format(container.name))
+                if args.dry_run:
+                    continue
+                try:
+                    container.remove(force=True)
+                except APIError as ex:
+                    print('Unable to remove {}: {}'.format(container.name, ex))
+                    failed = True
+        finally:
+            docker_client.close()
+
+        return 1 if failed else 0
@@ -0,0 +1,122 @@
+# Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Module for the 'ros2 sandbox lock' verb.
+
+The verb generates or refreshes a Docker image lockfile. Images are given on the command line or
+collected from the DockerPolicy of every SandboxedNodeContainer in a launch file. Running the verb
+without any image refreshes every image already in the lockfile.
+"""
+
+import os
+from typing import Iterable
+from typing import Iterator
+from typing import List
+
+import docker
+from docker.errors import APIError
+from docker.errors import ImageNotFound
+
+from launch import LaunchDescriptionEntity
+from launch.launch_description_sources import get_launch_description_from_python_launch_file
+
+from ros2cli.verb import VerbExtension
+
+from launch_ros_sandbox.actions import SandboxedNodeContainer
+from launch_ros_sandbox.descriptions import DockerPolicy
+from launch_ros_sandbox.utilities.image_lock import ImageLock
+from launch_ros_sandbox.utilities.image_lock import resolve_image
+
+_DEFAULT_LOCKFILE = 'sandbox.lock'
+
+
+def _iterate_entities(
+    entities: Iterable[LaunchDescriptionEntity]
+) -> Iterator[LaunchDescriptionEntity]:
+    """Walk the launch description entities that can be described without a context."""
+    for entity in entities:
+        yield entity
+        yield from _iterate_entities(entity.describe_sub_entities())
+        for _, sub_entities in entity.describe_conditional_sub_entities():
+            yield from _iterate_entities(sub_entities)
+
+
+def _collect_launch_file_images(launch_file: str) -> List[str]:
+    """Return the image names of every DockerPolicy used in a Python launch file."""
+    launch_description = get_launch_description_from_python_launch_file(launch_file)
+
+    images = []
+    for entity in _iterate_entities(launch_description.entities):
+        if isinstance(entity, SandboxedNodeContainer) and \
+                isinstance(entity.policy, DockerPolicy):
+            images.append(entity.policy.image_name)
+    return images
+
+
+class LockVerb(VerbExtension):
+    """Generate or refresh the lockfile pinning Docker sandbox images to their digests."""
+
+    def add_arguments(self, parser, cli_name):
+        """Add the arguments of 'ros2 sandbox lock'."""
+        parser.add_argument(
+            'images', nargs='*', metavar='IMAGE',
+            help='Docker images to pin, as repository:tag')
+        parser.add_argument(
+            '--launch-file', action='append', default=[],
+            help='Pin the images of every DockerPolicy in this Python launch file')
+        parser.add_argument(
+            '--lockfile', default=_DEFAULT_LOCKFILE,
+            help='Path of the lockfile to write (default: {})'.format(_DEFAULT_LOCKFILE))
+        parser.add_argument(
+            '--pull', action='store_true',
+            help='Pull the images from their registry first to pin the latest content of each tag')
+
+    def main(self, *, args):
+        """Resolve every image to its digest and write the lockfile."""
+        lock = ImageLock()
+        if os.path.exists(args.lockfile):
+            try:
+                lock = ImageLock.load(args.lockfile)
+            except (OSError, ValueError) as ex:
+                return 'Unable to read lockfile "{}": {}'.format(args.lockfile, ex)
+
+        image_names = list(args.images)
+        for launch_file in args.launch_file:
+            image_names += _collect_launch_file_images(launch_file)
+        if not image_names:
+            image_names = list(lock.images.keys())
+        if not image_names:
+            return 'No images to lock; pass images or a launch file using DockerPolicy'
+
+        docker_client = docker.from_env()
+        try:
+            for image_name in sorted(set(image_names)):
+                try:
+                    if args.pull:
+                        print('Pulling {}'.format(image_name))
+                        docker_client.images.pull(image_name)
+                    image_id, digest = resolve_image(docker_client, image_name)
+                except ImageNotFound:
+                    return 'Image "{}" not found; pull it first or pass --pull'.format(image_name)
+                except APIError as ex:
+                    return 'Unable to lock image "{}": {}'.format(image_name, ex)
+
+                lock.pin(image_name, image_id=image_id, digest=digest)
+                print('{} -> {}'.format(image_name, lock.pinned_reference(image_name)))
+        finally:
+            docker_client.close()
+
+        lock.save(args.lockfile)
+        return 0
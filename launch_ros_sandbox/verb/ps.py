@@ -0,0 +1,63 @@
+# Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Module for the 'ros2 sandbox ps' verb."""
+
+import docker
+
+from ros2cli.verb import VerbExtension
+
+from launch_ros_sandbox.utilities.labels import LAUNCH_ID_LABEL
+from launch_ros_sandbox.utilities.labels import OWNER_HOST_LABEL
+from launch_ros_sandbox.utilities.labels import owner_is_alive
+from launch_ros_sandbox.utilities.labels import OWNER_PID_LABEL
+from launch_ros_sandbox.utilities.labels import REATTACH_LABEL
+from launch_ros_sandbox.utilities.labels import sandbox_filters
+
+_ROW_FORMAT = '{:<40} {:<10} {:<30} {:<12} {}'
+
+
+class PsVerb(VerbExtension):
+    """List the Docker sandbox containers and the launch processes owning them."""
+
+    def add_arguments(self, parser, cli_name):
+        """Add the arguments of 'ros2 sandbox ps'."""
+        parser.add_argument(
+            '-a', '--all', action='store_true',
+            help='Also list sandbox containers which are not running')
+
+    def main(self, *, args):
+        """Print one line per sandbox container."""
+        docker_client = docker.from_env()
+        try:
+            containers = docker_client.containers.list(all=args.all, filters=sandbox_filters())
+        finally:
+            docker_client.close()
+
+        print(_ROW_FORMAT.format('NAME', 'STATUS', 'OWNER', 'LAUNCH ID', 'IMAGE'))
+        for container in containers:
+            labels = container.labels
+            owner = '{}:{}'.format(
+                labels.get(OWNER_HOST_LABEL, '?'), labels.get(OWNER_PID_LABEL, '?'))
+            if not owner_is_alive(labels):
+                owner += ' (gone)'
+            elif labels.get(REATTACH_LABEL) == 'true':
+                owner += ' (reattach)'
+            print(_ROW_FORMAT.format(
+                container.name,
+                container.status,
+                owner,
+                labels.get(LAUNCH_ID_LABEL, '')[:12],
+                container.attrs.get('Config', {}).get('Image', '')))
+        return 0
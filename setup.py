@@ -35,6 +35,17 @@ setup(
         'docker',
     ],
     zip_safe=True,
+    entry_points={
+        'ros2cli.command': [
+            'sandbox = launch_ros_sandbox.command.sandbox:SandboxCommand',
+        ],
+        'launch_ros_sandbox.verb': [
+            'broker = launch_ros_sandbox.verb.broker:BrokerVerb',
+            'gc = launch_ros_sandbox.verb.garbage_collect:GcVerb',
+            'lock = launch_ros_sandbox.verb.lock:LockVerb',
+            'ps = launch_ros_sandbox.verb.ps:PsVerb',
+        ],
+    },
     description='Sandbox extension to ROS 2 Launch.',
     license='Apache License, Version 2.0',
     tests_require=[
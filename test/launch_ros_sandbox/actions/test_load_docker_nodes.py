@@ -0,0 +1,785 @@
+# Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the internal helpers of the LoadDockerNodes action."""
+
+import asyncio
+import gzip
+import logging
+import os
+import socket
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+import unittest.mock
+
+from launch.events.process import ProcessExited
+from launch.events.process import ProcessStarted
+
+from launch_ros_sandbox.actions.load_docker_nodes import _containerized_cmd
+from launch_ros_sandbox.actions.load_docker_nodes import _DockerNode
+from launch_ros_sandbox.actions.load_docker_nodes import _PullProgress
+from launch_ros_sandbox.actions.load_docker_nodes import _with_volume
+from launch_ros_sandbox.actions.load_docker_nodes import LoadDockerNodes
+from launch_ros_sandbox.descriptions.docker_policy import DockerPolicy
+from launch_ros_sandbox.descriptions.file_log_sink import FileLogSink
+from launch_ros_sandbox.descriptions.log_limits import LogLimits
+from launch_ros_sandbox.descriptions.respawn import Respawn
+from launch_ros_sandbox.descriptions.sandboxed_node import SandboxedNode
+from launch_ros_sandbox.events import ContainerDied
+from launch_ros_sandbox.events import ContainerKilled
+from launch_ros_sandbox.events import ContainerOutOfMemory
+from launch_ros_sandbox.utilities.labels import owner_labels
+from launch_ros_sandbox.utilities.labels import OWNER_START_LABEL
+from launch_ros_sandbox.utilities.log_writer import FileSinkHandler
+from launch_ros_sandbox.utilities.node_output import LogPump
+from launch_ros_sandbox.utilities.node_output import LogQueue
+from launch_ros_sandbox.utilities.node_output import PID_HEADER
+from launch_ros_sandbox.utilities.node_output import PidHeader
+from launch_ros_sandbox.utilities.node_supervisor import encode_frame
+from launch_ros_sandbox.utilities.output_history import OutputHistory
+from launch_ros_sandbox.utilities.respawn_backoff import RespawnBackoff
+
+
+class TestContainerizedCmd(unittest.TestCase):
+
+    def test_cmd_runs_node_through_entrypoint(self) -> None:
+        """Verify the node is run with 'ros2 run' through the entrypoint."""
+        assert _containerized_cmd('/ros_entrypoint.sh', 'foo', 'bar') == \
+            ['/ros_entrypoint.sh', 'ros2', 'run', 'foo', 'bar']
+
+    def test_cmd_sources_overlay(self) -> None:
+        """Verify the overlay is sourced before the node is run."""
+        cmd = _containerized_cmd('/ros_entrypoint.sh', 'foo', 'bar', overlay='/overlay')
+
+        assert cmd == [
+            '/ros_entrypoint.sh', '/bin/bash', '-c',
+            'source /overlay/local_setup.bash && exec "$@"', 'bash',
+            'ros2', 'run', 'foo', 'bar'
+        ]
+
+
+# Stand-in for 'ros2 run', which runs the node as its child and does not pass SIGINT on to it.
+_ROS2_RUN = """
+import subprocess, sys
+node = subprocess.Popen(sys.argv[1:])
+while True:
+    try:
+        sys.exit(node.wait())
+    except KeyboardInterrupt:
+        pass
+"""
+
+# Stand-in for a node, which reports that it runs and that it was interrupted in the given files.
+_NODE = """
+import signal, sys, time
+def interrupted(signum, frame):
+    open(sys.argv[2], 'w').close()
+    sys.exit(0)
+signal.signal(signal.SIGINT, interrupted)
+open(sys.argv[1], 'w').close()
+while True:
+    time.sleep(0.01)
+"""
+
+
+class TestDockerNodeSession(unittest.TestCase):
+
+    def _wait_for(self, path: str) -> None:
+        deadline = time.monotonic() + 10.0
+        while not os.path.exists(path) or not os.path.getsize(path) and path.endswith('.pid'):
+            assert time.monotonic() < deadline, 'timed out waiting for ' + path
+            time.sleep(0.01)
+
+    def test_signal_reaches_the_node_started_by_ros2_run(self) -> None:
+        """Verify SIGINT is sent to the whole session of a node, including its grandchild."""
+        with tempfile.TemporaryDirectory() as directory, unittest.mock.patch(
+                'launch_ros_sandbox.actions.load_docker_nodes._CONTAINER_STATE_DIRECTORY',
+                directory):
+            running = os.path.join(directory, 'running')
+            interrupted = os.path.join(directory, 'interrupted')
+            node = _DockerNode(index=0, package='demo_nodes_cpp', executable='talker', cmd=[
+                sys.executable, '-c', _ROS2_RUN, sys.executable, '-c', _NODE, running, interrupted
+            ])
+
+            # Like a docker exec, the command starts as the leader of a process group.
+            process = subprocess.Popen(node.exec_cmd, start_new_session=True)
+            try:
+                self._wait_for(node.pidfile)
+                self._wait_for(running)
+                subprocess.run(node.signal_cmd('INT'), check=True)
+
+                assert process.wait(timeout=10.0) == 0
+                assert os.path.exists(interrupted)
+            finally:
+                if process.poll() is None:
+                    subprocess.run(node.signal_cmd('KILL'))
+                    process.kill()
+                    process.wait()
+
+    def test_group_wait_outlasts_ros2_run(self) -> None:
+        """Verify the wait for a node ends only once the node started by 'ros2 run' exited too."""
+        with tempfile.TemporaryDirectory() as directory, unittest.mock.patch(
+                'launch_ros_sandbox.actions.load_docker_nodes._CONTAINER_STATE_DIRECTORY',
+                directory):
+            node = _DockerNode(index=0, package='demo_nodes_cpp', executable='talker', cmd=[
+                '/bin/sh', '-c', 'sleep 30 & exit 0'
+            ])
+
+            # The session leader exits right away, while its child keeps running.
+            subprocess.run(node.exec_cmd, start_new_session=True, check=True)
+            try:
+                assert subprocess.run(node.group_wait_cmd(0.1)).returncode == 1
+            finally:
+                subprocess.run(node.signal_cmd('KILL'))
+            assert subprocess.run(node.group_wait_cmd(5.0)).returncode == 0
+
+    def test_pid_header_comes_first(self) -> None:
+        """Verify the PID of a node inside the container is written before the node's output."""
+        with tempfile.TemporaryDirectory() as directory, unittest.mock.patch(
+                'launch_ros_sandbox.actions.load_docker_nodes._CONTAINER_STATE_DIRECTORY',
+                directory):
+            node = _DockerNode(index=0, package='demo_nodes_cpp', executable='talker', cmd=[
+                '/bin/sh', '-c', 'echo $$'
+            ])
+            process = subprocess.run(node.exec_cmd, start_new_session=True, check=True,
+                                     stdout=subprocess.PIPE)
+            with open(node.pidfile) as f:
+                recorded_pid = int(f.read())
+
+        pid_header = PidHeader()
+        output = pid_header.feed(process.stdout)
+        assert pid_header.pid == recorded_pid
+        assert int(output) == recorded_pid
+
+    def test_pid_is_written_next_to_the_log_file(self) -> None:
+        """Verify a node writing its output to a file writes its PID to a file of its own."""
+        with tempfile.TemporaryDirectory() as directory, unittest.mock.patch(
+                'launch_ros_sandbox.actions.load_docker_nodes._CONTAINER_STATE_DIRECTORY',
+                directory):
+            node = _DockerNode(index=0, package='demo_nodes_cpp', executable='talker', cmd=[
+                '/bin/sh', '-c', 'echo $$'
+            ])
+            log_file, pid_file, exit_file = (
+                os.path.join(directory, 'talker' + suffix) for suffix in ('.log', '.pid', '.exit'))
+            subprocess.run(node.log_file_exec_cmd(log_file, pid_file, exit_file),
+                           start_new_session=True, check=True)
+
+            with open(log_file) as f, open(pid_file) as g, open(exit_file) as h:
+                assert (int(f.read()), h.read()) == (int(g.read()), '0\n')
+
+
+class TestWithVolume(unittest.TestCase):
+
+    def test_volume_is_added_to_either_form(self) -> None:
+        """Verify the bind mount is added to volumes given as a dict or a list, or none at all."""
+        assert _with_volume(None, '/logs', '/var/log') == \
+            {'/logs': {'bind': '/var/log', 'mode': 'rw'}}
+        assert _with_volume({'/data': {'bind': '/data'}}, '/logs', '/var/log') == \
+            {'/data': {'bind': '/data'}, '/logs': {'bind': '/var/log', 'mode': 'rw'}}
+        assert _with_volume(['/data:/data'], '/logs', '/var/log') == \
+            ['/data:/data', '/logs:/var/log:rw']
+
+
+class TestPullProgress(unittest.TestCase):
+
+    def test_progress_is_aggregated_over_layers(self) -> None:
+        """Verify the pull progress sums up the progress of each layer."""
+        progress = _PullProgress('foo:bar', unittest.mock.Mock(), clock=lambda: 0.0)
+
+        progress.update({'id': 'a', 'status': 'Downloading',
+                         'progressDetail': {'current': 1000000, 'total': 2000000}})
+        progress.update({'id': 'b', 'status': 'Already exists'})
+        progress.update({'id': 'c', 'status': 'Downloading',
+                         'progressDetail': {'current': 500000, 'total': 1000000}})
+        progress.update({'id': 'c', 'status': 'Download complete'})
+
+        assert progress.summary() == \
+            'Pulling image foo:bar: 2/3 layers complete, 2.0/3.0 MB downloaded'
+
+    def test_progress_reports_are_throttled(self) -> None:
+        """Verify progress is only logged once per interval."""
+        now = [0.0]
+        logger = unittest.mock.Mock()
+        progress = _PullProgress('foo:bar', logger, interval=1.0, clock=lambda: now[0])
+
+        for _ in range(10):
+            now[0] += 0.25
+            progress.update({'id': 'a', 'status': 'Downloading',
+                             'progressDetail': {'current': 1, 'total': 2}})
+
+        assert logger.info.call_count == 2
+
+
+class TestLoadNodesInDocker(unittest.TestCase):
+
+    def setUp(self) -> None:
+        patcher = unittest.mock.patch(
+            'launch_ros_sandbox.actions.load_docker_nodes.lease_docker_client')
+        self.docker_client = patcher.start().return_value.client
+        self.addCleanup(patcher.stop)
+
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+        self.context = unittest.mock.Mock(asyncio_loop=self.loop)
+
+    def _socketpair(self):
+        pair = socket.socketpair()
+        for end in pair:
+            self.addCleanup(end.close)
+        return pair
+
+    def _load_docker_nodes(self, node_count: int) -> LoadDockerNodes:
+        node_descriptions = [
+            SandboxedNode(package='demo_nodes_cpp', node_executable='talker')
+            for _ in range(node_count)
+        ]
+        action = LoadDockerNodes(DockerPolicy(), node_descriptions)
+        action._container = unittest.mock.Mock(id='container')
+        action._container.exec_run.return_value = (0, b'')
+        action._nodes = [
+            _DockerNode(index=index, package='demo_nodes_cpp', executable='talker',
+                        cmd=['ros2', 'run', 'demo_nodes_cpp', 'talker'])
+            for index in range(node_count)
+        ]
+        return action
+
+    def test_execs_are_started_concurrently(self) -> None:
+        """Verify the execs of all nodes are created concurrently and their IDs are recorded."""
+        action = self._load_docker_nodes(4)
+        lock = threading.Lock()
+        exec_count = [0]
+
+        def exec_create(container, cmd, tty):
+            time.sleep(0.2)
+            with lock:
+                exec_count[0] += 1
+                return {'Id': 'exec-{}'.format(exec_count[0])}
+
+        def exec_start(exec_id, detach, tty, socket):
+            # The node exits right away, so its output ends.
+            host, container = self._socketpair()
+            container.close()
+            return host
+
+        self.docker_client.api.exec_create.side_effect = exec_create
+        self.docker_client.api.exec_start.side_effect = exec_start
+
+        start = time.monotonic()
+        self.loop.run_until_complete(action._load_nodes_in_docker(self.context))
+
+        assert time.monotonic() - start < 0.6
+        assert sorted(node.exec_id for node in action._nodes) == \
+            ['exec-1', 'exec-2', 'exec-3', 'exec-4']
+        self.loop.run_until_complete(asyncio.gather(*[node.log_future for node in action._nodes]))
+
+    def test_supervisor_reports_node_exits(self) -> None:
+        """Verify the exit status reported by the supervisor completes each node's future."""
+        action = self._load_docker_nodes(2)
+        for node in action._nodes:
+            node.log_future = self.loop.create_future()
+
+        stream = encode_frame(b's', 0, b'42') + encode_frame(b'o', 0, b'hello\n') + \
+            encode_frame(b'x', 0, b'0') + encode_frame(b'e', 1, b'No such file')
+        # Docker multiplexes the supervisor's stdout into frames of its own.
+        host, container = socket.socketpair()
+        container.sendall(struct.pack('>BxxxL', 1, len(stream)) + stream)
+        container.close()
+        action._supervisor_socket = host
+
+        self.loop.run_until_complete(
+            self.loop.run_in_executor(None, action._read_supervisor, self.loop))
+        results = self.loop.run_until_complete(
+            asyncio.gather(*[node.log_future for node in action._nodes]))
+        host.close()
+
+        assert results == [0, None]
+
+    def test_node_output_is_read_on_the_event_loop(self) -> None:
+        """Verify node output is forwarded without a thread per node."""
+        action = self._load_docker_nodes(3)
+        sockets = [self._socketpair() for _ in action._nodes]
+        self.docker_client.api.exec_create.return_value = {'Id': 'exec'}
+        self.docker_client.api.exec_start.side_effect = [host for host, _ in sockets]
+        logger = logging.getLogger('test_load_docker_nodes')
+        for node in action._nodes:
+            node.logger = logger
+
+        with self.assertLogs(logger, level='INFO') as logs:
+            self.loop.run_until_complete(action._load_nodes_in_docker(self.context))
+            for index, (_, container) in enumerate(sockets):
+                container.sendall('hello from {}\n'.format(index).encode())
+                container.close()
+            self.loop.run_until_complete(
+                asyncio.gather(*[node.log_future for node in action._nodes]))
+
+        assert action._executor is None
+        assert sorted(record.getMessage() for record in logs.records) == \
+            ['hello from 0', 'hello from 1', 'hello from 2']
+
+    def test_node_streams_are_separated_without_tty(self) -> None:
+        """Verify a node without a TTY logs stdout with INFO and stderr with WARNING severity."""
+        action = self._load_docker_nodes(1)
+        action._policy = DockerPolicy(tty=False)
+        node = action._nodes[0]
+        node.logger = logging.getLogger('test_load_docker_nodes')
+        host, container = self._socketpair()
+        self.docker_client.api.exec_create.return_value = {'Id': 'exec'}
+        self.docker_client.api.exec_start.return_value = host
+
+        with self.assertLogs(node.logger, level='INFO') as logs:
+            self.loop.run_until_complete(action._load_nodes_in_docker(self.context))
+            for stream, payload in ((1, b'hello\nwor'), (2, b'oops\r\n'), (1, b'ld\n')):
+                container.sendall(struct.pack('>BxxxL', stream, len(payload)) + payload)
+            container.close()
+            self.loop.run_until_complete(node.log_future)
+
+        _, kwargs = self.docker_client.api.exec_start.call_args
+        assert kwargs['tty'] is False
+        assert [(record.levelname, record.getMessage()) for record in logs.records] == \
+            [('INFO', 'hello'), ('WARNING', 'oops'), ('INFO', 'world')]
+
+    def test_node_output_is_split_into_lines(self) -> None:
+        """Verify lines and characters split across chunks are logged once they are complete."""
+        action = self._load_docker_nodes(1)
+        node = action._nodes[0]
+        logger = logging.getLogger('test_load_docker_nodes')
+        for node in action._nodes:
+            node.logger = logger
+        output = 'first line\r\nsecond \u00fcber line\r\nlast line'.encode()
+
+        with self.assertLogs(logger, level='INFO') as logs:
+            action._handle_logs(node, [output[i:i + 3] for i in range(0, len(output), 3)])
+
+        assert [record.getMessage() for record in logs.records] == \
+            ['first line', 'second \u00fcber line', 'last line']
+
+    def test_empty_node_list(self) -> None:
+        """Verify a sandbox without nodes can be constructed and loaded."""
+        action = self._load_docker_nodes(0)
+
+        self.loop.run_until_complete(action._load_nodes_in_docker(self.context))
+
+    def test_each_node_gets_its_own_logger(self) -> None:
+        """Verify each node logs to a logger named after the container and the node."""
+        with tempfile.TemporaryDirectory() as directory:
+            sink = FileLogSink(directory=directory)
+            node_descriptions = [
+                SandboxedNode(package='demo_nodes_cpp', node_executable='talker', log_sink=sink),
+                SandboxedNode(package='demo_nodes_cpp', node_executable='talker'),
+                SandboxedNode(package='demo_nodes_cpp', node_executable='listener',
+                              node_name='my_listener'),
+            ]
+            action = LoadDockerNodes(DockerPolicy(container_name='sandbox'), node_descriptions)
+
+            action._resolve_nodes(self.context)
+
+            assert [node.logger.name for node in action._nodes] == \
+                ['sandbox.talker', 'sandbox.talker-1', 'sandbox.my_listener']
+            handler = action._nodes[0].log_handler
+            assert handler in action._nodes[0].logger.handlers
+            assert action._nodes[1].log_handler is None
+
+            action._close_node_logs()
+            assert handler not in action._nodes[0].logger.handlers
+
+    def test_log_output_is_rate_limited(self) -> None:
+        """Verify lines over the rate limit are suppressed and their number is reported."""
+        policy = DockerPolicy(log_limits=LogLimits(node_rate=0.001, node_burst=2))
+        action = LoadDockerNodes(policy, [])
+        logger = logging.getLogger('test_load_docker_nodes')
+        action._nodes = [
+            _DockerNode(index=0, package='demo_nodes_cpp', executable='talker',
+                        cmd=['ros2', 'run', 'demo_nodes_cpp', 'talker'], logger=logger)
+        ]
+        node = action._nodes[0]
+
+        with self.assertLogs(logger, level='INFO') as logs:
+            action._start_log_limits()
+            action._handle_logs(node, [b'one\ntwo\nthree\n', b'four\n'])
+            # Stopping waits until the queued lines are logged.
+            self.loop.run_until_complete(action._stop_log_limits(self.loop))
+            assert not action._log_pump.is_alive()
+
+        assert [record.getMessage() for record in logs.records] == \
+            ['one', 'two', '[2 lines suppressed by the log rate limit]']
+        assert node.suppressed_total == 2
+
+    def test_abnormal_exit_logs_recent_output(self) -> None:
+        """Verify the history of a node which fails is logged, and can be queried."""
+        action = self._load_docker_nodes(1)
+        node = action._nodes[0]
+        node.logger = logging.getLogger('sandbox.talker')
+        node.history = OutputHistory(1024)
+        action._completed_future = self.loop.create_future()
+        host, container = self._socketpair()
+        self.docker_client.api.exec_create.return_value = {'Id': 'exec'}
+        self.docker_client.api.exec_start.return_value = host
+        self.docker_client.api.exec_inspect.return_value = {'ExitCode': 2}
+
+        action_logger = logging.getLogger('launch_ros_sandbox.actions.load_docker_nodes')
+        with self.assertLogs(action_logger, level='ERROR') as logs:
+            self.loop.run_until_complete(action._load_nodes_in_docker(self.context))
+            container.sendall(b'starting\nfatal error\n')
+            container.close()
+            returncode = self.loop.run_until_complete(node.log_future)
+
+        assert returncode == 2
+        self.docker_client.api.exec_inspect.assert_called_with('exec')
+        assert logs.records[0].getMessage() == \
+            '"sandbox.talker" exited with 2; its last 2 lines of output:\nstarting\nfatal error'
+        assert action.recent_output() == {'sandbox.talker': ['starting', 'fatal error']}
+        assert action.recent_output(1) == {'sandbox.talker': ['fatal error']}
+
+    def test_node_lifecycle_events_are_emitted(self) -> None:
+        """Verify the start and the exit of a node are emitted with its PID and exit code."""
+        action = self._load_docker_nodes(1)
+        node = action._nodes[0]
+        action._context = self.context
+        action._completed_future = self.loop.create_future()
+        host, container = self._socketpair()
+        self.docker_client.api.exec_create.return_value = {'Id': 'exec'}
+        self.docker_client.api.exec_start.return_value = host
+        # Docker often knows no PID for an exec, so the node's wrapper writes it first.
+        self.docker_client.api.exec_inspect.return_value = {'Pid': 0, 'ExitCode': 1}
+        user_action = unittest.mock.Mock()
+        action.report_events_as(user_action)
+
+        self.loop.run_until_complete(action._load_nodes_in_docker(self.context))
+        container.sendall(PID_HEADER + b'42\r\nhello\r\n')
+        container.close()
+        self.loop.run_until_complete(node.log_future)
+
+        started, exited = [call[0][0] for call in self.context.emit_event_sync.call_args_list]
+        assert isinstance(started, ProcessStarted)
+        assert (started.action, started.pid, started.cmd) == (user_action, 42, node.cmd)
+        assert exited.action is user_action
+        assert isinstance(exited, ProcessExited)
+        assert (exited.pid, exited.returncode) == (42, 1)
+
+    def test_supervised_node_exit_is_emitted_once(self) -> None:
+        """Verify a node is reported as exited once, although the supervisor stream ends later."""
+        action = self._load_docker_nodes(1)
+        node = action._nodes[0]
+        action._context = self.context
+
+        node.pid = 7
+        action._node_started(node)
+        action._node_exited(node, 0)
+        action._node_exited(node, None)
+
+        events = [call[0][0] for call in self.context.emit_event_sync.call_args_list]
+        assert [type(event) for event in events] == [ProcessStarted, ProcessExited]
+        assert events[1].returncode == 0
+
+    def test_failed_node_is_respawned_alone(self) -> None:
+        """Verify only the node which exited is run again, after its backoff delay."""
+        action = self._load_docker_nodes(2)
+        action._context = self.context
+        action._completed_future = self.loop.create_future()
+        failed = action._nodes[1]
+        failed.backoff = RespawnBackoff(Respawn(initial_delay=0.01, jitter=0.0))
+        execs = []
+
+        async def exec_node(context, node):
+            execs.append(node.index)
+        action._exec_node = exec_node
+
+        action._node_started(failed)
+        action._node_exited(failed, 1)
+        assert failed.respawn_task is not None
+        self.loop.run_until_complete(failed.respawn_task)
+
+        assert execs == [1]
+        assert failed.backoff.restarts == 1
+
+    def test_respawn_is_cancelled_on_shutdown(self) -> None:
+        """Verify a node waiting to respawn is not run again once the launch shuts down."""
+        action = self._load_docker_nodes(1)
+        action._context = self.context
+        action._completed_future = self.loop.create_future()
+        node = action._nodes[0]
+        node.backoff = RespawnBackoff(Respawn(initial_delay=10.0))
+
+        action._node_started(node)
+        action._node_exited(node, 1)
+        task = node.respawn_task
+        action._cancel_respawns()
+
+        with self.assertRaises(asyncio.CancelledError):
+            self.loop.run_until_complete(task)
+
+    def test_stopped_node_exit_is_not_reported(self) -> None:
+        """Verify the history of a node stopped on purpose is not logged."""
+        action = self._load_docker_nodes(1)
+        node = action._nodes[0]
+        node.history = OutputHistory(1024)
+        node.history.append(['interrupted'])
+        node.stopping = True
+        action._completed_future = self.loop.create_future()
+
+        with unittest.mock.patch.object(action, '_LoadDockerNodes__logger') as logger:
+            action._node_exited(node, -2)
+
+        logger.error.assert_not_called()
+
+    def test_container_death_completes_the_action(self) -> None:
+        """Verify the Docker events of the container are emitted and its death completes it."""
+        action = self._load_docker_nodes(1)
+        action._context = self.context
+        action._container.name = 'sandbox'
+        completed_future = self.loop.create_future()
+        action._completed_future = completed_future
+
+        action._handle_container_event(
+            {'Action': 'oom', 'id': 'container', 'Actor': {'Attributes': {}}})
+        action._handle_container_event(
+            {'Action': 'kill', 'id': 'container', 'Actor': {'Attributes': {'signal': '9'}}})
+        action._handle_container_event(
+            {'Action': 'die', 'id': 'container', 'Actor': {'Attributes': {'exitCode': '137'}}})
+
+        oom, killed, died = [call[0][0] for call in self.context.emit_event_sync.call_args_list]
+        assert isinstance(oom, ContainerOutOfMemory)
+        assert isinstance(killed, ContainerKilled) and killed.signal == 9
+        assert isinstance(died, ContainerDied)
+        assert (died.action, died.container_name) == (action, 'sandbox')
+        assert (died.exit_code, died.reason) == (137, 'oom')
+        assert completed_future.done()
+        assert action.get_asyncio_future() is None
+
+    def test_shutdown_stops_nodes_then_container(self) -> None:
+        """Verify all nodes get SIGINT at once, stragglers SIGKILL, and the future waits for it."""
+        action = self._load_docker_nodes(2)
+        action._policy = DockerPolicy(stop_timeout=0.05)
+        action._context = self.context
+        completed_future = self.loop.create_future()
+        action._completed_future = completed_future
+        container = action._container
+        for node in action._nodes:
+            node.log_future = self.loop.create_future()
+        signals = []
+
+        def signal_node(node, signal_name):
+            signals.append((node.index, signal_name))
+            # The first node exits on SIGINT, the second one only once it is killed.
+            if node.index == 0 or signal_name == 'KILL':
+                self.loop.call_soon_threadsafe(node.log_future.set_result, None)
+        action._signal_node = signal_node
+
+        action._LoadDockerNodes__on_shutdown(None, self.context)
+        stop_task = action._stop_task
+        action._LoadDockerNodes__on_shutdown(None, self.context)
+        assert action._stop_task is stop_task
+        assert not completed_future.done()
+
+        self.loop.run_until_complete(stop_task)
+
+        assert sorted(signals) == [(0, 'INT'), (1, 'INT'), (1, 'KILL')]
+        assert all(node.stopping for node in action._nodes)
+        container.stop.assert_called_once_with(timeout=0)
+        assert action._container is None
+        assert completed_future.done() and action.get_asyncio_future() is None
+
+    def test_log_files_are_complete_once_stopped(self) -> None:
+        """Verify the compressed log file of a node can be read once the sandbox stopped."""
+        action = self._load_docker_nodes(1)
+        node = action._nodes[0]
+        node.logger = logging.getLogger('test_load_docker_nodes.talker')
+        node.logger.setLevel(logging.INFO)
+        self.addCleanup(node.logger.setLevel, logging.NOTSET)
+
+        with tempfile.TemporaryDirectory() as directory:
+            node.log_sink = FileLogSink(directory=directory)
+            node.log_handler = FileSinkHandler('talker', node.log_sink)
+            node.logger.addHandler(node.log_handler)
+            path = node.log_handler.path
+            node.logger.info('last line')
+
+            self.loop.run_until_complete(action._stop_sandbox(self.loop, None))
+
+            with gzip.open(path) as f:
+                assert f.read().decode().endswith('[INFO] last line\n')
+
+    def test_restart_waits_for_the_old_processes(self) -> None:
+        """Verify a restarted node is only run again once every process of its old run exited."""
+        action = self._load_docker_nodes(1)
+        action._policy = DockerPolicy(stop_timeout=0.05)
+        node = action._nodes[0]
+        node.log_future = self.loop.create_future()
+        node.log_future.set_result(0)
+        calls = []
+        action._signal_node = lambda node, signal_name: calls.append(signal_name)
+        # The old processes outlive the stop timeout, and are gone once killed.
+        action._container.exec_run.side_effect = lambda cmd: (
+            calls.append(cmd) or (1 if 'KILL' not in calls else 0, b''))
+
+        async def exec_node(context, node):
+            calls.append('exec')
+        action._exec_node = exec_node
+
+        self.loop.run_until_complete(action._restart_node(self.context, node))
+
+        wait_cmd = node.group_wait_cmd(None)[:3]
+        assert [call if isinstance(call, str) else call[:3] for call in calls] == [
+            'INT', wait_cmd, 'KILL', wait_cmd, 'exec']
+
+    def test_reattach_takes_over_orphaned_containers_only(self) -> None:
+        """Verify a container is taken over only if its owner is gone and nobody else took it."""
+        orphaned_labels = owner_labels()
+        orphaned_labels[OWNER_START_LABEL] = '0'
+        owned = unittest.mock.Mock(id='owned', labels=owner_labels())
+        orphaned = unittest.mock.Mock(id='orphaned', labels=orphaned_labels)
+        self.docker_client.containers.list.return_value = [owned, orphaned]
+        self.docker_client.images.get.return_value.id = 'sha256:1234'
+        first = self._load_docker_nodes(1)
+        second = self._load_docker_nodes(1)
+
+        with tempfile.TemporaryDirectory() as cache_home, \
+                unittest.mock.patch.dict(os.environ, {'XDG_CACHE_HOME': cache_home}):
+            assert first._find_reattachable_container()
+            assert not second._find_reattachable_container()
+            first._container_lock.close()
+
+        assert first._container is orphaned
+        label_filter = self.docker_client.containers.list.call_args[1]['filters']['label']
+        assert label_filter.endswith('=' + first._fingerprint())
+
+    def test_archive_is_loaded_if_its_hash_cannot_be_saved(self) -> None:
+        """Verify the image archive is loaded even if the hash cache cannot be written."""
+        action = self._load_docker_nodes(0)
+        action._load_image_archive = unittest.mock.Mock(return_value=['sha256:image'])
+
+        with tempfile.TemporaryDirectory() as cache_home, \
+                unittest.mock.patch.dict(os.environ, {'XDG_CACHE_HOME': cache_home}), \
+                unittest.mock.patch('launch_ros_sandbox.actions.load_docker_nodes.FileHashCache'
+                                    ) as file_hash_cache:
+            file_hash_cache.return_value.hash_file.return_value = 'hash'
+            file_hash_cache.return_value.save.side_effect = OSError('read-only file system')
+            action._import_image_archive('image.tar')
+
+        action._load_image_archive.assert_called_once_with('image.tar')
+
+    def test_log_collector_starts_the_execs(self) -> None:
+        """Verify the 'pump' log mode hands the exec of each node to the log collector."""
+        action = self._load_docker_nodes(1)
+        node = action._nodes[0]
+        action._log_collector = unittest.mock.Mock()
+        self.docker_client.api.exec_create.return_value = {'Id': 'exec'}
+
+        self.loop.run_until_complete(action._exec_node(self.context, node))
+
+        self.docker_client.api.exec_start.assert_not_called()
+        action._log_collector.attach.assert_called_once_with(0, 'exec', node.logger.name, None)
+
+        action._log_collector.ring.take.return_value = [(0, 'sampled line')]
+        with self.assertLogs(node.logger, level='INFO') as logs:
+            action._log_samples()
+        action._node_exited(node, None)
+
+        assert [record.getMessage() for record in logs.records] == ['sampled line']
+        assert node.log_future.done()
+
+    def test_output_is_passed_through_to_files(self) -> None:
+        """Verify the 'passthrough' log mode writes the raw output of each node to its file."""
+        with tempfile.TemporaryDirectory() as directory:
+            policy = DockerPolicy(log_mode='passthrough', passthrough_directory=directory)
+            action = LoadDockerNodes(policy, [])
+            action._nodes = [
+                _DockerNode(index=0, package='demo_nodes_cpp', executable='talker',
+                            cmd=['ros2', 'run', 'demo_nodes_cpp', 'talker'],
+                            logger=logging.getLogger('sandbox.talker'))
+            ]
+            host, container = self._socketpair()
+            container.sendall(b'raw \xff output\r\n')
+            container.close()
+
+            action._handle_node_output(self.context, action._nodes[0], host)
+            self.loop.run_until_complete(action._nodes[0].log_future)
+
+            with open(os.path.join(directory, 'sandbox.talker.log'), 'rb') as f:
+                assert f.read() == b'raw \xff output\r\n'
+
+    def test_node_log_files_are_followed(self) -> None:
+        """Verify the 'files' log mode logs the node's file until its exit status appears."""
+        with tempfile.TemporaryDirectory() as directory:
+            policy = DockerPolicy(log_mode='files', log_directory=directory)
+            action = LoadDockerNodes(policy, [])
+            logger = logging.getLogger('sandbox.talker')
+            action._nodes = [
+                _DockerNode(index=0, package='demo_nodes_cpp', executable='talker',
+                            cmd=['ros2', 'run', 'demo_nodes_cpp', 'talker'], logger=logger)
+            ]
+            node = action._nodes[0]
+            with open(os.path.join(directory, 'sandbox.talker.log'), 'wb') as f:
+                f.write(b'earlier run\n')
+            with open(os.path.join(directory, 'sandbox.talker.exit'), 'wb') as f:
+                f.write(b'1\n')
+
+            action._start_log_follower(self.context)
+            with self.assertLogs(logger, level='INFO') as logs:
+                action._follow_node_log_file(self.loop, node)
+                with open(os.path.join(directory, 'sandbox.talker.log'), 'ab') as f:
+                    f.write(b'hello\r\nlast line')
+                with open(os.path.join(directory, 'sandbox.talker.exit'), 'wb') as f:
+                    f.write(b'3\n')
+                returncode = self.loop.run_until_complete(asyncio.wait_for(node.log_future, 5))
+            action._log_follower.close()
+
+        assert returncode == 3
+        assert [record.getMessage() for record in logs.records] == ['hello', 'last line']
+
+    def test_node_log_file_waits_for_a_full_log_queue(self) -> None:
+        """Verify the 'files' log mode stops reading while the 'block' log queue is full."""
+        with tempfile.TemporaryDirectory() as directory:
+            policy = DockerPolicy(log_mode='files', log_directory=directory,
+                                  log_limits=LogLimits(queue_size=2, drop_policy='block'))
+            action = LoadDockerNodes(policy, [])
+            logger = logging.getLogger('sandbox.talker')
+            action._nodes = [
+                _DockerNode(index=0, package='demo_nodes_cpp', executable='talker',
+                            cmd=['ros2', 'run', 'demo_nodes_cpp', 'talker'], logger=logger)
+            ]
+            node = action._nodes[0]
+            log_queue = action._log_queue = LogQueue(2, 'block')
+            log_file = os.path.join(directory, 'sandbox.talker.log')
+
+            action._start_log_follower(self.context)
+            action._follow_node_log_file(self.loop, node)
+            with open(log_file, 'ab') as f:
+                f.write(b'one\ntwo\nthree\n')
+            action._log_follower.poll()
+            assert action._log_follower.is_paused('sandbox.talker.log')
+
+            # Nothing more is read, not even the rest of the file once the node exited.
+            with open(log_file, 'ab') as f:
+                f.write(b'four\n')
+            with open(os.path.join(directory, 'sandbox.talker.exit'), 'wb') as f:
+                f.write(b'0\n')
+            action._log_follower.poll()
+            assert not node.log_future.done()
+            assert len(log_queue._items) == 1
+
+            with self.assertLogs(logger, level='INFO') as logs:
+                pump = LogPump(log_queue, 'test log pump')
+                returncode = self.loop.run_until_complete(asyncio.wait_for(node.log_future, 5))
+                log_queue.close()
+                pump.join(5)
+            action._log_follower.close()
+
+        assert returncode == 0
+        assert [record.getMessage() for record in logs.records] == ['one', 'two', 'three', 'four']
@@ -0,0 +1,141 @@
+# Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the internal helpers of the LoadRunAsNodes action."""
+
+import asyncio
+import logging
+import os
+import pwd
+import signal
+import sys
+from typing import Optional
+import unittest
+from unittest import mock
+
+from launch_ros_sandbox.actions.load_runas_nodes import _RunAsNode
+from launch_ros_sandbox.actions.load_runas_nodes import LoadRunAsNodes
+from launch_ros_sandbox.descriptions.respawn import Respawn
+from launch_ros_sandbox.descriptions.user_policy import UserPolicy
+from launch_ros_sandbox.utilities.output_history import OutputHistory
+from launch_ros_sandbox.utilities.respawn_backoff import RespawnBackoff
+
+
+class TestLoadRunAsNodes(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+
+    def _run(self, script: str, respawn: Optional[Respawn] = None) -> LoadRunAsNodes:
+        action = LoadRunAsNodes(UserPolicy(), [])
+        action._completed_future = self.loop.create_future()
+        action._nodes = [_RunAsNode(
+            cmd=[sys.executable, '-c', script],
+            logger=logging.getLogger('user.talker'),
+            history=OutputHistory(1024),
+            backoff=RespawnBackoff(respawn) if respawn is not None else None
+        )]
+        self.loop.run_until_complete(action._run_node(action._nodes[0], action._environment()))
+        return action
+
+    def _start(self, script: str) -> LoadRunAsNodes:
+        """Start a node running 'script', and wait until it printed 'ready'."""
+        action = LoadRunAsNodes(UserPolicy(), [])
+        action._completed_future = self.loop.create_future()
+        action._nodes = [_RunAsNode(
+            cmd=[sys.executable, '-c', script],
+            logger=logging.getLogger('user.talker'),
+            history=OutputHistory(1024)
+        )]
+        action._started_task = self.loop.create_task(
+            action._run_nodes(self.loop, action._environment()))
+        deadline = self.loop.time() + 10.0
+        while action.recent_output() != {'user.talker': ['ready']}:
+            assert self.loop.time() < deadline, 'timed out waiting for the node'
+            self.loop.run_until_complete(asyncio.sleep(0.01))
+        return action
+
+    def _shut_down(self, action: LoadRunAsNodes) -> None:
+        """Shut the action down, and wait until it completed."""
+        completed_future = action.get_asyncio_future()
+        context = mock.Mock(asyncio_loop=self.loop)
+        action._LoadRunAsNodes__on_shutdown(mock.Mock(), context)
+        self.loop.run_until_complete(asyncio.wait_for(completed_future, 10.0))
+
+    def test_node_runs_with_the_environment_of_the_user(self) -> None:
+        """Verify a node runs as the policy's user, with the environment UserPolicy used to set."""
+        env = LoadRunAsNodes(UserPolicy(), [])._environment()
+        pw_record = pwd.getpwuid(os.getuid())
+        assert (env['HOME'], env['LOGNAME'], env['USER']) == \
+            (pw_record.pw_dir, pw_record.pw_name, pw_record.pw_name)
+
+        with self.assertLogs('user.talker', level='INFO') as logs:
+            self._run('import os; print(os.getuid(), os.getgid(), os.environ["USER"])')
+
+        assert [record.getMessage() for record in logs.records] == \
+            ['{} {} {}'.format(os.getuid(), os.getgid(), pw_record.pw_name)]
+
+    def test_shutdown_interrupts_nodes(self) -> None:
+        """Verify a node is sent SIGINT on shutdown, and the action completes once it exited."""
+        action = self._start('import signal; signal.signal(signal.SIGINT, signal.SIG_DFL); '
+                             'print("ready", flush=True); signal.pause()')
+
+        self._shut_down(action)
+
+        assert action._nodes[0].process.returncode == -signal.SIGINT
+
+    def test_shutdown_kills_nodes_which_do_not_exit(self) -> None:
+        """Verify SIGTERM and then SIGKILL follow, and file sinks are only closed after exit."""
+        action = self._start('import signal; signal.signal(signal.SIGINT, signal.SIG_IGN); '
+                             'signal.signal(signal.SIGTERM, signal.SIG_IGN); '
+                             'print("ready", flush=True); signal.pause()')
+        node = action._nodes[0]
+        node.log_handler = mock.Mock()
+        node.log_handler.close.side_effect = lambda: returncodes.append(node.process.returncode)
+        returncodes = []
+
+        with mock.patch('launch_ros_sandbox.actions.load_runas_nodes._SIGTERM_TIMEOUT', 0.1), \
+                mock.patch('launch_ros_sandbox.actions.load_runas_nodes._SIGKILL_TIMEOUT', 0.1):
+            self._shut_down(action)
+
+        assert returncodes == [-signal.SIGKILL]
+        assert node.log_handler is None
+        assert action._started_task is None
+
+    def test_node_output_is_logged(self) -> None:
+        """Verify the output of a node running as the user is logged line by line."""
+        with self.assertLogs('user.talker', level='INFO') as logs:
+            action = self._run('print("hello"); import sys; sys.stderr.write("last line")')
+
+        assert [record.getMessage() for record in logs.records] == ['hello', 'last line']
+        assert action._nodes[0].process.returncode == 0
+        assert action.recent_output() == {'user.talker': ['hello', 'last line']}
+
+    def test_node_is_respawned(self) -> None:
+        """Verify a node which exits is run again until it reached its maximum restarts."""
+        with self.assertLogs('user.talker', level='INFO') as logs:
+            action = self._run('print("run")', Respawn(max_restarts=2, initial_delay=0.01))
+
+        assert [record.getMessage() for record in logs.records] == ['run', 'run', 'run']
+        assert action._nodes[0].backoff.restarts == 2
+
+    def test_abnormal_exit_logs_recent_output(self) -> None:
+        """Verify the history of a node which fails is logged."""
+        action_logger = logging.getLogger('launch_ros_sandbox.actions.load_runas_nodes')
+        with self.assertLogs(action_logger, level='ERROR') as logs:
+            self._run('print("fatal error"); raise SystemExit(3)')
+
+        assert logs.records[0].getMessage() == \
+            '"user.talker" exited with 3; its last 1 lines of output:\nfatal error'
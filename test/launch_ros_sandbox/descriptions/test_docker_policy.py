@@ -28,6 +28,7 @@ with Docker until the policy is applied to the SandboxedNodeContainer.
 import unittest
 
 from launch_ros_sandbox.descriptions import DockerPolicy
+from launch_ros_sandbox.descriptions import LogLimits
 
 
 class TestDockerPolicy(unittest.TestCase):
@@ -149,3 +150,138 @@ class TestDockerPolicy(unittest.TestCase):
         docker_policy = DockerPolicy()
 
         assert docker_policy.run_args is None
+
+    def test_pull_policy_defaults_to_always(self) -> None:
+        """Verify the DockerPolicy pulls the image on every launch by default."""
+        docker_policy = DockerPolicy()
+
+        assert docker_policy.pull_policy == 'always'
+
+    def test_pull_policy_set_correctly(self) -> None:
+        """Verify the DockerPolicy pull policy can be set to each supported value."""
+        for pull_policy in ('always', 'if-not-present', 'never'):
+            docker_policy = DockerPolicy(pull_policy=pull_policy)
+
+            assert docker_policy.pull_policy == pull_policy
+
+    def test_invalid_pull_policy_raises(self) -> None:
+        """Verify the DockerPolicy rejects unknown pull policies."""
+        with self.assertRaises(ValueError):
+            DockerPolicy(pull_policy='sometimes')
+
+    def test_lockfile_set_correctly(self) -> None:
+        """Verify the DockerPolicy lockfile is only set when provided."""
+        assert DockerPolicy().lockfile is None
+        assert DockerPolicy(lockfile='sandbox.lock').lockfile == 'sandbox.lock'
+
+    def test_image_archive_defaults_pull_policy_to_never(self) -> None:
+        """Verify the registry is not used by default when the image comes from an archive."""
+        docker_policy = DockerPolicy(image_archive='/media/usb/ros.tar')
+
+        assert docker_policy.image_archive == '/media/usb/ros.tar'
+        assert docker_policy.pull_policy == 'never'
+
+    def test_image_archive_keeps_explicit_pull_policy(self) -> None:
+        """Verify an explicit pull policy is kept when the image comes from an archive."""
+        docker_policy = DockerPolicy(image_archive='ros.tar', pull_policy='if-not-present')
+
+        assert docker_policy.pull_policy == 'if-not-present'
+
+    def test_setup_commands_and_overlay_set_correctly(self) -> None:
+        """Verify the DockerPolicy setup commands and overlay are only set when provided."""
+        docker_policy = DockerPolicy()
+
+        assert docker_policy.setup_commands is None
+        assert docker_policy.overlay is None
+
+        docker_policy = DockerPolicy(
+            setup_commands=['apt-get update && apt-get install -y foo'],
+            overlay='/home/ros/ws/install'
+        )
+
+        assert docker_policy.setup_commands == ['apt-get update && apt-get install -y foo']
+        assert docker_policy.overlay == '/home/ros/ws/install'
+
+    def test_sync_overlay_requires_overlay(self) -> None:
+        """Verify the overlay can only be synchronized if the policy has one."""
+        with self.assertRaises(ValueError):
+            DockerPolicy(sync_overlay=True)
+
+        docker_policy = DockerPolicy(overlay='install', sync_overlay=True, sync_period=0.5)
+
+        assert docker_policy.sync_overlay
+        assert docker_policy.sync_period == 0.5
+
+    def test_reattach_set_correctly(self) -> None:
+        """Verify reattaching is disabled unless requested."""
+        assert not DockerPolicy().reattach
+        assert DockerPolicy(reattach=True).reattach
+
+    def test_generated_container_names_are_unique(self) -> None:
+        """Verify policies constructed within the same second get different container names."""
+        names = {DockerPolicy().container_name for _ in range(20)}
+
+        assert len(names) == 20
+        assert DockerPolicy(container_name='my_container').container_name == 'my_container'
+
+    def test_use_supervisor_set_correctly(self) -> None:
+        """Verify the supervisor is disabled by default and cannot be combined with reattach."""
+        assert not DockerPolicy().use_supervisor
+        assert DockerPolicy(use_supervisor=True).use_supervisor
+
+        with self.assertRaises(ValueError):
+            DockerPolicy(use_supervisor=True, reattach=True)
+
+    def test_log_limits_set_correctly(self) -> None:
+        """Verify the log output is not limited unless log limits are given."""
+        limits = LogLimits(node_rate=10)
+
+        assert DockerPolicy().log_limits is None
+        assert DockerPolicy(log_limits=limits).log_limits is limits
+
+    def test_log_mode_set_correctly(self) -> None:
+        """Verify the log mode defaults to streaming and invalid modes are rejected."""
+        assert DockerPolicy().log_mode == 'stream'
+        assert DockerPolicy(log_mode='pump').log_mode == 'pump'
+        with self.assertRaises(ValueError):
+            DockerPolicy(log_mode='syslog')
+        with self.assertRaises(ValueError):
+            DockerPolicy(log_mode='pump', use_supervisor=True)
+
+    def test_passthrough_directory_set_correctly(self) -> None:
+        """Verify a passthrough directory requires the passthrough log mode."""
+        policy = DockerPolicy(log_mode='passthrough', passthrough_directory='logs')
+
+        assert policy.passthrough_directory == 'logs'
+        assert DockerPolicy(log_mode='passthrough').passthrough_directory is None
+        with self.assertRaises(ValueError):
+            DockerPolicy(passthrough_directory='logs')
+
+    def test_log_directory_set_correctly(self) -> None:
+        """Verify the files log mode requires a log directory and cannot be reattached."""
+        assert DockerPolicy(log_mode='files', log_directory='logs').log_directory == 'logs'
+        assert DockerPolicy().log_directory is None
+        with self.assertRaises(ValueError):
+            DockerPolicy(log_mode='files')
+        with self.assertRaises(ValueError):
+            DockerPolicy(log_directory='logs')
+        with self.assertRaises(ValueError):
+            DockerPolicy(log_mode='files', log_directory='logs', reattach=True)
+
+    def test_tty_set_correctly(self) -> None:
+        """Verify nodes get a TTY by default, and only streamed nodes can do without."""
+        assert DockerPolicy().tty is True
+        assert DockerPolicy(tty=False).tty is False
+        with self.assertRaises(ValueError):
+            DockerPolicy(tty=False, log_mode='pump')
+        with self.assertRaises(ValueError):
+            DockerPolicy(tty=False, reattach=True)
+        with self.assertRaises(ValueError):
+            DockerPolicy(tty=False, use_supervisor=True)
+
+    def test_stop_timeout_set_correctly(self) -> None:
+        """Verify the nodes are given 5 seconds to stop by default, and never a negative time."""
+        assert DockerPolicy().stop_timeout == 5.0
+        assert DockerPolicy(stop_timeout=0.5).stop_timeout == 0.5
+        with self.assertRaises(ValueError):
+            DockerPolicy(stop_timeout=-1.0)
@@ -0,0 +1,52 @@
+# Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the FileLogSink description."""
+
+import importlib.util
+import unittest
+
+from launch_ros_sandbox.descriptions.file_log_sink import FileLogSink
+
+
+class TestFileLogSink(unittest.TestCase):
+
+    def test_defaults(self) -> None:
+        """Verify the sink rotates gzip compressed files of 10 MiB by default."""
+        sink = FileLogSink(directory='/var/log/robot')
+
+        assert sink.directory == '/var/log/robot'
+        assert sink.max_bytes == 10 * 1024 * 1024
+        assert sink.backup_count == 5
+        assert sink.compression == 'gzip'
+        assert sink.file_extension == '.log.gz'
+
+    def test_uncompressed(self) -> None:
+        """Verify compression can be disabled."""
+        assert FileLogSink(directory='logs', compression=None).file_extension == '.log'
+
+    def test_invalid_arguments_raise(self) -> None:
+        """Verify invalid arguments are rejected when the sink is described."""
+        with self.assertRaises(ValueError):
+            FileLogSink(directory='logs', compression='bz2')
+        with self.assertRaises(ValueError):
+            FileLogSink(directory='logs', max_bytes=0)
+        with self.assertRaises(ValueError):
+            FileLogSink(directory='logs', backup_count=-1)
+
+    @unittest.skipIf(importlib.util.find_spec('zstandard') is not None, 'zstandard is installed')
+    def test_zstd_requires_zstandard(self) -> None:
+        """Verify zstd compression is rejected without the zstandard package."""
+        with self.assertRaises(ValueError):
+            FileLogSink(directory='logs', compression='zstd')
@@ -0,0 +1,52 @@
+# Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the LogLimits description."""
+
+import unittest
+
+from launch_ros_sandbox.descriptions.log_limits import LogLimits
+
+
+class TestLogLimits(unittest.TestCase):
+
+    def test_defaults(self) -> None:
+        """Verify only the log queue is bounded by default."""
+        limits = LogLimits()
+
+        assert limits.node_rate is None
+        assert limits.node_burst is None
+        assert limits.sandbox_rate is None
+        assert limits.sandbox_burst is None
+        assert limits.queue_size == 10000
+        assert limits.drop_policy == 'drop-oldest'
+
+    def test_burst_defaults_to_one_second_of_rate(self) -> None:
+        """Verify the bursts default to the number of lines allowed per second."""
+        limits = LogLimits(node_rate=100.0, sandbox_rate=0.5, sandbox_burst=20)
+
+        assert limits.node_burst == 100
+        assert limits.sandbox_burst == 20
+        assert LogLimits(node_rate=0.5).node_burst == 1
+
+    def test_invalid_arguments_raise(self) -> None:
+        """Verify invalid arguments are rejected when the limits are described."""
+        with self.assertRaises(ValueError):
+            LogLimits(node_rate=0)
+        with self.assertRaises(ValueError):
+            LogLimits(sandbox_rate=10, sandbox_burst=0)
+        with self.assertRaises(ValueError):
+            LogLimits(queue_size=0)
+        with self.assertRaises(ValueError):
+            LogLimits(drop_policy='drop-all')
@@ -0,0 +1,55 @@
+# Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the Respawn description."""
+
+import unittest
+
+from launch_ros_sandbox.descriptions import Respawn
+from launch_ros_sandbox.descriptions import SandboxedNode
+
+
+class TestRespawn(unittest.TestCase):
+
+    def test_defaults(self) -> None:
+        """Verify a node respawns for as long as the launch runs by default."""
+        respawn = Respawn()
+
+        assert respawn.max_restarts is None
+        assert respawn.initial_delay == 1.0
+        assert respawn.max_delay == 60.0
+        assert respawn.multiplier == 2.0
+        assert respawn.jitter == 0.1
+        assert respawn.reset_window == 60.0
+
+    def test_invalid_settings_are_rejected(self) -> None:
+        """Verify settings which cannot make a backoff raise a ValueError."""
+        for kwargs in (
+            {'max_restarts': -1},
+            {'initial_delay': -1.0},
+            {'initial_delay': 10.0, 'max_delay': 5.0},
+            {'multiplier': 0.5},
+            {'jitter': 1.5},
+            {'reset_window': 0.0},
+        ):
+            with self.assertRaises(ValueError):
+                Respawn(**kwargs)
+
+    def test_sandboxed_node_respawn(self) -> None:
+        """Verify a SandboxedNode only respawns if it is given a Respawn."""
+        respawn = Respawn(max_restarts=3)
+
+        assert SandboxedNode(package='demo_nodes_cpp', node_executable='talker').respawn is None
+        assert SandboxedNode(package='demo_nodes_cpp', node_executable='talker',
+                             respawn=respawn).respawn is respawn
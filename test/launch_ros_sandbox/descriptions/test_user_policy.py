@@ -17,7 +17,10 @@
 import os
 
 import unittest
+from unittest import mock
 
+from launch_ros_sandbox.actions.load_runas_nodes import LoadRunAsNodes
+from launch_ros_sandbox.descriptions import SandboxedNode
 from launch_ros_sandbox.descriptions import UserPolicy
 
 
@@ -31,3 +34,18 @@ class TestUserPolicy(unittest.TestCase):
         user_policy = UserPolicy()
         assert current_uid == user_policy.run_as.uid
         assert current_gid == user_policy.run_as.gid
+
+    def test_apply_does_not_spawn_nodes(self):
+        """Verify apply only returns the action, which runs the nodes once it is executed."""
+        user_policy = UserPolicy()
+        node_descriptions = [SandboxedNode(package='demo_nodes_cpp', node_executable='talker')]
+
+        with mock.patch('subprocess.Popen') as popen, \
+                mock.patch('asyncio.create_subprocess_exec') as create_subprocess_exec:
+            action = user_policy.apply(mock.Mock(), node_descriptions)
+
+        popen.assert_not_called()
+        create_subprocess_exec.assert_not_called()
+        assert isinstance(action, LoadRunAsNodes)
+        assert action._policy is user_policy
+        assert action._node_descriptions is node_descriptions
@@ -0,0 +1,153 @@
+# Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the warm container broker."""
+
+import asyncio
+import os
+import tempfile
+import threading
+import time
+import unittest
+import unittest.mock
+
+from launch_ros_sandbox.utilities.container_broker import _check_socket_directory
+from launch_ros_sandbox.utilities.container_broker import BROKER_LABEL
+from launch_ros_sandbox.utilities.container_broker import BrokerClient
+from launch_ros_sandbox.utilities.container_broker import ContainerBroker
+from launch_ros_sandbox.utilities.container_broker import pool_key
+from launch_ros_sandbox.utilities.labels import POLICY_HASH_LABEL
+
+
+class TestPoolKey(unittest.TestCase):
+
+    def test_key_depends_on_image_and_run_args(self) -> None:
+        """Verify containers are pooled by image and run arguments."""
+        key = pool_key('foo:bar', {'mem_limit': '128m', 'cpuset_cpus': '0'})
+
+        assert key == pool_key('foo:bar', {'cpuset_cpus': '0', 'mem_limit': '128m'})
+        assert key != pool_key('foo:baz', {'mem_limit': '128m', 'cpuset_cpus': '0'})
+        assert key != pool_key('foo:bar', {'mem_limit': '256m', 'cpuset_cpus': '0'})
+        assert pool_key('foo:bar', None) == pool_key('foo:bar', {})
+        assert key != pool_key('foo:bar', {'mem_limit': '128m', 'cpuset_cpus': '0'}, 'policy')
+
+    def test_key_rejects_unserializable_run_args(self) -> None:
+        """Verify run arguments which cannot be sent to the broker are rejected."""
+        with self.assertRaises(TypeError):
+            pool_key('foo:bar', {'volumes': object()})
+
+
+class TestCheckSocketDirectory(unittest.TestCase):
+
+    def test_fallback_directory_of_another_user_is_refused(self) -> None:
+        """Verify a socket in a fallback directory is only used if it is the user's own."""
+        with tempfile.TemporaryDirectory() as directory, unittest.mock.patch(
+                'launch_ros_sandbox.utilities.container_broker._fallback_runtime_directory',
+                return_value=directory):
+            socket_path = os.path.join(directory, 'launch_ros_sandbox', 'broker.sock')
+            _check_socket_directory(socket_path)
+
+            with unittest.mock.patch('os.getuid', return_value=os.getuid() + 1):
+                with self.assertRaises(PermissionError):
+                    _check_socket_directory(socket_path)
+                with self.assertRaises(PermissionError):
+                    BrokerClient(socket_path).release('warm-0')
+                # Sockets elsewhere are up to whoever chose them.
+                _check_socket_directory('/run/broker.sock')
+
+    def test_fallback_directory_link_is_refused(self) -> None:
+        """Verify a fallback directory which is a symbolic link is refused."""
+        with tempfile.TemporaryDirectory() as directory:
+            link = os.path.join(directory, 'link')
+            os.symlink(directory, link)
+            with unittest.mock.patch(
+                    'launch_ros_sandbox.utilities.container_broker._fallback_runtime_directory',
+                    return_value=link), self.assertRaises(PermissionError):
+                _check_socket_directory(os.path.join(link, 'broker.sock'))
+
+
+class TestContainerBroker(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self._socket_path = os.path.join(self._tmp_dir.name, 'broker.sock')
+
+        patcher = unittest.mock.patch('docker.from_env')
+        self._docker_client = patcher.start().return_value
+        self.addCleanup(patcher.stop)
+        self._docker_client.containers.run.side_effect = [
+            unittest.mock.Mock(id='warm-{}'.format(i)) for i in range(3)]
+        self._docker_client.containers.get.return_value.status = 'running'
+
+        self._loop = asyncio.new_event_loop()
+        self._broker = ContainerBroker(socket_path=self._socket_path)
+        self._serve_task = self._loop.create_task(self._broker.serve())
+        self._thread = threading.Thread(target=self._loop.run_forever)
+        self._thread.start()
+        while not os.path.exists(self._socket_path):
+            time.sleep(0.01)
+
+    def tearDown(self) -> None:
+        async def stop_broker() -> None:
+            self._serve_task.cancel()
+            await asyncio.gather(self._serve_task, return_exceptions=True)
+
+        asyncio.run_coroutine_threadsafe(stop_broker(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._tmp_dir.cleanup()
+
+    def test_claim_warms_pool_for_next_launch(self) -> None:
+        """Verify the first claim misses and the next claim gets the warmed container."""
+        client = BrokerClient(self._socket_path)
+
+        assert client.claim('foo:bar', {'mem_limit': '128m'}) is None
+        time.sleep(0.1)
+        assert client.claim('foo:bar', {'mem_limit': '128m'}) == 'warm-0'
+        self._docker_client.containers.run.assert_called_with(
+            'foo:bar', detach=True, auto_remove=True, tty=True,
+            name=unittest.mock.ANY, labels=unittest.mock.ANY, mem_limit='128m')
+
+    def test_run_args_labels_are_merged(self) -> None:
+        """Verify labels set by the run arguments are kept next to the broker's own labels."""
+        client = BrokerClient(self._socket_path)
+
+        assert client.claim('foo:bar', {'labels': {'team': 'robot'}}) is None
+        time.sleep(0.1)
+
+        labels = self._docker_client.containers.run.call_args[1]['labels']
+        assert labels['team'] == 'robot'
+        assert labels[BROKER_LABEL] == str(os.getpid())
+        assert client.claim('foo:bar', {'labels': {'team': 'robot'}}) == 'warm-0'
+
+    def test_warm_containers_are_labelled_with_the_policy(self) -> None:
+        """Verify warm containers are pooled by policy hash and labelled with it."""
+        client = BrokerClient(self._socket_path)
+
+        assert client.claim('foo:bar', None, policy_hash='policy', launch_id='launch') is None
+        time.sleep(0.1)
+
+        labels = self._docker_client.containers.run.call_args[1]['labels']
+        assert labels[POLICY_HASH_LABEL] == 'policy'
+        assert client.claim('foo:bar', None, policy_hash='other') is None
+        assert client.claim('foo:bar', None, policy_hash='policy') == 'warm-0'
+
+    def test_release_recycles_container(self) -> None:
+        """Verify released containers are killed rather than reused."""
+        BrokerClient(self._socket_path).release('warm-0')
+        time.sleep(0.1)
+
+        self._docker_client.containers.get.assert_called_with('warm-0')
+        self._docker_client.containers.get.return_value.kill.assert_called()
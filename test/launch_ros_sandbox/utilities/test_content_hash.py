@@ -0,0 +1,105 @@
+# Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the persistent content hash cache."""
+
+import hashlib
+import os
+import tempfile
+import unittest
+import unittest.mock
+
+from launch_ros_sandbox.utilities import content_hash
+from launch_ros_sandbox.utilities.content_hash import FileHashCache
+
+
+class TestFileHashCache(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self._cache_path = os.path.join(self._tmp_dir.name, 'cache', 'hashes.json')
+        self._file_path = os.path.join(self._tmp_dir.name, 'image.tar')
+        with open(self._file_path, 'wb') as f:
+            f.write(b'image content')
+
+    def tearDown(self) -> None:
+        self._tmp_dir.cleanup()
+
+    def test_hash_matches_sha256(self) -> None:
+        """Verify the hash is the SHA-256 of the file content."""
+        cache = FileHashCache(self._cache_path)
+
+        assert cache.hash_file(self._file_path) == hashlib.sha256(b'image content').hexdigest()
+
+    def test_unchanged_file_is_not_read_again(self) -> None:
+        """Verify a persisted hash is reused without reading the file."""
+        cache = FileHashCache(self._cache_path)
+        expected = cache.hash_file(self._file_path)
+        cache.save()
+
+        with unittest.mock.patch.object(content_hash, 'hash_file_content') as hash_content:
+            assert FileHashCache(self._cache_path).hash_file(self._file_path) == expected
+            hash_content.assert_not_called()
+
+    def test_writers_do_not_share_temporary_files(self) -> None:
+        """Verify each save writes a temporary file of its own, which a failure removes."""
+        cache = FileHashCache(self._cache_path)
+        cache.hash_file(self._file_path)
+        tmp_paths = []
+        replace = os.replace
+
+        def failing_replace(source, destination):
+            tmp_paths.append(source)
+            if len(tmp_paths) == 2:
+                raise OSError('disk full')
+            replace(source, destination)
+
+        with unittest.mock.patch('os.replace', failing_replace):
+            content_hash.save_json_cache(self._cache_path, {})
+            with self.assertRaises(OSError):
+                content_hash.save_json_cache(self._cache_path, {})
+
+        assert tmp_paths[0] != tmp_paths[1]
+        assert os.listdir(os.path.dirname(self._cache_path)) == ['hashes.json']
+
+    def test_changed_file_is_hashed_again(self) -> None:
+        """Verify a file is hashed again after its content is replaced."""
+        cache = FileHashCache(self._cache_path)
+        cache.hash_file(self._file_path)
+        cache.save()
+
+        with open(self._file_path, 'wb') as f:
+            f.write(b'new image content!')
+
+        assert FileHashCache(self._cache_path).hash_file(self._file_path) == \
+            hashlib.sha256(b'new image content!').hexdigest()
+
+    def test_tree_hash_tracks_content_and_layout(self) -> None:
+        """Verify the tree hash changes with file content, names and modes only."""
+        root = os.path.join(self._tmp_dir.name, 'install')
+        os.makedirs(os.path.join(root, 'lib', 'foo'))
+        node_path = os.path.join(root, 'lib', 'foo', 'node')
+        with open(node_path, 'wb') as f:
+            f.write(b'binary')
+        cache = FileHashCache(self._cache_path)
+
+        original = cache.hash_tree(root)
+        assert cache.hash_tree(root) == original
+
+        os.chmod(node_path, 0o755)
+        executable = cache.hash_tree(root)
+        assert executable != original
+
+        os.rename(node_path, os.path.join(root, 'lib', 'foo', 'other_node'))
+        assert cache.hash_tree(root) != executable
@@ -0,0 +1,71 @@
+# Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the derived sandbox images."""
+
+import os
+import tarfile
+import tempfile
+import unittest
+
+from launch_ros_sandbox.utilities.derived_image import create_build_context
+from launch_ros_sandbox.utilities.derived_image import derived_dockerfile
+from launch_ros_sandbox.utilities.derived_image import derived_image_name
+
+
+class TestDerivedImage(unittest.TestCase):
+
+    def test_name_depends_on_every_input(self) -> None:
+        """Verify the derived image name changes with the base, commands and overlay."""
+        name = derived_image_name('sha256:1234', ['apt-get install foo'], 'abcd')
+
+        assert name.startswith('launch_ros_sandbox/derived:')
+        assert name == derived_image_name('sha256:1234', ['apt-get install foo'], 'abcd')
+        assert name != derived_image_name('sha256:5678', ['apt-get install foo'], 'abcd')
+        assert name != derived_image_name('sha256:1234', ['apt-get install bar'], 'abcd')
+        assert name != derived_image_name('sha256:1234', ['apt-get install foo'], None)
+
+    def test_dockerfile_runs_commands_before_copying_overlay(self) -> None:
+        """Verify setup commands are run before the overlay is copied."""
+        dockerfile = derived_dockerfile('sha256:1234', ['echo foo', 'echo bar'], True)
+
+        assert dockerfile.splitlines() == [
+            'FROM sha256:1234',
+            'RUN ["/bin/sh", "-c", "echo foo"]',
+            'RUN ["/bin/sh", "-c", "echo bar"]',
+            'COPY overlay /opt/launch_ros_sandbox/overlay',
+        ]
+
+    def test_dockerfile_keeps_each_command_in_its_instruction(self) -> None:
+        """Verify a newline in a setup command does not start another Dockerfile instruction."""
+        dockerfile = derived_dockerfile('sha256:1234', ['echo foo\nUSER root'], False)
+
+        assert dockerfile.splitlines() == [
+            'FROM sha256:1234',
+            'RUN ["/bin/sh", "-c", "echo foo\\nUSER root"]',
+        ]
+
+    def test_build_context_contains_dockerfile_and_overlay(self) -> None:
+        """Verify the build context holds the Dockerfile and the overlay content."""
+        with tempfile.TemporaryDirectory() as overlay:
+            with open(os.path.join(overlay, 'local_setup.bash'), 'w') as f:
+                f.write('# setup')
+
+            with create_build_context('FROM foo\n', overlay) as context:
+                with tarfile.open(fileobj=context) as tar:
+                    names = tar.getnames()
+                    dockerfile = tar.extractfile('Dockerfile').read()
+
+        assert dockerfile == b'FROM foo\n'
+        assert 'overlay/local_setup.bash' in names
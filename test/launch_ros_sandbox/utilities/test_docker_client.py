@@ -0,0 +1,78 @@
+# Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the Docker client shared by all sandboxes."""
+
+import os
+import unittest
+from unittest import mock
+
+import docker
+
+from launch_ros_sandbox.utilities.docker_client import connections_in_use
+from launch_ros_sandbox.utilities.docker_client import docker_pool_size
+from launch_ros_sandbox.utilities.docker_client import DOCKER_POOL_SIZE_ENV
+from launch_ros_sandbox.utilities.docker_client import lease_docker_client
+
+
+class TestDockerClientLease(unittest.TestCase):
+
+    def test_lease_shares_client_until_last_release(self) -> None:
+        """Verify every lease gets the same client, which is closed with the last lease."""
+        with mock.patch('docker.from_env') as from_env:
+            first = lease_docker_client()
+            second = lease_docker_client()
+
+            assert first.client is second.client
+            from_env.assert_called_once_with(max_pool_size=docker_pool_size())
+
+            first.release()
+            first.release()
+            first.client.close.assert_not_called()
+
+            second.release()
+            second.client.close.assert_called_once_with()
+
+            # A new lease after the client was closed creates a new client.
+            third = lease_docker_client()
+            assert from_env.call_count == 2
+            third.release()
+
+    def test_pool_size_from_environment(self) -> None:
+        """Verify the pool size is read from the environment and validated."""
+        with mock.patch.dict(os.environ, {DOCKER_POOL_SIZE_ENV: '16'}):
+            assert docker_pool_size() == 16
+        with mock.patch.dict(os.environ, {DOCKER_POOL_SIZE_ENV: '-1'}):
+            with self.assertRaises(ValueError):
+                docker_pool_size()
+
+
+class TestConnectionsInUse(unittest.TestCase):
+
+    def test_connections_in_use(self) -> None:
+        """Verify connections taken from the pool are counted until they are returned."""
+        client = docker.DockerClient(
+            base_url='unix:///var/run/launch_ros_sandbox_test.sock', version='1.41')
+        try:
+            assert connections_in_use(client) == 0
+
+            adapter = client.api.get_adapter('http+docker://localhost')
+            pool = adapter.get_connection('http+docker://localhost')
+            connections = [pool._get_conn(), pool._get_conn()]
+            assert connections_in_use(client) == 2
+
+            pool._put_conn(connections.pop())
+            assert connections_in_use(client) == 1
+        finally:
+            client.close()
@@ -0,0 +1,126 @@
+# Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the Docker events shared by all sandboxes."""
+
+import asyncio
+import queue
+import unittest
+from unittest import mock
+
+from launch_ros_sandbox.utilities.docker_events import container_id
+from launch_ros_sandbox.utilities.docker_events import lease_docker_events
+from launch_ros_sandbox.utilities.labels import SANDBOX_LABEL
+
+
+class _FakeEventStream:
+    """Stream of Docker events fed by the test, until it is closed."""
+
+    def __init__(self) -> None:
+        self.events = queue.Queue()  # type: queue.Queue
+        self.closed = False
+
+    def __iter__(self):
+        while True:
+            event = self.events.get()
+            if event is None:
+                return
+            yield event
+
+    def close(self) -> None:
+        self.closed = True
+        self.events.put(None)
+
+
+def _die_event(container: str) -> dict:
+    return {
+        'Type': 'container',
+        'Action': 'die',
+        'id': container,
+        'Actor': {'ID': container, 'Attributes': {'exitCode': '137'}},
+    }
+
+
+class TestDockerEvents(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.loop = asyncio.new_event_loop()
+        self.stream = _FakeEventStream()
+        self.client_lease = mock.Mock()
+        self.client_lease.client.api.events.return_value = self.stream
+        patcher = mock.patch(
+            'launch_ros_sandbox.utilities.docker_events.lease_docker_client',
+            return_value=self.client_lease)
+        self.lease_docker_client = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self) -> None:
+        self.loop.close()
+
+    def _receive(self, received: asyncio.Future) -> dict:
+        return self.loop.run_until_complete(asyncio.wait_for(received, 5))
+
+    def test_container_id(self) -> None:
+        """Verify the container ID is read from the event or from its actor."""
+        assert container_id({'id': 'abc'}) == 'abc'
+        assert container_id({'Actor': {'ID': 'def'}}) == 'def'
+        assert container_id({}) is None
+
+    def test_one_subscription_shared_until_last_release(self) -> None:
+        """Verify all leases share one filtered subscription, closed with the last lease."""
+        first = lease_docker_events()
+        second = lease_docker_events()
+
+        self.lease_docker_client.assert_called_once_with()
+        filters = self.client_lease.client.api.events.call_args[1]['filters']
+        assert filters['type'] == 'container'
+        assert filters['label'] == '{}=true'.format(SANDBOX_LABEL)
+
+        first.release()
+        first.release()
+        assert not self.stream.closed
+        self.client_lease.release.assert_not_called()
+
+        second.release()
+        assert first.released and second.released
+        self.client_lease.release.assert_called_once_with()
+
+    def test_events_passed_to_watching_sandbox(self) -> None:
+        """Verify an event is passed to the callback watching its container, on its loop."""
+        lease = lease_docker_events()
+        try:
+            received = self.loop.create_future()
+            lease.watch(self.loop, 'abc', received.set_result)
+            self.stream.events.put(_die_event('abc'))
+
+            assert self._receive(received)['Action'] == 'die'
+        finally:
+            lease.release()
+
+    def test_event_before_watch_is_kept(self) -> None:
+        """Verify an event of a container nobody watches yet is passed on once it is watched."""
+        lease = lease_docker_events()
+        try:
+            seen = self.loop.create_future()
+            lease.watch(self.loop, 'other', seen.set_result)
+            self.stream.events.put(_die_event('abc'))
+            self.stream.events.put(_die_event('other'))
+            # Events are read in order, so the first one was kept once the second is received.
+            self._receive(seen)
+
+            received = self.loop.create_future()
+            lease.watch(self.loop, 'abc', received.set_result)
+            assert container_id(self._receive(received)) == 'abc'
+        finally:
+            lease.release()
@@ -0,0 +1,77 @@
+# Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the Docker image lockfile."""
+
+import json
+import os
+import tempfile
+import unittest
+import unittest.mock
+
+from launch_ros_sandbox.utilities.image_lock import ImageLock
+from launch_ros_sandbox.utilities.image_lock import resolve_image
+
+
+class TestImageLock(unittest.TestCase):
+
+    def test_pinned_reference_prefers_digest(self) -> None:
+        """Verify images with a registry digest are pinned as 'repository@digest'."""
+        lock = ImageLock()
+        lock.pin('osrf/ros:dashing-desktop', image_id='sha256:1234', digest='sha256:abcd')
+        lock.pin('localhost:5000/foo:bar', image_id='sha256:5678', digest='sha256:ef01')
+
+        assert lock.pinned_reference('osrf/ros:dashing-desktop') == 'osrf/ros@sha256:abcd'
+        assert lock.pinned_reference('localhost:5000/foo:bar') == 'localhost:5000/foo@sha256:ef01'
+
+    def test_pinned_reference_falls_back_to_id(self) -> None:
+        """Verify images without a registry digest are pinned by their ID."""
+        lock = ImageLock()
+        lock.pin('my_image:latest', image_id='sha256:1234')
+
+        assert lock.pinned_reference('my_image:latest') == 'sha256:1234'
+        assert lock.pinned_reference('other_image:latest') is None
+
+    def test_save_and_load_round_trip(self) -> None:
+        """Verify a saved lockfile loads back to the same pins."""
+        lock = ImageLock()
+        lock.pin('osrf/ros:dashing-desktop', image_id='sha256:1234', digest='sha256:abcd')
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'sandbox.lock')
+            lock.save(path)
+
+            assert ImageLock.load(path).images == lock.images
+            assert os.listdir(tmp_dir) == ['sandbox.lock']
+
+    def test_load_rejects_unknown_version(self) -> None:
+        """Verify lockfiles of an unknown version are rejected."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'sandbox.lock')
+            with open(path, 'w') as lockfile:
+                json.dump({'version': 0, 'images': {}}, lockfile)
+
+            with self.assertRaises(ValueError):
+                ImageLock.load(path)
+
+    def test_resolve_image_matches_repository_digest(self) -> None:
+        """Verify the digest of the image's own repository is used."""
+        image = unittest.mock.Mock(
+            id='sha256:1234',
+            attrs={'RepoDigests': ['other/ros@sha256:0000', 'osrf/ros@sha256:abcd']})
+        docker_client = unittest.mock.Mock()
+        docker_client.images.get.return_value = image
+
+        assert resolve_image(docker_client, 'osrf/ros:dashing-desktop') == \
+            ('sha256:1234', 'sha256:abcd')
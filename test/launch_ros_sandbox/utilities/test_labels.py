@@ -0,0 +1,108 @@
+# Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the Docker labels of sandbox containers."""
+
+import os
+import subprocess
+import tempfile
+import unittest
+from unittest import mock
+
+from launch_ros_sandbox.utilities.labels import launch_fingerprint
+from launch_ros_sandbox.utilities.labels import lock_container
+from launch_ros_sandbox.utilities.labels import OWNER_HOST_LABEL
+from launch_ros_sandbox.utilities.labels import owner_is_alive
+from launch_ros_sandbox.utilities.labels import owner_labels
+from launch_ros_sandbox.utilities.labels import OWNER_PID_LABEL
+from launch_ros_sandbox.utilities.labels import OWNER_START_LABEL
+
+
+class TestLaunchFingerprint(unittest.TestCase):
+
+    def _fingerprint(self, **kwargs) -> str:
+        configuration = {
+            'policy_hash': '0123456789abcdef',
+            'image_id': 'sha256:1234',
+            'node_cmds': [['ros2', 'run', 'demo_nodes_cpp', 'talker']],
+        }
+        configuration.update(kwargs)
+        return launch_fingerprint(**configuration)
+
+    def test_fingerprint_is_stable(self) -> None:
+        """Verify the same configuration always has the same fingerprint."""
+        assert self._fingerprint() == self._fingerprint()
+
+    def test_fingerprint_depends_on_configuration(self) -> None:
+        """Verify any change to the launch configuration changes the fingerprint."""
+        fingerprint = self._fingerprint()
+
+        assert fingerprint != self._fingerprint(policy_hash='fedcba9876543210')
+        assert fingerprint != self._fingerprint(image_id='sha256:5678')
+        assert fingerprint != self._fingerprint(
+            node_cmds=[['ros2', 'run', 'demo_nodes_cpp', 'listener']])
+
+
+class TestOwnerLabels(unittest.TestCase):
+
+    def test_current_process_is_alive(self) -> None:
+        """Verify the current process owns its containers."""
+        labels = owner_labels()
+
+        assert labels[OWNER_PID_LABEL] == str(os.getpid())
+        assert owner_is_alive(labels)
+
+    def test_exited_process_is_gone(self) -> None:
+        """Verify containers of an exited process are orphaned."""
+        process = subprocess.Popen(['true'])
+        labels = owner_labels(process.pid)
+        process.wait()
+
+        assert not owner_is_alive(labels)
+
+    def test_reused_pid_is_gone(self) -> None:
+        """Verify a process which started after the owner does not keep its containers alive."""
+        labels = owner_labels()
+        labels[OWNER_START_LABEL] = '0'
+
+        assert not owner_is_alive(labels)
+
+    def test_other_hosts_are_alive(self) -> None:
+        """Verify containers owned by another host are never considered orphaned."""
+        labels = owner_labels()
+        labels[OWNER_HOST_LABEL] = 'another-host'
+        labels[OWNER_PID_LABEL] = '0'
+
+        assert owner_is_alive(labels)
+
+
+class TestLockContainer(unittest.TestCase):
+
+    def test_container_is_locked_once(self) -> None:
+        """Verify a container lock is only taken again once it was released."""
+        with tempfile.TemporaryDirectory() as cache_home, \
+                mock.patch.dict(os.environ, {'XDG_CACHE_HOME': cache_home}):
+            lock = lock_container('abc')
+            assert lock is not None
+            try:
+                assert lock_container('abc') is None
+                other_lock = lock_container('def')
+                assert other_lock is not None
+                other_lock.close()
+            finally:
+                lock.close()
+
+            lock = lock_container('abc')
+            assert lock is not None
+            lock.close()
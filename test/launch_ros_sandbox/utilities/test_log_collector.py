@@ -0,0 +1,117 @@
+# Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the process collecting the output of sandboxed nodes."""
+
+import io
+import json
+import os
+import socket
+import tempfile
+import unittest
+
+from launch_ros_sandbox.descriptions.file_log_sink import FileLogSink
+from launch_ros_sandbox.utilities.log_collector import _attach_shared_memory
+from launch_ros_sandbox.utilities.log_collector import _Collector
+from launch_ros_sandbox.utilities.log_collector import LogCollector
+from launch_ros_sandbox.utilities.log_collector import SampleRing
+from launch_ros_sandbox.utilities.log_writer import get_log_writer
+from launch_ros_sandbox.utilities.node_output import PID_HEADER
+
+
+class TestSampleRing(unittest.TestCase):
+
+    def test_samples_wrap_around(self) -> None:
+        """Verify samples are returned in order, also when they wrap around the end of the ring."""
+        ring = SampleRing(bytearray(SampleRing.size(2, capacity=32)), 2)
+
+        for round_number in range(5):
+            assert ring.put(0, 'line {}'.format(round_number))
+            assert ring.put(1, 'other')
+            assert ring.take() == [(0, 'line {}'.format(round_number)), (1, 'other')]
+        assert ring.dropped == 0
+
+    def test_full_ring_drops_samples(self) -> None:
+        """Verify samples which do not fit are dropped and counted until the ring is read."""
+        ring = SampleRing(bytearray(SampleRing.size(1, capacity=32)), 1)
+
+        assert ring.put(0, 'first sample')
+        assert not ring.put(0, 'second sample')
+        assert ring.dropped == 1
+        assert ring.take() == [(0, 'first sample')]
+        assert ring.put(0, 'third sample')
+
+    def test_output_is_counted_per_node(self) -> None:
+        """Verify the lines and bytes of each node are counted separately."""
+        ring = SampleRing(bytearray(SampleRing.size(2)), 2)
+
+        ring.count_output(1, 3, 30)
+        ring.count_output(1, 1, 5)
+
+        assert ring.output(0) == (0, 0)
+        assert ring.output(1) == (4, 35)
+
+    def test_ring_is_shared_between_mappings(self) -> None:
+        """Verify a second mapping of the shared memory sees the samples of the first."""
+        collector = LogCollector(1)
+        memory = _attach_shared_memory(collector._memory.name)
+        ring = SampleRing(memory.buf, 1)
+
+        assert ring.put(0, 'shared')
+        assert collector.ring.take() == [(0, 'shared')]
+
+        del ring
+        memory.close()
+        collector.close()
+
+
+class TestCollector(unittest.TestCase):
+
+    def test_output_is_written_and_sampled(self) -> None:
+        """Verify the whole output goes to the sink and only a sample to the ring."""
+        ring = SampleRing(bytearray(SampleRing.size(1)), 1)
+        output = io.StringIO()
+        collector = _Collector(ring, 2.0, output=output)
+        host, container = socket.socketpair()
+        container.sendall(b'one\r\ntwo\r\nthree\r\nfour')
+        container.close()
+
+        with tempfile.TemporaryDirectory() as directory:
+            sink = FileLogSink(directory=directory, compression=None)
+            collector.collect(0, host, 'sandbox.talker', sink)
+            collector._loggers[0].handlers[0].close()
+            get_log_writer().join()
+
+            with open(os.path.join(directory, 'sandbox.talker.log')) as f:
+                lines = [line.split('] ', 1)[1] for line in f.read().splitlines()]
+
+        assert lines == ['one', 'two', 'three', 'four']
+        assert ring.take() == [(0, 'one'), (0, 'two')]
+        assert ring.output(0) == (4, len(b'one\r\ntwo\r\nthree\r\nfour'))
+        assert json.loads(output.getvalue()) == {'index': 0}
+
+    def test_pid_header_is_reported(self) -> None:
+        """Verify the PID written before the output is reported, and not logged."""
+        ring = SampleRing(bytearray(SampleRing.size(1)), 1)
+        output = io.StringIO()
+        collector = _Collector(ring, 10.0, output=output)
+        host, container = socket.socketpair()
+        container.sendall(PID_HEADER + b'42\r\none\r\n')
+        container.close()
+
+        collector.collect(0, host, 'sandbox.listener', None)
+
+        assert ring.take() == [(0, 'one')]
+        assert [json.loads(line) for line in output.getvalue().splitlines()] == [
+            {'index': 0, 'pid': 42}, {'index': 0}]
@@ -0,0 +1,106 @@
+# Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for following the files sandboxed nodes write to a host directory."""
+
+import asyncio
+import os
+import tempfile
+import unittest
+
+from launch_ros_sandbox.utilities.log_tail import LogFileFollower
+
+
+class TestLogFileFollower(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def _append(self, name: str, data: bytes) -> None:
+        with open(os.path.join(self.directory, name), 'ab') as f:
+            f.write(data)
+
+    def _wait_for(self, received: list, count: int) -> None:
+        async def wait() -> None:
+            while len(received) < count:
+                await asyncio.sleep(0.01)
+        self.loop.run_until_complete(asyncio.wait_for(wait(), 5))
+
+    def _follow_appended_data(self, use_inotify: bool) -> None:
+        self._append('old.log', b'earlier run\n')
+        follower = LogFileFollower(self.loop, self.directory, use_inotify=use_inotify)
+        self.addCleanup(follower.close)
+        received = []  # type: list
+        follower.follow('old.log', received.append)
+        follower.follow('new.log', received.append)
+        follower.follow('other.log', lambda data: self.fail('not followed'))
+        follower.unfollow('other.log')
+
+        self._append('old.log', b'first\n')
+        self._wait_for(received, 1)
+        self._append('new.log', b'second\n')
+        self._append('other.log', b'ignored\n')
+        self._wait_for(received, 2)
+
+        assert received == [b'first\n', b'second\n']
+
+    def test_follow_with_inotify(self) -> None:
+        """Verify only data appended to the followed files is passed on, as inotify reports it."""
+        follower = LogFileFollower(self.loop, self.directory)
+        uses_inotify = follower.uses_inotify
+        follower.close()
+        if not uses_inotify:
+            self.skipTest('inotify is unavailable')
+
+        self._follow_appended_data(use_inotify=True)
+
+    def test_follow_by_polling(self) -> None:
+        """Verify only data appended to the followed files is passed on without inotify."""
+        self._follow_appended_data(use_inotify=False)
+
+    def test_callback_may_unfollow(self) -> None:
+        """Verify a callback can stop following its own file."""
+        follower = LogFileFollower(self.loop, self.directory, use_inotify=False)
+        self.addCleanup(follower.close)
+        received = []  # type: list
+
+        def callback(data: bytes) -> None:
+            received.append(data)
+            follower.unfollow('node.exit')
+        follower.follow('node.exit', callback, from_end=False)
+        self._append('node.exit', b'0\n')
+        follower.poll()
+
+        assert received == [b'0\n']
+
+    def test_paused_file_is_read_once_resumed(self) -> None:
+        """Verify nothing appended to a paused file is lost, and it is read once resumed."""
+        follower = LogFileFollower(self.loop, self.directory, use_inotify=False)
+        self.addCleanup(follower.close)
+        received = []  # type: list
+        follower.follow('node.log', received.append)
+
+        follower.pause('node.log')
+        self._append('node.log', b'first\n')
+        follower.poll()
+        assert follower.is_paused('node.log')
+        assert received == []
+
+        follower.resume('node.log')
+        assert not follower.is_paused('node.log')
+        assert received == [b'first\n']
@@ -0,0 +1,154 @@
+# Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for writing node output to rotating, compressed log files."""
+
+import gzip
+import logging
+import os
+import tempfile
+import threading
+import time
+import unittest
+import unittest.mock
+
+from launch_ros_sandbox.descriptions.file_log_sink import FileLogSink
+from launch_ros_sandbox.utilities.log_writer import FileSinkHandler
+from launch_ros_sandbox.utilities.log_writer import get_log_writer
+from launch_ros_sandbox.utilities.log_writer import LogWriter
+from launch_ros_sandbox.utilities.log_writer import RotatingCompressedFile
+
+
+class TestRotatingCompressedFile(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.prefix = os.path.join(self.directory.name, 'logs', 'talker')
+
+    def test_gzip_output_is_appended_across_opens(self) -> None:
+        """Verify output written by two launches is read back as one file."""
+        sink = FileLogSink(directory=self.directory.name)
+        for line in (b'first launch\n', b'second launch\n'):
+            log_file = RotatingCompressedFile(self.prefix, sink)
+            log_file.write(line)
+            log_file.close()
+
+        with gzip.open(self.prefix + '.log.gz') as f:
+            assert f.read() == b'first launch\nsecond launch\n'
+
+    def test_flushed_output_can_be_read_while_open(self) -> None:
+        """Verify flushed output is readable before the file is closed."""
+        log_file = RotatingCompressedFile(self.prefix, FileLogSink(directory=self.directory.name))
+        log_file.write(b'still running\n')
+        log_file.flush()
+
+        decompressor = gzip.zlib.decompressobj(16 + gzip.zlib.MAX_WBITS)
+        with open(log_file.path, 'rb') as f:
+            assert decompressor.decompress(f.read()) == b'still running\n'
+        log_file.close()
+
+    def test_files_are_rotated(self) -> None:
+        """Verify a full file is rotated and only backup_count old files are kept."""
+        sink = FileLogSink(
+            directory=self.directory.name, max_bytes=10, backup_count=2, compression=None)
+        log_file = RotatingCompressedFile(self.prefix, sink)
+        for number in range(4):
+            log_file.write('line {} padded\n'.format(number).encode())
+        log_file.close()
+
+        def read(path):
+            with open(path, 'rb') as f:
+                return f.read()
+
+        assert read(self.prefix + '.log') == b'line 3 padded\n'
+        assert read(self.prefix + '.1.log') == b'line 2 padded\n'
+        assert read(self.prefix + '.2.log') == b'line 1 padded\n'
+        assert not os.path.exists(self.prefix + '.3.log')
+
+
+class TestFileSinkHandler(unittest.TestCase):
+
+    def test_records_are_written_in_the_background(self) -> None:
+        """Verify the records of a node's logger end up in its compressed log file."""
+        with tempfile.TemporaryDirectory() as directory:
+            logger = logging.getLogger('test_log_writer.talker')
+            handler = FileSinkHandler('talker', FileLogSink(directory=directory))
+            logger.addHandler(handler)
+            logger.setLevel(logging.INFO)
+            try:
+                logger.info('hello world')
+            finally:
+                logger.removeHandler(handler)
+                logger.setLevel(logging.NOTSET)
+                handler.close()
+            get_log_writer().join()
+
+            with gzip.open(handler.path) as f:
+                assert f.read().decode().endswith('[INFO] hello world\n')
+
+    def test_open_files_are_closed_on_exit(self) -> None:
+        """Verify the exit hook finishes the compressed files whose handler was never closed."""
+        with tempfile.TemporaryDirectory() as directory:
+            logger = logging.getLogger('test_log_writer.listener')
+            handler = FileSinkHandler('listener', FileLogSink(directory=directory))
+            logger.addHandler(handler)
+            logger.setLevel(logging.INFO)
+            try:
+                logger.info('last words')
+            finally:
+                logger.removeHandler(handler)
+                logger.setLevel(logging.NOTSET)
+
+            assert get_log_writer().close_all(5.0)
+
+            with gzip.open(handler.path) as f:
+                assert f.read().decode().endswith('[INFO] last words\n')
+
+
+class TestLogWriter(unittest.TestCase):
+
+    def test_writes_are_dropped_while_the_queue_is_full(self) -> None:
+        """Verify a stalled disk drops writes beyond the queue size, and marks where they were."""
+        written = []
+        resume = threading.Event()
+
+        def write(data: bytes) -> None:
+            # The first write stalls until the test resumes it.
+            if not written:
+                resume.wait(5)
+            written.append(data)
+
+        log_file = unittest.mock.Mock()
+        log_file.write.side_effect = write
+        writer = LogWriter(queue_size=1)
+        writer.write(log_file, b'a\n')
+        # Wait until the writer thread took the first write, and stalls on it.
+        while not writer._queue.empty():
+            time.sleep(0.01)
+        writer.write(log_file, b'b\n')
+        writer.write(log_file, b'c\n')
+        writer.write(log_file, b'd\n')
+        assert writer.dropped == 2
+
+        resume.set()
+        writer.join()
+        writer.write(log_file, b'e\n')
+        writer.close(log_file)
+        writer.join()
+
+        assert written[:2] == [b'a\n', b'b\n']
+        assert written[2].startswith(b'[2 lines dropped')
+        assert written[3:] == [b'e\n']
+        log_file.close.assert_called_once_with()
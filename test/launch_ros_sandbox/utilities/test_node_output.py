@@ -0,0 +1,228 @@
+# Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for turning the output of sandboxed nodes into log records."""
+
+import logging
+import struct
+import threading
+import unittest
+import unittest.mock
+
+from launch_ros_sandbox.utilities.node_output import emit_lines
+from launch_ros_sandbox.utilities.node_output import LineDecoder
+from launch_ros_sandbox.utilities.node_output import LogPump
+from launch_ros_sandbox.utilities.node_output import LogQueue
+from launch_ros_sandbox.utilities.node_output import PID_HEADER
+from launch_ros_sandbox.utilities.node_output import PidHeader
+from launch_ros_sandbox.utilities.node_output import StreamDemultiplexer
+from launch_ros_sandbox.utilities.node_output import TokenBucket
+
+
+class TestLineDecoder(unittest.TestCase):
+
+    def test_multibyte_character_split_across_chunks(self) -> None:
+        """Verify a character split between two chunks is decoded once both arrived."""
+        decoder = LineDecoder()
+        data = 'grüß dich\n'.encode()
+
+        assert decoder.feed(data[:3]) == []
+        assert decoder.feed(data[3:]) == ['grüß dich']
+
+    def test_chunk_with_many_lines(self) -> None:
+        """Verify every line of a chunk is returned on its own, without TTY line endings."""
+        decoder = LineDecoder()
+
+        assert decoder.feed(b'one\r\ntwo\r\n\r\nthree') == ['one', 'two']
+        assert decoder.flush() == ['three']
+        assert decoder.flush() == []
+
+    def test_invalid_utf8_is_replaced(self) -> None:
+        """Verify invalid UTF-8 does not drop the line it is in."""
+        assert LineDecoder().feed(b'bad \xff byte\n') == ['bad � byte']
+
+    def test_long_lines_are_split(self) -> None:
+        """Verify output without line breaks does not grow the buffer without bound."""
+        decoder = LineDecoder(max_line_length=10)
+
+        assert decoder.feed(b'x' * 8) == []
+        assert decoder.feed(b'x' * 8) == ['x' * 16]
+
+
+class TestPidHeader(unittest.TestCase):
+
+    def test_header_split_across_chunks(self) -> None:
+        """Verify the PID is parsed from a header split anywhere, and the output after it kept."""
+        data = PID_HEADER + b'42\r\nhello\r\n'
+        for split in range(1, len(data)):
+            pid_header = PidHeader()
+
+            output = pid_header.feed(data[:split]) + pid_header.feed(data[split:])
+
+            assert (pid_header.pid, output) == (42, b'hello\r\n')
+
+    def test_output_without_header_is_kept(self) -> None:
+        """Verify output which does not start with a header is passed on whole."""
+        pid_header = PidHeader()
+
+        assert pid_header.feed(PID_HEADER[:3]) == b''
+        assert pid_header.feed(b'hello') == PID_HEADER[:3] + b'hello'
+        assert pid_header.pid is None and pid_header.done
+
+
+class TestStreamDemultiplexer(unittest.TestCase):
+
+    @staticmethod
+    def _frame(stream: int, payload: bytes) -> bytes:
+        return struct.pack('>BxxxL', stream, len(payload)) + payload
+
+    def test_frames_in_one_chunk(self) -> None:
+        """Verify each frame's payload is returned with its stream, binary data included."""
+        demultiplexer = StreamDemultiplexer()
+        data = self._frame(1, b'out\n') + self._frame(2, b'\x00\xff err\n') + self._frame(1, b'')
+
+        assert demultiplexer.feed(data) == [(1, b'out\n'), (2, b'\x00\xff err\n')]
+
+    def test_frames_split_across_chunks(self) -> None:
+        """Verify headers and payloads split across chunks are returned as they arrive."""
+        demultiplexer = StreamDemultiplexer()
+        data = self._frame(2, b'error line\n') + self._frame(1, b'output\n')
+
+        payloads = []
+        for offset in range(0, len(data), 5):
+            payloads += demultiplexer.feed(data[offset:offset + 5])
+
+        assert b''.join(payload for stream, payload in payloads if stream == 2) == \
+            b'error line\n'
+        assert b''.join(payload for stream, payload in payloads if stream == 1) == b'output\n'
+
+
+class TestEmitLines(unittest.TestCase):
+
+    def test_lines_are_logged_as_records(self) -> None:
+        """Verify each line becomes its own record at the requested level."""
+        logger = logging.getLogger('test_node_output')
+
+        with self.assertLogs(logger, level='DEBUG') as logs:
+            emit_lines(logger, ['100% done', 'second'], logging.WARNING)
+
+        assert [(record.levelno, record.getMessage()) for record in logs.records] == \
+            [(logging.WARNING, '100% done'), (logging.WARNING, 'second')]
+
+    def test_disabled_level_is_skipped(self) -> None:
+        """Verify no record is created for a level the logger does not log."""
+        logger = logging.getLogger('test_node_output.disabled')
+        logger.setLevel(logging.WARNING)
+        self.addCleanup(logger.setLevel, logging.NOTSET)
+
+        with unittest.mock.patch.object(logger, 'makeRecord') as make_record:
+            emit_lines(logger, ['line'], logging.INFO)
+
+        make_record.assert_not_called()
+
+
+class TestTokenBucket(unittest.TestCase):
+
+    def test_burst_then_rate(self) -> None:
+        """Verify the bucket allows a burst, then refills at its rate up to the burst."""
+        now = [0.0]
+        bucket = TokenBucket(10.0, 5, clock=lambda: now[0])
+
+        assert bucket.take(8) == 5
+        assert bucket.take(1) == 0
+        now[0] = 0.25
+        assert bucket.take(8) == 2
+        now[0] = 100.0
+        assert bucket.take(8) == 5
+
+
+class TestLogQueue(unittest.TestCase):
+
+    logger = logging.getLogger('test_node_output')
+
+    def _item(self, *lines: str):
+        return (self.logger, logging.INFO, list(lines))
+
+    def _drain(self, log_queue: LogQueue):
+        log_queue.close()
+        lines = []
+        item = log_queue.get()
+        while item is not None:
+            lines += item[2]
+            item = log_queue.get()
+        return lines
+
+    def test_drop_oldest(self) -> None:
+        """Verify the lines which waited the longest are dropped from a full queue."""
+        log_queue = LogQueue(3, 'drop-oldest')
+
+        for line in ('a', 'b', 'c', 'd'):
+            assert log_queue.put(self._item(line))
+
+        assert log_queue.dropped == 1
+        assert self._drain(log_queue) == ['b', 'c', 'd']
+
+    def test_drop_newest(self) -> None:
+        """Verify new lines are dropped while the queue is full."""
+        log_queue = LogQueue(3, 'drop-newest')
+
+        assert log_queue.put(self._item('a', 'b'))
+        assert log_queue.put(self._item('c', 'd'))
+
+        assert log_queue.dropped == 2
+        assert self._drain(log_queue) == ['a', 'b']
+
+    def test_block_without_waiting(self) -> None:
+        """Verify a reader which must not block is told to wait for room instead."""
+        log_queue = LogQueue(2, 'block')
+
+        assert log_queue.put(self._item('a'), block=False)
+        assert not log_queue.put(self._item('b', 'c'), block=False)
+
+        waiter = threading.Thread(target=log_queue.wait_for_room)
+        waiter.start()
+        log_queue.get()
+        log_queue.get()
+        waiter.join(timeout=5)
+
+        assert not waiter.is_alive()
+        assert log_queue.dropped == 0
+
+    def test_offer_drops_while_full(self) -> None:
+        """Verify lines offered to a full queue with the block policy are dropped, not queued."""
+        log_queue = LogQueue(2, 'block')
+
+        log_queue.offer(self._item('a', 'b'))
+        log_queue.offer(self._item('c'))
+
+        assert log_queue.dropped == 1
+        assert self._drain(log_queue) == ['a', 'b']
+
+
+class TestLogPump(unittest.TestCase):
+
+    def test_queued_lines_are_logged(self) -> None:
+        """Verify the pump logs everything queued before the queue was closed."""
+        logger = logging.getLogger('test_node_output')
+        log_queue = LogQueue(10, 'block')
+
+        with self.assertLogs(logger, level='INFO') as logs:
+            pump = LogPump(log_queue, 'test log pump')
+            log_queue.put((logger, logging.INFO, ['one', 'two']))
+            log_queue.put((logger, logging.WARNING, ['three']))
+            log_queue.close()
+            pump.join(timeout=5)
+
+        assert [(record.levelno, record.getMessage()) for record in logs.records] == \
+            [(logging.INFO, 'one'), (logging.INFO, 'two'), (logging.WARNING, 'three')]
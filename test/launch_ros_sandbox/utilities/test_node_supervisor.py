@@ -0,0 +1,143 @@
+# Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the node supervisor run inside sandbox containers."""
+
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from launch_ros_sandbox.utilities import node_supervisor
+from launch_ros_sandbox.utilities.node_supervisor import encode_frame
+from launch_ros_sandbox.utilities.node_supervisor import FrameDecoder
+from launch_ros_sandbox.utilities.node_supervisor import signal_request
+from launch_ros_sandbox.utilities.node_supervisor import start_request
+
+# Stand-in for 'ros2 run', which runs the node as its child and ignores SIGTERM itself.
+_ROS2_RUN = """
+import signal, subprocess, sys
+node = subprocess.Popen(sys.argv[1:])
+signal.signal(signal.SIGTERM, signal.SIG_IGN)
+sys.exit(node.wait())
+"""
+
+# Stand-in for a node, which reports that it runs and that it was terminated.
+_NODE = """
+import signal, sys, time
+def terminated(signum, frame):
+    print('terminated', flush=True)
+    sys.exit(0)
+signal.signal(signal.SIGTERM, terminated)
+print('running', flush=True)
+while True:
+    time.sleep(0.01)
+"""
+
+
+class TestFrameDecoder(unittest.TestCase):
+
+    def test_frames_split_across_reads(self) -> None:
+        """Verify frames are reassembled however the stream is split."""
+        stream = encode_frame(b'o', 1, b'hello\n') + encode_frame(b'x', 1, b'0')
+        decoder = FrameDecoder()
+
+        frames = []
+        for offset in range(0, len(stream), 5):
+            frames += decoder.feed(stream[offset:offset + 5])
+
+        assert frames == [(b'o', 1, b'hello\n'), (b'x', 1, b'0')]
+
+
+class TestNodeSupervisor(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.state_directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.state_directory.cleanup)
+        self.supervisor = subprocess.Popen(
+            [sys.executable, '-u', node_supervisor.__file__, self.state_directory.name],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE
+        )
+        self.addCleanup(self.supervisor.wait)
+        self.addCleanup(self.supervisor.stdout.close)
+        self.decoder = FrameDecoder()
+        self.frames = []  # type: list
+
+    def _request(self, request: bytes) -> None:
+        self.supervisor.stdin.write(request)
+        self.supervisor.stdin.flush()
+
+    def _read_until(self, kind: bytes, index: int) -> bytes:
+        while True:
+            for frame in self.frames:
+                if frame[:2] == (kind, index):
+                    self.frames.remove(frame)
+                    return frame[2]
+            data = os.read(self.supervisor.stdout.fileno(), 4096)
+            assert data, 'supervisor exited'
+            self.frames += self.decoder.feed(data)
+
+    def _read_line(self, index: int) -> bytes:
+        line = b''
+        while not line.endswith(b'\n'):
+            line += self._read_until(b'o', index)
+        return line
+
+    def test_nodes_are_run_and_reaped(self) -> None:
+        """Verify the nodes of one request are started and their output and status reported."""
+        self._request(start_request([
+            (0, ['sh', '-c', 'echo hello; exit 3']),
+            (1, ['sleep', '30']),
+            (2, ['/nonexistent/node']),
+        ]))
+
+        assert self._read_until(b'o', 0) == b'hello\n'
+        assert self._read_until(b'x', 0) == b'3'
+        assert self._read_until(b'e', 2)
+
+        pid = self._read_until(b's', 1)
+        with open(os.path.join(self.state_directory.name, '1.pid')) as f:
+            assert f.read().strip() == pid.decode()
+
+        self._request(signal_request(1, 'TERM'))
+        assert self._read_until(b'x', 1) == b'-15'
+
+        self.supervisor.stdin.close()
+        assert self.supervisor.wait(timeout=10) == 0
+
+    def test_signal_reaches_the_node_started_by_ros2_run(self) -> None:
+        """Verify a signal is sent to the whole session of a node, including its grandchild."""
+        self._request(start_request([
+            (0, [sys.executable, '-c', _ROS2_RUN, sys.executable, '-c', _NODE]),
+        ]))
+        assert self._read_line(0) == b'running\n'
+
+        self._request(signal_request(0, 'TERM'))
+
+        assert self._read_line(0) == b'terminated\n'
+        assert self._read_until(b'x', 0) == b'0'
+        self.supervisor.stdin.close()
+        assert self.supervisor.wait(timeout=10) == 0
+
+    def test_closing_stdin_stops_nodes(self) -> None:
+        """Verify the nodes are stopped when the launch process goes away."""
+        self._request(start_request([(0, ['sleep', '30'])]))
+        self._read_until(b's', 0)
+
+        self.supervisor.stdin.close()
+
+        assert self._read_until(b'x', 0) == b'-2'
+        assert self.supervisor.wait(timeout=10) == 0
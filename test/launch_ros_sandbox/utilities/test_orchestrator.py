@@ -0,0 +1,117 @@
+# Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the SandboxOrchestrator."""
+
+import asyncio
+import os
+import threading
+import time
+import unittest
+from unittest import mock
+
+from launch_ros_sandbox.utilities.orchestrator import get_orchestrator
+from launch_ros_sandbox.utilities.orchestrator import max_concurrent_starts
+from launch_ros_sandbox.utilities.orchestrator import MAX_CONCURRENT_STARTS_ENV
+from launch_ros_sandbox.utilities.orchestrator import SandboxOrchestrator
+
+
+class TestSandboxOrchestrator(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.loop = asyncio.new_event_loop()
+
+    def tearDown(self) -> None:
+        self.loop.close()
+
+    def test_single_flight_runs_concurrent_work_once(self) -> None:
+        """Verify concurrent callers with the same key share a single run of the work."""
+        orchestrator = SandboxOrchestrator(self.loop, max_concurrent_starts=4)
+        calls = []
+
+        def pull() -> str:
+            calls.append(threading.get_ident())
+            time.sleep(0.1)
+            return 'osrf/ros@sha256:abc'
+
+        async def start_sandboxes():
+            return await asyncio.gather(
+                *[orchestrator.single_flight('osrf/ros', pull) for _ in range(10)])
+
+        results = self.loop.run_until_complete(start_sandboxes())
+
+        assert results == ['osrf/ros@sha256:abc'] * 10
+        assert len(calls) == 1
+        assert not orchestrator.in_flight('osrf/ros')
+
+        # Once done, the work runs again for the next caller.
+        self.loop.run_until_complete(orchestrator.single_flight('osrf/ros', pull))
+        assert len(calls) == 2
+
+    def test_single_flight_shares_exceptions(self) -> None:
+        """Verify every caller waiting for failed work receives its exception."""
+        orchestrator = SandboxOrchestrator(self.loop, max_concurrent_starts=4)
+
+        def pull() -> None:
+            time.sleep(0.05)
+            raise OSError('registry unreachable')
+
+        async def start_sandboxes():
+            return await asyncio.gather(
+                *[orchestrator.single_flight('osrf/ros', pull) for _ in range(3)],
+                return_exceptions=True)
+
+        results = self.loop.run_until_complete(start_sandboxes())
+
+        assert all(isinstance(result, OSError) for result in results)
+
+    def test_run_limited_bounds_concurrency(self) -> None:
+        """Verify no more than the limit of starts run at the same time."""
+        orchestrator = SandboxOrchestrator(self.loop, max_concurrent_starts=2)
+        lock = threading.Lock()
+        running = [0]
+        peak = [0]
+
+        def start() -> None:
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.05)
+            with lock:
+                running[0] -= 1
+
+        async def start_sandboxes():
+            await asyncio.gather(*[orchestrator.run_limited(start) for _ in range(6)])
+
+        self.loop.run_until_complete(start_sandboxes())
+
+        assert peak[0] == 2
+
+    def test_get_orchestrator_is_shared_per_loop(self) -> None:
+        """Verify all sandboxes on one loop share the same orchestrator."""
+        assert get_orchestrator(self.loop) is get_orchestrator(self.loop)
+
+        other_loop = asyncio.new_event_loop()
+        try:
+            assert get_orchestrator(other_loop) is not get_orchestrator(self.loop)
+        finally:
+            other_loop.close()
+
+    def test_max_concurrent_starts_from_environment(self) -> None:
+        """Verify the limit is read from the environment and validated."""
+        with mock.patch.dict(os.environ, {MAX_CONCURRENT_STARTS_ENV: '3'}):
+            assert max_concurrent_starts() == 3
+        with mock.patch.dict(os.environ, {MAX_CONCURRENT_STARTS_ENV: '0'}):
+            with self.assertRaises(ValueError):
+                max_concurrent_starts()
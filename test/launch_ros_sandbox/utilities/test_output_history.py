@@ -0,0 +1,62 @@
+# Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the history of the most recent output of sandboxed nodes."""
+
+import unittest
+
+from launch_ros_sandbox.utilities.output_history import OutputHistory
+
+
+class TestOutputHistory(unittest.TestCase):
+
+    def test_lines_are_returned_oldest_first(self) -> None:
+        """Verify the history returns all lines until it is full, or only the last ones."""
+        history = OutputHistory(1024)
+        history.append(['one', 'two'])
+        history.append(['three'])
+
+        assert history.lines() == ['one', 'two', 'three']
+        assert history.lines(2) == ['two', 'three']
+        assert history.lines(0) == []
+
+    def test_oldest_lines_are_overwritten(self) -> None:
+        """Verify a full history keeps the newest lines, and drops a partly overwritten line."""
+        history = OutputHistory(16)
+        for index in range(10):
+            history.append(['line {}'.format(index)])
+
+        # Each line takes 7 bytes, so two complete lines fit.
+        assert history.lines() == ['line 8', 'line 9']
+
+    def test_oversized_output_keeps_its_end(self) -> None:
+        """Verify output larger than the history keeps the complete lines at its end."""
+        history = OutputHistory(8)
+        history.append(['first', 'x' * 20, 'end'])
+
+        assert history.lines() == ['end']
+
+    def test_multibyte_characters(self) -> None:
+        """Verify lines are stored as UTF-8 and decoded when they are read."""
+        history = OutputHistory(64)
+        history.append(['über', 'naïve'])
+
+        assert history.lines() == ['über', 'naïve']
+
+    def test_disabled_history(self) -> None:
+        """Verify a history of size 0 keeps nothing."""
+        history = OutputHistory(0)
+        history.append(['one'])
+
+        assert history.lines() == []
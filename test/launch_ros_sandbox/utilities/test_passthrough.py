@@ -0,0 +1,92 @@
+# Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for copying the raw output of sandboxed nodes to a file descriptor."""
+
+import os
+import socket
+import tempfile
+import threading
+import unittest
+
+from launch_ros_sandbox.utilities.passthrough import _copy_output
+from launch_ros_sandbox.utilities.passthrough import forward_output
+
+# More than fits into a pipe or a socket buffer at once.
+_OUTPUT = bytes(range(256)) * 4096
+
+
+class TestForwardOutput(unittest.TestCase):
+
+    def _send(self, data: bytes) -> socket.socket:
+        host, container = socket.socketpair()
+        self.addCleanup(host.close)
+
+        def send() -> None:
+            container.sendall(data)
+            container.close()
+        sender = threading.Thread(target=send)
+        sender.start()
+        self.addCleanup(sender.join)
+        return host
+
+    def test_output_to_file(self) -> None:
+        """Verify the output is copied verbatim after what the file already holds."""
+        source = self._send(_OUTPUT)
+
+        with tempfile.TemporaryFile() as f:
+            f.write(b'earlier output\n')
+            f.flush()
+            assert forward_output(source, f.fileno()) == len(_OUTPUT)
+
+            f.seek(0)
+            assert f.read() == b'earlier output\n' + _OUTPUT
+
+    def test_prefix_is_copied_first(self) -> None:
+        """Verify output already read from the socket is written before the rest."""
+        source = self._send(_OUTPUT[1:])
+
+        with tempfile.TemporaryFile() as f:
+            assert forward_output(source, f.fileno(), prefix=_OUTPUT[:1]) == len(_OUTPUT)
+
+            f.seek(0)
+            assert f.read() == _OUTPUT
+
+    def test_output_to_pipe(self) -> None:
+        """Verify the output is copied verbatim to a pipe, as stdout often is."""
+        source = self._send(_OUTPUT)
+        read_end, write_end = os.pipe()
+        received = []
+
+        def receive() -> None:
+            with os.fdopen(read_end, 'rb') as f:
+                received.append(f.read())
+        receiver = threading.Thread(target=receive)
+        receiver.start()
+
+        forward_output(source, write_end)
+        os.close(write_end)
+        receiver.join()
+
+        assert received == [_OUTPUT]
+
+    def test_copy_without_splice(self) -> None:
+        """Verify the output is copied verbatim where it cannot be spliced."""
+        source = self._send(_OUTPUT)
+
+        with tempfile.TemporaryFile() as f:
+            assert _copy_output(source, f.fileno(), 0) == len(_OUTPUT)
+
+            f.seek(0)
+            assert f.read() == _OUTPUT
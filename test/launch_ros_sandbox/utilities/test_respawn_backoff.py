@@ -0,0 +1,70 @@
+# Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for deciding when a sandboxed node which exited is run again."""
+
+import unittest
+
+from launch_ros_sandbox.descriptions.respawn import Respawn
+from launch_ros_sandbox.utilities.respawn_backoff import RespawnBackoff
+
+
+class TestRespawnBackoff(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.now = 0.0
+
+    def _backoff(self, respawn: Respawn, factor: float = 1.0) -> RespawnBackoff:
+        return RespawnBackoff(respawn, clock=lambda: self.now, uniform=lambda a, b: factor)
+
+    def test_delay_grows_exponentially_up_to_the_maximum(self) -> None:
+        """Verify each restart in a row waits longer, but never longer than the maximum."""
+        backoff = self._backoff(Respawn(initial_delay=0.5, max_delay=3.0, multiplier=2.0))
+
+        delays = []
+        for _ in range(5):
+            backoff.started()
+            delays.append(backoff.next_delay())
+
+        assert delays == [0.5, 1.0, 2.0, 3.0, 3.0]
+        assert backoff.restarts == 5
+
+    def test_delay_is_jittered(self) -> None:
+        """Verify the delay is varied within the jitter."""
+        bounds = []
+        backoff = RespawnBackoff(Respawn(initial_delay=2.0, jitter=0.25),
+                                 uniform=lambda a, b: bounds.append((a, b)) or b)
+
+        assert backoff.next_delay() == 2.5
+        assert bounds == [(0.75, 1.25)]
+
+    def test_node_is_given_up_on(self) -> None:
+        """Verify no delay is returned once the node reached its maximum restarts in a row."""
+        backoff = self._backoff(Respawn(max_restarts=2))
+
+        assert backoff.next_delay() is not None
+        assert backoff.next_delay() is not None
+        assert backoff.next_delay() is None
+
+    def test_restarts_are_forgotten_after_the_reset_window(self) -> None:
+        """Verify a node which ran for the reset window is restarted as if it never was."""
+        backoff = self._backoff(Respawn(max_restarts=1, initial_delay=1.0, reset_window=10.0))
+
+        backoff.started()
+        self.now = 5.0
+        assert backoff.next_delay() == 1.0
+
+        backoff.started()
+        self.now = 15.0
+        assert backoff.next_delay() == 1.0
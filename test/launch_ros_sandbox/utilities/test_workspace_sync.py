@@ -0,0 +1,105 @@
+# Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the incremental workspace synchronization."""
+
+import os
+import tarfile
+import tempfile
+import unittest
+from unittest import mock
+
+from launch_ros_sandbox.utilities.content_hash import FileHashCache
+from launch_ros_sandbox.utilities.workspace_sync import affected_packages
+from launch_ros_sandbox.utilities.workspace_sync import WorkspaceSync
+
+
+class TestAffectedPackages(unittest.TestCase):
+
+    def test_isolated_install_space(self) -> None:
+        """Verify packages are found in an isolated install space."""
+        assert affected_packages(['foo/lib/foo/talker', 'bar/share/bar/package.xml']) == \
+            {'foo', 'bar'}
+
+    def test_merged_install_space(self) -> None:
+        """Verify packages are found in a merged install space."""
+        assert affected_packages([
+            'lib/foo/talker',
+            'share/bar/package.xml',
+            'lib/python3.8/site-packages/baz/__init__.py',
+            'local_setup.bash',
+        ]) == {'foo', 'bar', 'baz'}
+
+
+class TestWorkspaceSync(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self._root = self._tmp_dir.name
+        self._write('foo/lib/foo/talker', b'talker')
+        self._write('bar/lib/bar/listener', b'listener')
+        self._cache_dir = tempfile.TemporaryDirectory()
+        self._hash_cache = FileHashCache(os.path.join(self._cache_dir.name, 'file_hashes.json'))
+        self._sync = WorkspaceSync(self._root, self._hash_cache)
+        self._sync.snapshot()
+
+    def tearDown(self) -> None:
+        self._tmp_dir.cleanup()
+        self._cache_dir.cleanup()
+
+    def _write(self, path: str, content: bytes) -> None:
+        path = os.path.join(self._root, path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(content)
+
+    def test_no_changes(self) -> None:
+        """Verify nothing is reported for an unchanged workspace."""
+        assert self._sync.poll() is None
+        assert self._sync.poll() is None
+
+    def test_changes_are_reported_once_stable(self) -> None:
+        """Verify changes are reported once they were seen by two consecutive polls."""
+        self._write('foo/lib/foo/talker', b'new talker')
+        os.remove(os.path.join(self._root, 'bar/lib/bar/listener'))
+
+        assert self._sync.poll() is None
+        assert self._sync.poll() == (['foo/lib/foo/talker'], ['bar/lib/bar/listener'])
+        assert self._sync.poll() is None
+
+    def test_touched_files_are_not_reported(self) -> None:
+        """Verify files whose content did not change are not reported."""
+        path = os.path.join(self._root, 'foo/lib/foo/talker')
+        stat_result = os.stat(path)
+        os.utime(path, ns=(stat_result.st_atime_ns, stat_result.st_mtime_ns + 10**9))
+
+        assert self._sync.poll() is None
+        assert self._sync.poll() is None
+
+    def test_snapshot_hashes_only_changed_files(self) -> None:
+        """Verify a snapshot reads only the files whose stat changed since they were hashed."""
+        self._write('foo/lib/foo/talker', b'new talker')
+
+        with mock.patch('launch_ros_sandbox.utilities.content_hash.hash_file_content',
+                        return_value='digest') as hash_file_content:
+            WorkspaceSync(self._root, self._hash_cache).snapshot()
+
+        hash_file_content.assert_called_once_with(os.path.join(self._root, 'foo/lib/foo/talker'))
+
+    def test_archive_contains_changed_files(self) -> None:
+        """Verify the archive holds the given files at their workspace relative path."""
+        with self._sync.create_archive(['foo/lib/foo/talker']) as archive:
+            with tarfile.open(fileobj=archive) as tar:
+                assert tar.getnames() == ['foo/lib/foo/talker']
+                assert tar.extractfile('foo/lib/foo/talker').read() == b'talker'